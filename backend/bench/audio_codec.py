@@ -0,0 +1,198 @@
+"""NumPy G.711 transcoding and streaming resampling for carrier media streams.
+
+Every call moves 8 kHz μ-law (Twilio, Telnyx PCMU) or A-law (Telnyx PCMA) in
+both directions, resampled to/from the 16 kHz the VAD, STT and TTS run at.
+Encoding and decoding are single table lookups over the whole chunk (a 64K
+entry table indexed by the 16-bit sample, a 256 entry table per code byte);
+resampling is a polyphase windowed-sinc FIR evaluated as one matrix product
+per chunk, with filter history carried between chunks so 20 ms frames join
+without clicks.
+
+Encode/decode are bit-exact with ``audioop``. The per-call cost is NumPy's
+call overhead, so the win grows with buffer size: whole clips and long TTS
+chunks are cheap, while on 20-40 ms carrier frames Pipecat's audioop + soxr
+path still uses less CPU. ``python -m bench.codec_bench`` measures both.
+Kept for the benchmark (and media_load's synthetic caller); the pipeline uses
+Pipecat's serializers.
+"""
+
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+# ── G.711 tables ──────────────────────────────────────────────────────────────
+
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 32635
+
+
+def _ulaw_decode_table() -> np.ndarray:
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    magnitude = (((u & 0x0F) << 3) + _ULAW_BIAS << exponent) - _ULAW_BIAS
+    return np.where(u & 0x80, -magnitude, magnitude).astype(np.int16)
+
+
+def _ulaw_encode_table() -> np.ndarray:
+    x = np.arange(65536, dtype=np.int32).astype(np.uint16).view(np.int16).astype(np.int32)
+    sign = np.where(x < 0, 0x80, 0)
+    # audioop works on the top 14 bits, so drop the low two before clipping.
+    magnitude = np.minimum(np.abs(x >> 2) << 2, _ULAW_CLIP) + _ULAW_BIAS
+    exponent = np.floor(np.log2(magnitude)).astype(np.int32) - 7
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8)
+
+
+def _alaw_decode_table() -> np.ndarray:
+    a = np.arange(256, dtype=np.int32) ^ 0x55
+    exponent = (a >> 4) & 0x07
+    mantissa = (a & 0x0F) << 4
+    magnitude = np.where(exponent == 0, mantissa + 8, (mantissa + 0x108) << np.maximum(exponent - 1, 0))
+    return np.where(a & 0x80, magnitude, -magnitude).astype(np.int16)
+
+
+def _alaw_encode_table() -> np.ndarray:
+    x = np.arange(65536, dtype=np.int32).astype(np.uint16).view(np.int16).astype(np.int32) >> 3
+    mask = np.where(x >= 0, 0xD5, 0x55)
+    x = np.where(x >= 0, x, -x - 1)
+    # Segment = number of significant bits above the 5-bit mantissa window.
+    segment = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), x)
+    shift = np.where(segment < 2, 1, segment)
+    code = (np.minimum(segment, 7) << 4) | ((x >> shift) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code)
+    return (code ^ mask).astype(np.uint8)
+
+
+_ULAW_DECODE = _ulaw_decode_table()
+_ULAW_ENCODE = _ulaw_encode_table()
+_ALAW_DECODE = _alaw_decode_table()
+_ALAW_ENCODE = _alaw_encode_table()
+
+
+def ulaw_decode(data: bytes) -> bytes:
+    """μ-law bytes → 16-bit little-endian PCM."""
+    return _ULAW_DECODE[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+
+def ulaw_encode(pcm: bytes) -> bytes:
+    """16-bit little-endian PCM → μ-law bytes."""
+    return _ULAW_ENCODE[np.frombuffer(pcm, dtype=np.uint16)].tobytes()
+
+
+def alaw_decode(data: bytes) -> bytes:
+    """A-law bytes → 16-bit little-endian PCM."""
+    return _ALAW_DECODE[np.frombuffer(data, dtype=np.uint8)].tobytes()
+
+
+def alaw_encode(pcm: bytes) -> bytes:
+    """16-bit little-endian PCM → A-law bytes."""
+    return _ALAW_ENCODE[np.frombuffer(pcm, dtype=np.uint16)].tobytes()
+
+
+# ── Resampling ────────────────────────────────────────────────────────────────
+
+TAPS_PER_PHASE = 32
+ROLLOFF = 0.9  # cutoff as a fraction of the lower Nyquist
+
+
+class Resampler:
+    """Streaming rational resampler for 16-bit mono PCM (one per stream direction).
+
+    Upsamples by ``up`` and decimates by ``down`` (the reduced rate ratio)
+    through a Kaiser-windowed sinc FIR; with the defaults a 16→8 kHz
+    conversion passes 3 kHz at -1 dB and rejects 4.6 kHz by 40 dB.
+
+    Frame-sized chunks (up to MATRIX_MAX_SAMPLES) are one matrix-vector
+    product: for a given chunk length the conversion is a fixed linear map
+    from (filter history + chunk) to output, and the matrices are shared by
+    every stream with the same rates and frame size. Longer buffers go
+    through a sliding-window product instead, linear in the chunk length.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int, taps_per_phase: int = TAPS_PER_PHASE):
+        g = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self._taps = taps_per_phase
+        self._history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self._skip = 0  # upsampled samples to drop before the next kept one
+
+    def process(self, pcm: bytes) -> bytes:
+        if self.up == self.down:
+            return pcm
+        x = np.frombuffer(pcm, dtype=np.int16)
+        if x.size == 0:
+            return b""
+        buf = np.concatenate((self._history, x))
+        self._history = buf[-(self._taps - 1):]
+        if x.size <= MATRIX_MAX_SAMPLES:
+            matrix, self._skip = _resample_matrix(self.up, self.down, self._taps, x.size, self._skip)
+            y = matrix @ buf
+        else:
+            kernel = _kernel(self.up, self.down, self._taps)
+            windows = np.lib.stride_tricks.sliding_window_view(buf, self._taps)
+            if self.up == 1:
+                y = windows[self._skip::self.down] @ kernel[:, 0]
+            else:
+                y = (windows @ kernel).reshape(-1)[self._skip::self.down]
+            self._skip += y.size * self.down - x.size * self.up
+        return y.clip(-32768, 32767, out=y).astype(np.int16).tobytes()
+
+
+MATRIX_MAX_SAMPLES = 1024
+MAX_MATRICES = 64
+_matrices: dict[tuple, tuple[np.ndarray, int]] = {}
+
+
+@lru_cache(maxsize=None)
+def _kernel(up: int, down: int, taps: int) -> np.ndarray:
+    """(taps, up): column p is polyphase branch h[p::up], reversed."""
+    n = taps * up
+    cutoff = ROLLOFF / max(up, down)
+    t = np.arange(n) - (n - 1) / 2
+    h = cutoff * np.sinc(cutoff * t) * np.kaiser(n, 8.0) * up
+    return np.ascontiguousarray(h.reshape(taps, up)[::-1], dtype=np.float32)
+
+
+def _resample_matrix(up: int, down: int, taps: int, n: int, skip: int) -> tuple[np.ndarray, int]:
+    """Matrix taking (history + n samples) to output, and the next chunk's skip."""
+    key = (up, down, taps, n, skip)
+    hit = _matrices.get(key)
+    if hit is not None:
+        return hit
+    kernel = _kernel(up, down, taps)
+    # Kept samples of the (virtual) upsampled chunk; each comes from the input
+    # window starting at j // up through polyphase branch j % up.
+    kept = np.arange(skip, n * up, down)
+    matrix = np.zeros((kept.size, n + taps - 1), dtype=np.float32)
+    for row, j in enumerate(kept):
+        matrix[row, j // up: j // up + taps] = kernel[:, j % up]
+    next_skip = skip + kept.size * down - n * up
+    if len(_matrices) >= MAX_MATRICES:
+        _matrices.clear()
+    _matrices[key] = (matrix, next_skip)
+    return matrix, next_skip
+
+
+def resample(pcm: bytes, in_rate: int, out_rate: int) -> bytes:
+    """One-shot resample of a complete buffer (no state carried over)."""
+    return Resampler(in_rate, out_rate).process(pcm)
+
+
+# ── Carrier helpers ───────────────────────────────────────────────────────────
+
+_DECODERS = {"PCMU": ulaw_decode, "PCMA": alaw_decode}
+_ENCODERS = {"PCMU": ulaw_encode, "PCMA": alaw_encode}
+
+
+def decode(encoding: str, data: bytes, resampler: Resampler) -> bytes:
+    """Carrier payload (``PCMU``/``PCMA``) → PCM at ``resampler.out_rate``."""
+    return resampler.process(_DECODERS[encoding](data))
+
+
+def encode(encoding: str, pcm: bytes, resampler: Resampler) -> bytes:
+    """PCM at ``resampler.in_rate`` → carrier payload (``PCMU``/``PCMA``)."""
+    return _ENCODERS[encoding](resampler.process(pcm))
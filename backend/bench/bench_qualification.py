@@ -0,0 +1,126 @@
+"""Benchmark the rule-based qualification extractor against a labelled corpus.
+
+    cd backend && python -m bench.bench_qualification [--llm] [--corpus PATH]
+
+Each corpus line is {"text": ..., "expected": {field: value | null}}. For every
+labelled field the local extractor's answer is scored as:
+
+    hit      — resolved locally, matches the label
+    wrong    — resolved locally, differs from the label
+    fallback — not resolved locally (the LLM would be asked)
+    false+   — resolved locally where the label says nothing was said
+
+--llm also times gpt-4o-mini on the same messages (needs OPENAI_API_KEY) to
+show the latency the fast path avoids.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+
+from qualification_rules import QUALIFICATION_FIELDS, extract
+
+DEFAULT_CORPUS = Path(__file__).parent / "data" / "qualification_corpus.jsonl"
+
+
+def load_corpus(path: Path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_rules(corpus: list[dict], repeat: int) -> None:
+    scores: dict[str, Counter] = {field: Counter() for field in QUALIFICATION_FIELDS}
+    wrong: list[str] = []
+    for item in corpus:
+        found = extract(item["text"])
+        for field, expected in item["expected"].items():
+            got = found.get(field)
+            if expected is None:
+                scores[field]["false+" if got else "true-"] += 1
+            elif got is None:
+                scores[field]["fallback"] += 1
+            elif got == expected:
+                scores[field]["hit"] += 1
+            else:
+                scores[field]["wrong"] += 1
+                wrong.append(f"  {field}: {item['text']!r} → {got!r} (expected {expected!r})")
+
+    timings = []
+    for _ in range(repeat):
+        for item in corpus:
+            start = time.perf_counter()
+            extract(item["text"])
+            timings.append((time.perf_counter() - start) * 1e6)
+
+    print(f"Rule-based extractor — {len(corpus)} messages\n")
+    print(f"{'field':<15}{'hit':>6}{'wrong':>7}{'fallback':>10}{'false+':>8}{'hit rate':>10}")
+    totals = Counter()
+    for field, c in scores.items():
+        totals.update(c)
+        labelled = c["hit"] + c["wrong"] + c["fallback"]
+        rate = f"{c['hit'] / labelled:.0%}" if labelled else "-"
+        print(f"{field:<15}{c['hit']:>6}{c['wrong']:>7}{c['fallback']:>10}{c['false+']:>8}{rate:>10}")
+    labelled = totals["hit"] + totals["wrong"] + totals["fallback"]
+    print(f"{'total':<15}{totals['hit']:>6}{totals['wrong']:>7}{totals['fallback']:>10}{totals['false+']:>8}"
+          f"{totals['hit'] / labelled:>10.0%}")
+    if wrong:
+        print("\nMismatches:")
+        print("\n".join(wrong))
+    print(f"\nLatency per message: mean {statistics.mean(timings):.1f}µs  "
+          f"p50 {percentile(timings, 50):.1f}µs  p95 {percentile(timings, 95):.1f}µs  "
+          f"p99 {percentile(timings, 99):.1f}µs")
+
+
+async def run_llm(corpus: list[dict]) -> None:
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    timings = []
+    for item in corpus:
+        start = time.perf_counter()
+        await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "Extract real estate qualification data from this conversation. "
+                        "Return ONLY a JSON object with these keys (use null if not mentioned): "
+                        "budget, timeline, area, property_type, visa_status."
+                    ),
+                },
+                {"role": "user", "content": f"user: {item['text']}"},
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=200,
+        )
+        timings.append((time.perf_counter() - start) * 1e3)
+    print(f"\ngpt-4o-mini per message: mean {statistics.mean(timings):.0f}ms  "
+          f"p50 {percentile(timings, 50):.0f}ms  p95 {percentile(timings, 95):.0f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=200, help="timing iterations over the corpus")
+    parser.add_argument("--llm", action="store_true", help="also time gpt-4o-mini on the corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    run_rules(corpus, args.repeat)
+    if args.llm:
+        asyncio.run(run_llm(corpus))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""Load-test the voice path with concurrent fake Twilio/Telnyx media streams.
+
+    cd backend && python -m bench.media_load --ramp 5,10,20,40 --duration 60 \\
+        [--provider twilio|telnyx|mixed] [--audio utterance.wav] [--url http://host:port]
+
+Without --url a local ``bench.media_server`` is started: the real app with
+mock STT/LLM/TTS (latency set with --stt-ms/--llm-ms/--tts-ms). Each fake
+call streams 8 kHz μ-law in real time (20 ms frames), speaks an utterance,
+waits for Harvey's audio to start and finish, pauses, and speaks again.
+
+Per concurrency step it reports:
+
+    turn p50/p95  end of the lead's utterance → first bot audio frame received
+    lag p99       server event-loop lag
+    rss/call      server RSS growth over the idle baseline, per active call
+    cpu           server CPU use (1.0 = one core busy)
+    calls/core    concurrent calls divided by cores used
+
+A step passes when turn p95 <= --slo-ms, lag p99 <= --max-lag-ms and under 5%
+of turns time out; the last passing step is the sustained capacity.
+
+--audio takes a 16-bit mono 8 kHz WAV or raw μ-law. With the built-in
+synthetic utterance the server uses an energy VAD (Silero ignores noise).
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import subprocess
+import sys
+import time
+import uuid
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import httpx
+import numpy as np
+import websockets
+
+from bench import audio_codec
+
+SAMPLE_RATE = 8000
+FRAME_MS = 20
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000  # μ-law: one byte per sample
+ULAW_SILENCE = b"\xff" * FRAME_BYTES
+BOT_DONE_GAP = 0.4  # no bot audio for this long → bot finished speaking
+PAUSE_BEFORE_SPEAKING = 0.6
+REPLY_TIMEOUT = 10.0
+
+
+# ── Audio ─────────────────────────────────────────────────────────────────────
+
+
+def lin2ulaw(pcm: np.ndarray) -> bytes:
+    """G.711 μ-law encode 16-bit linear PCM."""
+    return audio_codec.ulaw_encode(pcm.astype(np.int16).tobytes())
+
+
+def synthetic_utterance(seconds: float = 1.6) -> bytes:
+    """Speech-shaped noise: syllable-rate amplitude modulation over band noise."""
+    rng = np.random.default_rng(7)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    envelope = 0.55 + 0.45 * np.sin(2 * np.pi * 4 * t)
+    pcm = rng.normal(0, 1, t.size) * envelope * 4000
+    return lin2ulaw(np.clip(pcm, -32768, 32767))
+
+
+def load_utterance(path: Path) -> bytes:
+    if path.suffix.lower() == ".wav":
+        with wave.open(str(path)) as w:
+            if w.getframerate() != SAMPLE_RATE or w.getsampwidth() != 2 or w.getnchannels() != 1:
+                sys.exit("--audio WAV must be 16-bit mono 8 kHz")
+            return lin2ulaw(np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16))
+    return path.read_bytes()  # raw μ-law
+
+
+# ── Fake carrier client ───────────────────────────────────────────────────────
+
+
+@dataclass
+class CallResult:
+    turn_ms: list[float] = field(default_factory=list)
+    timeouts: int = 0
+    late_frames: int = 0
+    error: str | None = None
+
+
+def _handshake(provider: str, stream_id: str) -> list[dict]:
+    if provider == "twilio":
+        return [
+            {"event": "connected", "protocol": "Call", "version": "1.0.0"},
+            {
+                "event": "start",
+                "sequenceNumber": "1",
+                "streamSid": stream_id,
+                "start": {
+                    "streamSid": stream_id,
+                    "callSid": f"CA{stream_id}",
+                    "tracks": ["inbound"],
+                    "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": SAMPLE_RATE, "channels": 1},
+                },
+            },
+        ]
+    return [
+        {"event": "connected", "version": "1.0.0"},
+        {
+            "event": "start",
+            "sequence_number": "1",
+            "stream_id": stream_id,
+            "start": {
+                "call_control_id": f"v3:{stream_id}",
+                "media_format": {"encoding": "PCMU", "sample_rate": SAMPLE_RATE, "channels": 1},
+            },
+        },
+    ]
+
+
+def _media(provider: str, stream_id: str, chunk: int, payload: bytes) -> str:
+    media = {
+        "track": "inbound",
+        "chunk": str(chunk),
+        "timestamp": str(chunk * FRAME_MS),
+        "payload": base64.b64encode(payload).decode(),
+    }
+    key = "streamSid" if provider == "twilio" else "stream_id"
+    return json.dumps({"event": "media", key: stream_id, "media": media})
+
+
+async def run_call(ws_base: str, provider: str, utterance: bytes, stop_at: float) -> CallResult:
+    result = CallResult()
+    call_id = f"bench-{uuid.uuid4().hex[:12]}"
+    stream_id = uuid.uuid4().hex
+    path = f"/ws/media/{call_id}" if provider == "twilio" else f"/ws/telnyx-media/{call_id}"
+    speech = [utterance[i:i + FRAME_BYTES].ljust(FRAME_BYTES, b"\xff") for i in range(0, len(utterance), FRAME_BYTES)]
+
+    bot = {"first_after": None, "last": 0.0}
+    loop = asyncio.get_running_loop()
+
+    async def receive(ws):
+        async for message in ws:
+            if json.loads(message).get("event") == "media":
+                now = loop.time()
+                bot["last"] = now
+                if bot["first_after"] is None:
+                    bot["first_after"] = now
+
+    try:
+        async with websockets.connect(ws_base + path, max_size=None, open_timeout=30) as ws:
+            for msg in _handshake(provider, stream_id):
+                await ws.send(json.dumps(msg))
+            receiver = asyncio.create_task(receive(ws))
+
+            # Harvey speaks first; start talking once the greeting is over.
+            phase, phase_at, spoken = "listen", loop.time(), 0
+            speech_end = None
+            chunk = 0
+            next_send = loop.time()
+            while loop.time() < stop_at and not receiver.done():
+                now = loop.time()
+                if phase == "speak":
+                    payload = speech[spoken]
+                    spoken += 1
+                    if spoken == len(speech):
+                        phase, speech_end = "wait", now
+                        bot["first_after"] = None
+                else:
+                    payload = ULAW_SILENCE
+                    if phase == "listen":
+                        done = bot["last"] and now - bot["last"] > BOT_DONE_GAP
+                        if done or now - phase_at > REPLY_TIMEOUT:
+                            phase, phase_at = "pause", now
+                    elif phase == "wait":
+                        if bot["first_after"] is not None:
+                            result.turn_ms.append((bot["first_after"] - speech_end) * 1000)
+                            phase, phase_at = "listen", now
+                        elif now - speech_end > REPLY_TIMEOUT:
+                            result.timeouts += 1
+                            phase, phase_at = "pause", now
+                    elif phase == "pause" and now - phase_at > PAUSE_BEFORE_SPEAKING:
+                        phase, spoken = "speak", 0
+
+                await ws.send(_media(provider, stream_id, chunk, payload))
+                chunk += 1
+                next_send += FRAME_MS / 1000
+                delay = next_send - loop.time()
+                if delay < -FRAME_MS / 1000:
+                    result.late_frames += 1
+                await asyncio.sleep(max(0.0, delay))
+
+            await ws.send(json.dumps({"event": "stop", "streamSid" if provider == "twilio" else "stream_id": stream_id}))
+            receiver.cancel()
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+# ── Steps ─────────────────────────────────────────────────────────────────────
+
+
+def pct(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_step(base_url: str, calls: int, duration: float, provider: str, utterance: bytes, args) -> dict:
+    ws_base = base_url.replace("http://", "ws://").replace("https://", "wss://")
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as http:
+        before = (await http.get("/bench/stats", params={"reset": True})).json()
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + duration
+        ramp = min(5.0, duration / 4)
+
+        async def staggered(i: int) -> CallResult:
+            await asyncio.sleep(ramp * i / calls)
+            p = provider if provider != "mixed" else ("twilio", "telnyx")[i % 2]
+            return await run_call(ws_base, p, utterance, stop_at)
+
+        tasks = [asyncio.create_task(staggered(i)) for i in range(calls)]
+        # Sample memory once every call is up and mid-conversation.
+        await asyncio.sleep(ramp + (duration - ramp) / 2)
+        mid = (await http.get("/bench/stats")).json()
+        results = await asyncio.gather(*tasks)
+        after = (await http.get("/bench/stats")).json()
+
+    turns = [ms for r in results for ms in r.turn_ms]
+    timeouts = sum(r.timeouts for r in results)
+    errors = [r.error for r in results if r.error]
+    cpu = (after["cpu_seconds"] - before["cpu_seconds"]) / max(1e-6, after["wall"] - before["wall"])
+    lag_p99 = after["loop_lag_ms"]["p99"]
+    turn_p95 = pct(turns, 0.95)
+    timeout_rate = timeouts / max(1, len(turns) + timeouts)
+    return {
+        "calls": calls,
+        "turns": len(turns),
+        "turn_p50": pct(turns, 0.5),
+        "turn_p95": turn_p95,
+        "timeouts": timeouts,
+        "errors": errors,
+        "lag_p99": lag_p99,
+        "rss_per_call_mb": (mid["rss_bytes"] - before["rss_bytes"]) / calls / 2**20,
+        "cpu": cpu,
+        "calls_per_core": calls / cpu if cpu > 0 else None,
+        "late_frames": sum(r.late_frames for r in results),
+        "passed": (
+            not errors
+            and turn_p95 is not None
+            and turn_p95 <= args.slo_ms
+            and (lag_p99 or 0) <= args.max_lag_ms
+            and timeout_rate < 0.05
+        ),
+    }
+
+
+def _fmt(value, spec: str) -> str:
+    return format(value, spec) if value is not None else "-"
+
+
+def print_step(s: dict):
+    print(
+        f"{s['calls']:>6}{s['turns']:>7}{_fmt(s['turn_p50'], '>10.0f')}{_fmt(s['turn_p95'], '>10.0f')}"
+        f"{s['timeouts']:>9}{_fmt(s['lag_p99'], '>9.1f')}{s['rss_per_call_mb']:>10.1f}{s['cpu']:>7.2f}"
+        f"{_fmt(s['calls_per_core'], '>11.1f')}  {'ok' if s['passed'] else 'FAIL'}"
+    )
+    for error in s["errors"][:3]:
+        print(f"        error: {error}")
+    if s["late_frames"]:
+        print(f"        {s['late_frames']} frames sent late — the load generator itself is saturated")
+
+
+def start_server(args, energy_vad: bool) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "bench.media_server",
+        "--port", str(args.port),
+        "--stt-ms", str(args.stt_ms),
+        "--llm-ms", str(args.llm_ms),
+        "--tts-ms", str(args.tts_ms),
+    ]
+    if energy_vad:
+        cmd.append("--energy-vad")
+    return subprocess.Popen(cmd, cwd=Path(__file__).resolve().parent.parent)
+
+
+async def wait_ready(base_url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as http:
+        while time.monotonic() < deadline:
+            try:
+                if (await http.get("/bench/stats")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    sys.exit(f"media server at {base_url} did not come up")
+
+
+async def run(args):
+    utterance = load_utterance(args.audio) if args.audio else synthetic_utterance()
+    steps = [int(n) for n in args.ramp.split(",")] if args.ramp else [args.calls]
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args, energy_vad=args.audio is None)
+    try:
+        await wait_ready(base_url)
+        print(f"Media load test — {args.provider} streams, {args.duration:.0f}s per step, "
+              f"SLO turn p95 <= {args.slo_ms:.0f}ms, loop lag p99 <= {args.max_lag_ms:.0f}ms\n")
+        print(f"{'calls':>6}{'turns':>7}{'p50 ms':>10}{'p95 ms':>10}{'timeouts':>9}{'lag p99':>9}"
+              f"{'rss/call':>10}{'cpu':>7}{'calls/core':>11}")
+        sustained = None
+        for calls in steps:
+            step = await run_step(base_url, calls, args.duration, args.provider, utterance, args)
+            print_step(step)
+            if step["passed"]:
+                sustained = step
+            await asyncio.sleep(2)  # let the previous step's calls wind down
+        if sustained:
+            print(f"\nSustained: {sustained['calls']} concurrent calls "
+                  f"(~{_fmt(sustained['calls_per_core'], '.1f')} per core)")
+        else:
+            print("\nNo step met the SLO.")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--ramp", help="comma-separated concurrency steps, e.g. 5,10,20,40")
+    parser.add_argument("--duration", type=float, default=60, help="seconds per step")
+    parser.add_argument("--provider", choices=["twilio", "telnyx", "mixed"], default="twilio")
+    parser.add_argument("--audio", type=Path, help="utterance: 16-bit mono 8 kHz WAV or raw μ-law")
+    parser.add_argument("--slo-ms", type=float, default=1500)
+    parser.add_argument("--max-lag-ms", type=float, default=50)
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--llm-ms", type=float, default=400)
+    parser.add_argument("--tts-ms", type=float, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""The real FastAPI app with mock voice services, for the media load test.
+
+    cd backend && python -m bench.media_server --port 8765 [--energy-vad] \\
+        [--stt-ms 150 --llm-ms 400 --tts-ms 200] [--max-calls 0]
+
+Adds GET /bench/stats with event-loop lag, RSS and CPU time of this process.
+Started automatically by ``bench.media_load`` unless it is given ``--url``.
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import time
+from collections import deque
+
+import uvicorn
+
+from config import settings
+
+# No real provider traffic: no greeting pre-render, no phrase pre-render.
+settings.ELEVENLABS_API_KEY = ""
+
+import pipeline  # noqa: E402
+from capacity import call_slots  # noqa: E402
+from bench.mock_services import MockLatency, make_factory  # noqa: E402
+from main import app  # noqa: E402
+
+LAG_INTERVAL = 0.05
+_lag_ms: deque[float] = deque(maxlen=4000)
+
+
+async def _monitor_loop_lag():
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(LAG_INTERVAL)
+        _lag_ms.append(max(0.0, (loop.time() - start - LAG_INTERVAL) * 1000))
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is the peak, in KiB on Linux; good enough off Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@app.get("/bench/stats")
+async def bench_stats(reset: bool = False):
+    lag = sorted(_lag_ms)
+    pick = lambda q: round(lag[min(len(lag) - 1, int(q * len(lag)))], 2) if lag else None
+    stats = {
+        "rss_bytes": _rss_bytes(),
+        "cpu_seconds": time.process_time(),
+        "wall": time.monotonic(),
+        "loop_lag_ms": {"p50": pick(0.5), "p99": pick(0.99), "max": round(lag[-1], 2) if lag else None},
+        "cpu_count": os.cpu_count(),
+    }
+    if reset:
+        _lag_ms.clear()
+    return stats
+
+
+async def serve(port: int):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    monitor = asyncio.create_task(_monitor_loop_lag())
+    try:
+        await server.serve()
+    finally:
+        monitor.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--llm-ms", type=float, default=400)
+    parser.add_argument("--tts-ms", type=float, default=200)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--max-calls", type=int, default=0,
+                        help="VOICE_MAX_CONCURRENT_CALLS for the run (default 0: no admission limit)")
+    parser.add_argument("--energy-vad", action="store_true", help="RMS VAD instead of Silero (for synthetic audio)")
+    args = parser.parse_args()
+
+    latency = MockLatency(args.stt_ms, args.llm_ms, args.tts_ms, args.jitter)
+    pipeline.voice_services.factory = make_factory(latency, args.energy_vad)
+    call_slots.limit = args.max_calls
+    asyncio.run(serve(args.port))
+
+
+if __name__ == "__main__":
+    main()
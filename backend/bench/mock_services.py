@@ -0,0 +1,117 @@
+"""Local stand-ins for Deepgram, GPT-4o and ElevenLabs used by the media load test.
+
+They plug into the real pipeline through ``pipeline.voice_services`` (the warm
+pool factory), so transport, serializers, VAD, context aggregation and the
+latency observers all run exactly as in production; only the network services
+are replaced by sleeps of configurable length.
+"""
+
+import asyncio
+import math
+import random
+from dataclasses import dataclass
+
+import numpy as np
+from pipecat.audio.vad.silero import SileroVADAnalyzer
+from pipecat.audio.vad.vad_analyzer import VADAnalyzer, VADParams
+from pipecat.frames.frames import (
+    LLMTextFrame,
+    TranscriptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.openai.llm import OpenAILLMService
+from pipecat.services.tts_service import TTSService
+from pipecat.utils.time import time_now_iso8601
+
+from pipeline import TTS_SAMPLE_RATE, VoiceServices
+
+REPLY = "Gotcha. What kind of budget are you working with for the new place?"
+
+
+@dataclass
+class MockLatency:
+    stt_ms: float = 150
+    llm_ms: float = 400
+    tts_ms: float = 200
+    jitter: float = 0.2  # ± fraction applied to every delay
+
+    def delay(self, ms: float) -> float:
+        return max(0.0, ms * (1 + random.uniform(-self.jitter, self.jitter))) / 1000
+
+
+class EnergyVADAnalyzer(VADAnalyzer):
+    """RMS-threshold VAD for synthetic audio (Silero won't fire on it)."""
+
+    def __init__(self, threshold: float = 500.0):
+        super().__init__(sample_rate=None, params=VADParams())
+        self._threshold = threshold
+
+    def num_frames_required(self) -> int:
+        return int(self.sample_rate * 0.02) if self.sample_rate else 320
+
+    def voice_confidence(self, buffer) -> float:
+        samples = np.frombuffer(buffer, dtype=np.int16).astype(np.float32)
+        if samples.size == 0:
+            return 0.0
+        rms = math.sqrt(float(np.mean(samples * samples)))
+        return min(1.0, rms / (2 * self._threshold))
+
+
+class MockSTT(FrameProcessor):
+    """Emits a final transcript ``stt_ms`` after VAD reports end of speech."""
+
+    def __init__(self, latency: MockLatency):
+        super().__init__()
+        self._latency = latency
+
+    async def _transcribe(self):
+        await asyncio.sleep(self._latency.delay(self._latency.stt_ms))
+        await self.push_frame(TranscriptionFrame("I'm looking for a two bedroom.", "lead", time_now_iso8601()))
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        await self.push_frame(frame, direction)
+        if isinstance(frame, UserStoppedSpeakingFrame):
+            asyncio.create_task(self._transcribe())
+
+
+class MockLLM(OpenAILLMService):
+    """OpenAILLMService whose completion is a fixed reply after ``llm_ms`` to first token."""
+
+    def __init__(self, latency: MockLatency):
+        super().__init__(api_key="bench", model="gpt-4o")
+        self._latency = latency
+
+    async def _process_context(self, context):
+        await asyncio.sleep(self._latency.delay(self._latency.llm_ms))
+        for word in REPLY.split(" "):
+            await self.push_frame(LLMTextFrame(word + " "))
+            await asyncio.sleep(0.01)
+
+
+class MockTTS(TTSService):
+    """Returns a quiet tone ``tts_ms`` after each sentence, ~60ms of audio per word."""
+
+    def __init__(self, latency: MockLatency):
+        super().__init__(sample_rate=TTS_SAMPLE_RATE)
+        self._latency = latency
+
+    async def run_tts(self, text: str):
+        yield TTSStartedFrame()
+        await asyncio.sleep(self._latency.delay(self._latency.tts_ms))
+        seconds = 0.06 * max(1, len(text.split()))
+        t = np.arange(int(TTS_SAMPLE_RATE * seconds)) / TTS_SAMPLE_RATE
+        tone = (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16)
+        yield TTSAudioRawFrame(audio=tone.tobytes(), sample_rate=TTS_SAMPLE_RATE, num_channels=1)
+        yield TTSStoppedFrame()
+
+
+def make_factory(latency: MockLatency, energy_vad: bool):
+    async def build() -> VoiceServices:
+        vad = EnergyVADAnalyzer() if energy_vad else await asyncio.to_thread(SileroVADAnalyzer)
+        return VoiceServices(vad=vad, stt=MockSTT(latency), llm=MockLLM(latency), tts=MockTTS(latency))
+    return build
@@ -0,0 +1,96 @@
+"""Small in-process caches."""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+def json_size(value: Any) -> int:
+    """Approximate in-memory footprint of a JSON-like value."""
+    return len(json.dumps(value, default=str))
+
+
+class TTLCache:
+    """LRU cache with a per-entry TTL and an approximate memory cap.
+
+    Entries expire ``ttl`` seconds after they were last written. When the sum of
+    entry sizes (as measured by ``sizeof``) exceeds ``max_bytes`` the least
+    recently used entries are evicted. Not thread-safe — meant to be used from
+    the event loop.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        sizeof: Callable[[Any], int] = json_size,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, tuple[Any, float, int]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.peek(key) is not None
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value (counting a hit or miss) and mark it recently used."""
+        value = self.peek(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def peek(self, key: Hashable) -> Any | None:
+        """Return the cached value without touching stats or LRU order."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self.invalidate(key)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self._sizeof(value)
+        self.invalidate(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+        }
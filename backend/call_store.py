@@ -0,0 +1,440 @@
+"""Call, lead and carrier-reference state shared by every worker and host.
+
+One outbound call touches several requests: the dial, the TwiML fetch, status
+callbacks, AMD, the media WebSocket. With more than one uvicorn worker (or
+host) those land on different processes, so call state can't live in a
+module-level dict. ``call_store`` is picked by CALL_STORE_URL:
+
+    memory                  per-process dicts (single worker; the default)
+    sqlite:///calls.sqlite3 one file shared by the workers on a host (WAL)
+    redis://host:6379/0     shared across hosts (needs the ``redis`` package)
+
+Status changes go through ``transition()``, which is atomic in every backend
+and never moves a call out of a terminal status, so a late or retried
+"ringing" callback can't resurrect a finished call. ``link_ref()`` /
+``resolve_ref()`` map carrier ids (Telnyx call_control_id) to our call id.
+Records are plain JSON-able dicts; ``get()`` returns a copy, so write back
+with ``update()``.
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = frozenset({"completed", "busy", "no-answer", "canceled", "failed"})
+# A live call not yet handed to a media stream; "connecting" is claimed from
+# one of these by whichever path starts the stream.
+PRE_STREAM_STATUSES = ("queued", "initiated", "ringing", "answered")
+REF_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _allowed(current: Optional[str], new: str, expect: Optional[tuple] = None) -> bool:
+    if expect is not None:
+        return current in expect
+    return not (current in TERMINAL_STATUSES and new not in TERMINAL_STATUSES)
+
+
+class CallStore:
+    """Interface shared by the backends (all methods are coroutines)."""
+
+    async def create(self, call: dict):
+        """Insert a new call record (``call["id"]`` is the key)."""
+        raise NotImplementedError
+
+    async def get(self, call_id: str) -> dict | None:
+        raise NotImplementedError
+
+    async def update(self, call_id: str, **fields) -> bool:
+        """Merge ``fields`` into the record; False if the call doesn't exist."""
+        raise NotImplementedError
+
+    async def transition(self, call_id: str, status: str, *, expect: tuple | None = None, **fields) -> bool:
+        """Atomically set ``status`` (plus ``fields``) unless the call already ended.
+
+        Terminal → terminal is allowed (the carrier's final word wins);
+        terminal → anything else is refused and nothing is written. With
+        ``expect``, the call must currently be in one of those statuses.
+        """
+        raise NotImplementedError
+
+    async def list_calls(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """Newest calls first, and the total count."""
+        raise NotImplementedError
+
+    async def link_ref(self, ref: str, call_id: str):
+        raise NotImplementedError
+
+    async def resolve_ref(self, ref: str) -> str | None:
+        raise NotImplementedError
+
+    async def put_lead(self, lead: dict):
+        raise NotImplementedError
+
+    async def update_lead(self, lead_id: str, **fields) -> bool:
+        """Merge ``fields`` into the lead; False if the lead doesn't exist."""
+        raise NotImplementedError
+
+    async def list_leads(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+# ── In-memory ─────────────────────────────────────────────────────────────────
+
+
+class MemoryCallStore(CallStore):
+    """Per-process dicts; every method completes without yielding, so it's atomic."""
+
+    def __init__(self):
+        self._calls: dict[str, dict] = {}
+        self._refs: dict[str, str] = {}
+        self._leads: dict[str, dict] = {}
+
+    async def create(self, call: dict):
+        self._calls[call["id"]] = copy.deepcopy(call)
+
+    async def get(self, call_id: str) -> dict | None:
+        call = self._calls.get(call_id)
+        return copy.deepcopy(call) if call is not None else None
+
+    async def update(self, call_id: str, **fields) -> bool:
+        call = self._calls.get(call_id)
+        if call is None:
+            return False
+        call.update(copy.deepcopy(fields))
+        return True
+
+    async def transition(self, call_id: str, status: str, *, expect: tuple | None = None, **fields) -> bool:
+        call = self._calls.get(call_id)
+        if call is None or not _allowed(call.get("status"), status, expect):
+            return False
+        call.update(copy.deepcopy(fields), status=status)
+        return True
+
+    async def list_calls(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        ordered = sorted(self._calls.values(), key=lambda c: c.get("started_at") or "", reverse=True)
+        return copy.deepcopy(ordered[offset:offset + limit]), len(ordered)
+
+    async def link_ref(self, ref: str, call_id: str):
+        self._refs[ref] = call_id
+
+    async def resolve_ref(self, ref: str) -> str | None:
+        return self._refs.get(ref)
+
+    async def put_lead(self, lead: dict):
+        self._leads[lead["id"]] = copy.deepcopy(lead)
+
+    async def update_lead(self, lead_id: str, **fields) -> bool:
+        lead = self._leads.get(lead_id)
+        if lead is None:
+            return False
+        lead.update(copy.deepcopy(fields))
+        return True
+
+    async def list_leads(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        ordered = sorted(self._leads.values(), key=lambda l: l.get("imported_at") or "", reverse=True)
+        return copy.deepcopy(ordered[offset:offset + limit]), len(ordered)
+
+
+# ── SQLite ────────────────────────────────────────────────────────────────────
+
+
+class SQLiteCallStore(CallStore):
+    """One SQLite file in WAL mode, shared by the workers on a host.
+
+    Queries run in a worker thread (``asyncio.to_thread``), as in
+    ``idempotency``, so waiting on another process's write lock
+    (busy_timeout) never blocks the event loop. Read-modify-write operations
+    take the write lock up front (BEGIN IMMEDIATE), so they are atomic across
+    processes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS calls ("
+                " id TEXT PRIMARY KEY, status TEXT, started_at TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_calls_started ON calls(started_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS call_refs ("
+                " ref TEXT PRIMARY KEY, call_id TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leads ("
+                " id TEXT PRIMARY KEY, imported_at TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_imported ON leads(imported_at)")
+            self._conn = conn
+        return self._conn
+
+    async def create(self, call: dict):
+        await asyncio.to_thread(self._create, call)
+
+    async def get(self, call_id: str) -> dict | None:
+        return await asyncio.to_thread(self._get, call_id)
+
+    async def update(self, call_id: str, **fields) -> bool:
+        return await asyncio.to_thread(self._modify, call_id, None, fields)
+
+    async def transition(self, call_id: str, status: str, *, expect: tuple | None = None, **fields) -> bool:
+        return await asyncio.to_thread(self._modify, call_id, status, fields, expect)
+
+    async def list_calls(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        return await asyncio.to_thread(self._page, "calls", "started_at", limit, offset)
+
+    async def link_ref(self, ref: str, call_id: str):
+        await asyncio.to_thread(self._link_ref, ref, call_id)
+
+    async def resolve_ref(self, ref: str) -> str | None:
+        return await asyncio.to_thread(self._resolve_ref, ref)
+
+    async def put_lead(self, lead: dict):
+        await asyncio.to_thread(self._put_lead, lead)
+
+    async def update_lead(self, lead_id: str, **fields) -> bool:
+        return await asyncio.to_thread(self._update_lead, lead_id, fields)
+
+    async def list_leads(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        return await asyncio.to_thread(self._page, "leads", "imported_at", limit, offset)
+
+    async def close(self):
+        await asyncio.to_thread(self._close)
+
+    # ── Blocking queries (run in a worker thread) ────────────────────────────
+
+    def _modify(self, call_id: str, status: Optional[str], fields: dict, expect: Optional[tuple] = None) -> bool:
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT data FROM calls WHERE id = ?", (call_id,)).fetchone()
+                if row is None:
+                    db.execute("ROLLBACK")
+                    return False
+                call = json.loads(row[0])
+                if status is not None:
+                    if not _allowed(call.get("status"), status, expect):
+                        db.execute("ROLLBACK")
+                        return False
+                    call["status"] = status
+                call.update(fields)
+                db.execute(
+                    "UPDATE calls SET status = ?, data = ? WHERE id = ?",
+                    (call.get("status"), json.dumps(call), call_id),
+                )
+                db.execute("COMMIT")
+                return True
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def _create(self, call: dict):
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO calls (id, status, started_at, data) VALUES (?, ?, ?, ?)",
+                (call["id"], call.get("status"), call.get("started_at"), json.dumps(call)),
+            )
+
+    def _get(self, call_id: str) -> dict | None:
+        with self._lock:
+            row = self._db().execute("SELECT data FROM calls WHERE id = ?", (call_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _page(self, table: str, order_by: str, limit: int, offset: int) -> tuple[list[dict], int]:
+        with self._lock:
+            db = self._db()
+            rows = db.execute(
+                f"SELECT data FROM {table} ORDER BY {order_by} DESC LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+            total = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return [json.loads(r[0]) for r in rows], total
+
+    def _link_ref(self, ref: str, call_id: str):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO call_refs (ref, call_id, created_at) VALUES (?, ?, ?)",
+                (ref, call_id, now),
+            )
+            db.execute("DELETE FROM call_refs WHERE created_at < ?", (now - REF_TTL_SECONDS,))
+
+    def _resolve_ref(self, ref: str) -> str | None:
+        with self._lock:
+            row = self._db().execute("SELECT call_id FROM call_refs WHERE ref = ?", (ref,)).fetchone()
+        return row[0] if row else None
+
+    def _put_lead(self, lead: dict):
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO leads (id, imported_at, data) VALUES (?, ?, ?)",
+                (lead["id"], lead.get("imported_at"), json.dumps(lead)),
+            )
+
+    def _update_lead(self, lead_id: str, fields: dict) -> bool:
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT data FROM leads WHERE id = ?", (lead_id,)).fetchone()
+                if row is None:
+                    db.execute("ROLLBACK")
+                    return False
+                lead = {**json.loads(row[0]), **fields}
+                db.execute("UPDATE leads SET data = ? WHERE id = ?", (json.dumps(lead), lead_id))
+                db.execute("COMMIT")
+                return True
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+    def _close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ── Redis ─────────────────────────────────────────────────────────────────────
+
+# A call is a hash of JSON-encoded fields, so the Lua side compares the
+# status without decoding anything. ARGV[1] = new status ('' to keep it),
+# ARGV[2] = expected statuses, newline-separated ('' for any non-terminal
+# one), ARGV[3..] = field, value pairs.
+_MODIFY_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+if ARGV[1] ~= '' then
+  local current = redis.call('HGET', KEYS[1], 'status')
+  if ARGV[2] ~= '' then
+    local ok = false
+    for s in string.gmatch(ARGV[2], '[^\\n]+') do
+      if s == current then ok = true end
+    end
+    if not ok then return 0 end
+  else
+    local terminal = {%s}
+    if current and terminal[current] and not terminal[ARGV[1]] then return 0 end
+  end
+  redis.call('HSET', KEYS[1], 'status', ARGV[1])
+end
+if #ARGV > 2 then redis.call('HSET', KEYS[1], unpack(ARGV, 3)) end
+return 1
+""" % ", ".join(f"[{json.dumps(json.dumps(s))}] = true" for s in sorted(TERMINAL_STATUSES))
+
+
+class RedisCallStore(CallStore):
+    """Redis (or anything speaking its protocol) shared by every host."""
+
+    def __init__(self, url: str, prefix: str = "harvey"):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("CALL_STORE_URL is redis:// but the redis package is not installed") from e
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+        self._modify_script = self._redis.register_script(_MODIFY_LUA)
+
+    def _key(self, kind: str, ident: str) -> str:
+        return f"{self._prefix}:{kind}:{ident}"
+
+    @staticmethod
+    def _encode(fields: dict) -> dict[str, str]:
+        return {k: json.dumps(v) for k, v in fields.items()}
+
+    @staticmethod
+    def _decode(raw: dict) -> dict | None:
+        return {k: json.loads(v) for k, v in raw.items()} if raw else None
+
+    async def _modify(
+        self, call_id: str, status: Optional[str], fields: dict, expect: Optional[tuple] = None, kind: str = "call"
+    ) -> bool:
+        args = [
+            json.dumps(status) if status is not None else "",
+            "\n".join(json.dumps(s) for s in expect) if expect else "",
+        ]
+        for k, v in self._encode(fields).items():
+            args += [k, v]
+        return bool(await self._modify_script(keys=[self._key(kind, call_id)], args=args))
+
+    async def create(self, call: dict):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key("call", call["id"]))
+            pipe.hset(self._key("call", call["id"]), mapping=self._encode(call))
+            pipe.zadd(f"{self._prefix}:calls", {call["id"]: time.time()})
+            await pipe.execute()
+
+    async def get(self, call_id: str) -> dict | None:
+        return self._decode(await self._redis.hgetall(self._key("call", call_id)))
+
+    async def update(self, call_id: str, **fields) -> bool:
+        return await self._modify(call_id, None, fields)
+
+    async def transition(self, call_id: str, status: str, *, expect: tuple | None = None, **fields) -> bool:
+        return await self._modify(call_id, status, fields, expect)
+
+    async def _page(self, kind: str, index: str, limit: int, offset: int) -> tuple[list[dict], int]:
+        ids = await self._redis.zrevrange(index, offset, offset + limit - 1)
+        total = await self._redis.zcard(index)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for ident in ids:
+                pipe.hgetall(self._key(kind, ident))
+            rows = await pipe.execute()
+        return [d for d in map(self._decode, rows) if d is not None], total
+
+    async def list_calls(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        return await self._page("call", f"{self._prefix}:calls", limit, offset)
+
+    async def link_ref(self, ref: str, call_id: str):
+        await self._redis.set(self._key("ref", ref), call_id, ex=REF_TTL_SECONDS)
+
+    async def resolve_ref(self, ref: str) -> str | None:
+        return await self._redis.get(self._key("ref", ref))
+
+    async def put_lead(self, lead: dict):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key("lead", lead["id"]), mapping=self._encode(lead))
+            pipe.zadd(f"{self._prefix}:leads", {lead["id"]: time.time()})
+            await pipe.execute()
+
+    async def update_lead(self, lead_id: str, **fields) -> bool:
+        return await self._modify(lead_id, None, fields, kind="lead")
+
+    async def list_leads(self, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        return await self._page("lead", f"{self._prefix}:leads", limit, offset)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+def open_store(url: str) -> CallStore:
+    if url in ("", "memory"):
+        return MemoryCallStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteCallStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCallStore(url)
+    raise ValueError(f"Unsupported CALL_STORE_URL: {url}")
+
+
+call_store = open_store(settings.CALL_STORE_URL)
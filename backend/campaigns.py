@@ -0,0 +1,431 @@
+"""Bulk outbound SMS/WhatsApp campaigns — rate-limited concurrent greeting sender.
+
+A campaign is a lead list (JSON or CSV upload) stored in Supabase. A runner
+task walks the pending leads page by page and fans greetings out through a
+bounded pool of concurrent sends, paced by a token bucket per
+(provider, channel). Each lead's status is persisted as soon as its send
+completes, so a paused or interrupted campaign resumes where it stopped
+without re-sending greetings that already went out.
+"""
+
+import asyncio
+import csv
+import io
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from pydantic import BaseModel
+
+from config import settings
+from sms import (
+    DEFAULT_QUALIFICATION,
+    _convo_cache,
+    _get_supabase,
+    _greeting_text,
+)
+from telephony import get_provider
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/campaigns", tags=["campaigns"])
+
+PAGE_SIZE = 500
+INSERT_CHUNK = 1000
+
+Provider = Literal["twilio", "telnyx"]
+Channel = Literal["sms", "whatsapp"]
+
+
+# ── Rate limiting ─────────────────────────────────────────────────────────────
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` sends per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# Shared per process, so concurrent campaigns on the same sender respect one limit.
+_buckets: dict[tuple[str, str], TokenBucket] = {}
+
+
+def _bucket(provider: str, channel: str) -> TokenBucket:
+    key = (provider, channel)
+    if key not in _buckets:
+        rates = {
+            ("twilio", "sms"): settings.CAMPAIGN_RATE_TWILIO_SMS,
+            ("twilio", "whatsapp"): settings.CAMPAIGN_RATE_TWILIO_WHATSAPP,
+            ("telnyx", "sms"): settings.CAMPAIGN_RATE_TELNYX_SMS,
+        }
+        _buckets[key] = TokenBucket(rates[key])
+    return _buckets[key]
+
+
+# ── Sending ───────────────────────────────────────────────────────────────────
+
+
+def _address(phone: str, channel: str) -> str:
+    """Conversation key / destination for a lead (WhatsApp numbers are prefixed)."""
+    if channel == "whatsapp" and not phone.startswith("whatsapp:"):
+        return f"whatsapp:{phone}"
+    return phone
+
+
+async def _send(provider: str, to: str, text: str):
+    await get_provider(provider).send_message(to, text)
+
+
+class CampaignRunner:
+    """Sends one campaign's pending greetings, recording each send as it completes."""
+
+    def __init__(self, campaign: dict):
+        self.id = campaign["id"]
+        self.provider = campaign["provider"]
+        self.channel = campaign["channel"]
+        self.bucket = _bucket(self.provider, self.channel)
+        self.base_sent = campaign.get("sent") or 0
+        self.base_failed = campaign.get("failed") or 0
+        self.sent = 0
+        self.failed = 0
+        self.latencies: deque[float] = deque(maxlen=5000)
+        self.started = time.monotonic()
+        self.stopping = False
+        self.task: asyncio.Task | None = None
+
+    async def run(self):
+        sb = await _get_supabase()
+        await sb.table("sms_campaigns").update({
+            "status": "running",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }).eq("id", self.id).execute()
+        # The lead rows are the source of truth; the counters may lag them
+        # if the last run was cut off mid-page.
+        self.base_sent, self.base_failed = await asyncio.gather(
+            self._count_leads("sent"), self._count_leads("failed")
+        )
+
+        sem = asyncio.Semaphore(settings.CAMPAIGN_CONCURRENCY)
+        last_id = 0
+        try:
+            while not self.stopping:
+                result = (
+                    await sb.table("sms_campaign_leads")
+                    .select("id, phone, lead_name, area")
+                    .eq("campaign_id", self.id)
+                    .eq("status", "pending")
+                    .gt("id", last_id)
+                    .order("id")
+                    .limit(PAGE_SIZE)
+                    .execute()
+                )
+                leads = result.data or []
+                if not leads:
+                    break
+                last_id = leads[-1]["id"]
+                await self._prepare_conversations(leads)
+                await asyncio.gather(*(self._send_one(lead, sem) for lead in leads))
+                await self._update_counters()
+        except asyncio.CancelledError:
+            # Shutdown: leave status "running" so the campaign resumes on restart.
+            raise
+        except Exception as e:
+            logger.error(f"Campaign {self.id} aborted: {e}")
+            await self._finish("failed")
+            raise
+        else:
+            await self._finish("paused" if self.stopping else "completed")
+        finally:
+            _runners.pop(self.id, None)
+
+    async def _prepare_conversations(self, leads: list[dict]):
+        """Create conversations for new leads (existing ones are left untouched)."""
+        sb = await _get_supabase()
+        rows = []
+        for lead in leads:
+            qual = dict(DEFAULT_QUALIFICATION, area=lead["area"])
+            rows.append({
+                "phone": _address(lead["phone"], self.channel),
+                "lead_name": lead["lead_name"],
+                "area": lead["area"],
+                "qualification": qual,
+            })
+        await sb.table("sms_conversations").upsert(
+            rows, on_conflict="phone", ignore_duplicates=True
+        ).execute()
+
+    async def _count_leads(self, status: str) -> int:
+        sb = await _get_supabase()
+        result = await (
+            sb.table("sms_campaign_leads")
+            .select("id", count="exact", head=True)
+            .eq("campaign_id", self.id)
+            .eq("status", status)
+            .execute()
+        )
+        return result.count or 0
+
+    async def _send_one(self, lead: dict, sem: asyncio.Semaphore):
+        to = _address(lead["phone"], self.channel)
+        text = _greeting_text(lead["lead_name"], lead["area"])
+        async with sem:
+            await self.bucket.acquire()
+            if self.stopping:
+                return  # paused: left pending for the next run
+            start = time.monotonic()
+            try:
+                await _send(self.provider, to, text)
+                error = None
+                self.sent += 1
+            except Exception as e:
+                error = str(e)[:500]
+                self.failed += 1
+            self.latencies.append(time.monotonic() - start)
+        await self._record(lead, to, text, error)
+
+    async def _record(self, lead: dict, to: str, text: str, error: str | None):
+        """Persist one send: the lead's status first (so it is never re-sent), then the greeting message."""
+        sb = await _get_supabase()
+        await sb.table("sms_campaign_leads").update({
+            "status": "failed" if error else "sent",
+            "error": error,
+            "sent_at": None if error else datetime.now(timezone.utc).isoformat(),
+        }).eq("id", lead["id"]).execute()
+        if error is None:
+            await sb.table("sms_messages").insert(
+                {"conversation_phone": to, "role": "assistant", "content": text}
+            ).execute()
+            _convo_cache.invalidate(to)
+
+    async def _update_counters(self):
+        sb = await _get_supabase()
+        await sb.table("sms_campaigns").update({
+            "sent": self.base_sent + self.sent,
+            "failed": self.base_failed + self.failed,
+        }).eq("id", self.id).execute()
+
+    async def _finish(self, status: str):
+        sb = await _get_supabase()
+        await sb.table("sms_campaigns").update({
+            "status": status,
+            "sent": self.base_sent + self.sent,
+            "failed": self.base_failed + self.failed,
+            "finished_at": datetime.now(timezone.utc).isoformat() if status == "completed" else None,
+        }).eq("id", self.id).execute()
+        logger.info(f"Campaign {self.id} {status}: {self.report()}")
+
+    def report(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def pct(p: float) -> float | None:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        done = self.sent + self.failed
+        return {
+            "running": not self.stopping,
+            "elapsed_seconds": round(elapsed, 1),
+            "sent_this_run": self.sent,
+            "failed_this_run": self.failed,
+            "messages_per_second": round(done / elapsed, 2) if elapsed > 0 else None,
+            "rate_limit_per_second": self.bucket.rate,
+            "send_latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99)},
+        }
+
+
+_runners: dict[str, CampaignRunner] = {}
+
+
+def _start_runner(campaign: dict) -> CampaignRunner:
+    runner = _runners.get(campaign["id"])
+    if runner is None:
+        runner = CampaignRunner(campaign)
+        runner.task = asyncio.create_task(runner.run(), name=f"campaign-{runner.id}")
+        _runners[runner.id] = runner
+    return runner
+
+
+async def resume_running():
+    """Restart campaigns that were mid-send when the process last stopped."""
+    sb = await _get_supabase()
+    result = await sb.table("sms_campaigns").select("*").eq("status", "running").execute()
+    for campaign in result.data or []:
+        logger.info(f"Resuming campaign {campaign['id']}")
+        _start_runner(campaign)
+
+
+async def shutdown():
+    tasks = [r.task for r in _runners.values() if r.task]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ── API Endpoints ─────────────────────────────────────────────────────────────
+
+
+class CampaignLead(BaseModel):
+    phone: str
+    name: str = "there"
+    area: str = "Dubai"
+
+
+class CreateCampaignRequest(BaseModel):
+    name: str = ""
+    provider: Provider = "twilio"
+    channel: Channel = "sms"
+    leads: list[CampaignLead]
+    start: bool = True
+
+
+def _parse_csv(content: str) -> list[CampaignLead]:
+    """Parse a lead CSV (name, phone, area columns; header case-insensitive)."""
+    reader = csv.DictReader(io.StringIO(content))
+    leads = []
+    for row in reader:
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        phone = row.get("phone") or row.get("mobile") or row.get("phone number")
+        if not phone:
+            continue
+        leads.append(CampaignLead(
+            phone=phone,
+            name=row.get("name") or "there",
+            area=row.get("area") or "Dubai",
+        ))
+    return leads
+
+
+async def _create_campaign(
+    name: str,
+    provider: str,
+    channel: str,
+    leads: list[CampaignLead],
+    start: bool,
+) -> dict:
+    if provider == "telnyx" and channel == "whatsapp":
+        raise HTTPException(status_code=400, detail="WhatsApp campaigns are Twilio-only")
+
+    unique: dict[str, CampaignLead] = {}
+    for lead in leads:
+        unique.setdefault(lead.phone.strip(), lead)
+    if not unique:
+        raise HTTPException(status_code=400, detail="No leads with a phone number")
+
+    sb = await _get_supabase()
+    result = await sb.table("sms_campaigns").insert({
+        "name": name,
+        "provider": provider,
+        "channel": channel,
+        "status": "pending",
+        "total": len(unique),
+    }).execute()
+    campaign = result.data[0]
+
+    rows = [
+        {"campaign_id": campaign["id"], "phone": phone, "lead_name": lead.name, "area": lead.area}
+        for phone, lead in unique.items()
+    ]
+    for i in range(0, len(rows), INSERT_CHUNK):
+        await sb.table("sms_campaign_leads").upsert(
+            rows[i:i + INSERT_CHUNK], on_conflict="campaign_id,phone", ignore_duplicates=True
+        ).execute()
+
+    if start:
+        _start_runner(campaign)
+        campaign["status"] = "running"
+    logger.info(f"Campaign {campaign['id']} created with {len(unique)} leads via {provider}/{channel}")
+    return campaign
+
+
+@router.post("")
+async def create_campaign(req: CreateCampaignRequest):
+    """Create a greeting campaign from a JSON lead list (and start it)."""
+    return await _create_campaign(req.name, req.provider, req.channel, req.leads, req.start)
+
+
+@router.post("/upload")
+async def upload_campaign(
+    file: UploadFile = File(...),
+    name: str = Form(""),
+    provider: Provider = Form("twilio"),
+    channel: Channel = Form("sms"),
+    start: bool = Form(True),
+):
+    """Create a greeting campaign from an uploaded CSV (e.g. a Property Finder export)."""
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Only CSV files supported")
+    content = await file.read()
+    leads = _parse_csv(content.decode("utf-8-sig"))
+    return await _create_campaign(name or file.filename, provider, channel, leads, start)
+
+
+async def _load_campaign(campaign_id: str) -> dict:
+    sb = await _get_supabase()
+    result = await sb.table("sms_campaigns").select("*").eq("id", campaign_id).execute()
+    if not result.data:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return result.data[0]
+
+
+@router.post("/{campaign_id}/start")
+async def start_campaign(campaign_id: str):
+    """Start or resume a campaign; already-sent leads are skipped."""
+    campaign = await _load_campaign(campaign_id)
+    if campaign["status"] == "completed":
+        raise HTTPException(status_code=409, detail="Campaign already completed")
+    runner = _runners.get(campaign_id)
+    if runner is not None and runner.stopping:
+        # Its loop may already be on the way to "paused"; start it once it's there.
+        raise HTTPException(status_code=409, detail="Campaign is pausing; start it again once paused")
+    _start_runner(campaign)
+    return {"id": campaign_id, "status": "running"}
+
+
+@router.post("/{campaign_id}/pause")
+async def pause_campaign(campaign_id: str):
+    """Pause: sends already in flight finish, the rest stay pending."""
+    runner = _runners.get(campaign_id)
+    if runner is None:
+        raise HTTPException(status_code=409, detail="Campaign is not running")
+    runner.stopping = True
+    return {"id": campaign_id, "status": "pausing"}
+
+
+@router.get("")
+async def list_campaigns(limit: int = 50):
+    sb = await _get_supabase()
+    result = await sb.table("sms_campaigns").select("*").order("created_at", desc=True).limit(limit).execute()
+    return {"campaigns": result.data or []}
+
+
+@router.get("/{campaign_id}")
+async def get_campaign(campaign_id: str):
+    """Campaign progress, plus a live throughput report while it's running."""
+    campaign = await _load_campaign(campaign_id)
+    done = (campaign.get("sent") or 0) + (campaign.get("failed") or 0)
+    campaign["progress"] = round(done / campaign["total"], 4) if campaign.get("total") else None
+    runner = _runners.get(campaign_id)
+    if runner is not None:
+        campaign["throughput"] = runner.report()
+    return campaign
@@ -0,0 +1,187 @@
+"""Admission control for voice calls: a fixed number of pipeline slots per process.
+
+Every live call runs VAD, transcoding and three streaming services on this
+worker's event loop; past some number of concurrent calls they all degrade
+together. ``call_slots`` caps that number (VOICE_MAX_CONCURRENT_CALLS, sized
+with ``bench.media_load``):
+
+- an outbound call reserves its slot before dialing. When all slots are
+  taken it waits in a FIFO queue for up to VOICE_CALL_QUEUE_TIMEOUT_SECONDS,
+  and is rejected straight away when the queue is already
+  VOICE_CALL_QUEUE_MAX deep;
+- the media WebSocket activates the reservation (inbound calls take a free
+  slot there or are turned away);
+- the slot is released when the pipeline ends or the carrier reports the
+  call over. A reservation that never gets media expires after
+  VOICE_CALL_RESERVE_SECONDS, so lost status callbacks can't leak slots;
+  queued calls wake when the oldest reservation is due, so an expired slot
+  goes to the head of the queue on time.
+
+Slots live in this process, unlike ``call_store``. With several uvicorn
+workers, the dial, the media WebSocket and the status callback of one call
+can land on different workers. The dialing worker's reservation is then
+held until VOICE_CALL_RESERVE_SECONDS (or until that worker sees the
+terminal callback), while the media worker takes a second slot. A call can
+count against two workers' limits for up to that long, so size
+VOICE_MAX_CONCURRENT_CALLS per worker with that slack, or run voice on a
+single worker per host.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from config import settings
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class CapacityFull(Exception):
+    """No slot for the call; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class CallCapacity:
+    def __init__(self, limit: int, max_queue: int, queue_timeout: float, reserve_seconds: float):
+        self.limit = limit  # 0 = unlimited
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.reserve_seconds = reserve_seconds
+        self._holders: dict[str, dict] = {}  # call_id -> {"since", "active"}
+        self._waiters: deque[tuple[str, asyncio.Future]] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.expired = 0
+
+    def _has_room(self) -> bool:
+        return self.limit <= 0 or len(self._holders) < self.limit
+
+    def _next_expiry(self) -> float:
+        """When the oldest reservation without media expires (monotonic; inf if none)."""
+        pending = [h["since"] for h in self._holders.values() if not h["active"]]
+        return min(pending) + self.reserve_seconds if pending else float("inf")
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.reserve_seconds
+        stale = [cid for cid, h in self._holders.items() if not h["active"] and h["since"] <= cutoff]
+        for call_id in stale:
+            logger.warning(f"Call slot reservation for {call_id} expired without media")
+            self.expired += 1
+            self.release(call_id)
+
+    def _grant(self, call_id: str, active: bool = False):
+        self._holders[call_id] = {"since": time.monotonic(), "active": active}
+        self.admitted += 1
+
+    def _grant_waiters(self):
+        while self._waiters and self._has_room():
+            call_id, fut = self._waiters.popleft()
+            if fut.done():  # timed out or cancelled
+                continue
+            self._grant(call_id)
+            fut.set_result(None)
+
+    def try_acquire(self, call_id: str, active: bool = False) -> bool:
+        """Take a slot now if one is free and nobody is queued ahead."""
+        self._expire()
+        if call_id in self._holders:
+            return True
+        if self._has_room() and not self._waiters:
+            self._grant(call_id, active)
+            return True
+        return False
+
+    async def acquire(self, call_id: str):
+        """Reserve a slot, queueing if needed; raises CapacityFull when it can't."""
+        started = time.monotonic()
+        if self.try_acquire(call_id):
+            registry.observe("harvey_call_admission_wait_seconds", 0.0, outcome="admitted")
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            registry.observe("harvey_call_admission_wait_seconds", 0.0, outcome="rejected")
+            raise CapacityFull("all call slots busy and the queue is full", self.queue_timeout)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((call_id, fut))
+        self.queued += 1
+        deadline = started + self.queue_timeout
+        try:
+            while not fut.done():
+                now = time.monotonic()
+                if now >= deadline:
+                    raise asyncio.TimeoutError
+                # Also wake when a reservation is due, so nobody has to call
+                # try_acquire for an expired slot to reach the queue.
+                await asyncio.wait([fut], timeout=min(deadline, self._next_expiry()) - now)
+                if not fut.done():
+                    self._expire()
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            registry.observe("harvey_call_admission_wait_seconds", time.monotonic() - started, outcome="timeout")
+            raise CapacityFull(f"no call slot within {self.queue_timeout:g}s", self.queue_timeout)
+        except asyncio.CancelledError:
+            # Granted just as the caller went away: hand the slot on.
+            if fut.done() and not fut.cancelled():
+                self.release(call_id)
+            raise
+        finally:
+            if not fut.done():
+                fut.cancel()
+            try:
+                self._waiters.remove((call_id, fut))
+            except ValueError:
+                pass
+        registry.observe("harvey_call_admission_wait_seconds", time.monotonic() - started, outcome="admitted")
+
+    def activate(self, call_id: str) -> bool:
+        """Media has started: keep the call's reservation, or take a free slot."""
+        holder = self._holders.get(call_id)
+        if holder is not None:
+            holder["active"] = True
+            return True
+        return self.try_acquire(call_id, active=True)
+
+    def release(self, call_id: str):
+        """Free the call's slot (idempotent) and admit the next queued call."""
+        if self._holders.pop(call_id, None) is not None:
+            self._grant_waiters()
+
+    def stats(self) -> dict:
+        active = sum(1 for h in self._holders.values() if h["active"])
+        return {
+            "limit": self.limit,
+            "in_use": len(self._holders),
+            "active": active,
+            "reserved": len(self._holders) - active,
+            "available": max(0, self.limit - len(self._holders)) if self.limit > 0 else None,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "expired": self.expired,
+        }
+
+
+call_slots = CallCapacity(
+    limit=settings.VOICE_MAX_CONCURRENT_CALLS,
+    max_queue=settings.VOICE_CALL_QUEUE_MAX,
+    queue_timeout=settings.VOICE_CALL_QUEUE_TIMEOUT_SECONDS,
+    reserve_seconds=settings.VOICE_CALL_RESERVE_SECONDS,
+)
+
+registry.describe(
+    "harvey_call_admission_wait_seconds",
+    "Time an outbound call waited for a pipeline slot, by outcome (admitted, timeout, rejected).",
+)
+registry.gauge("harvey_call_slots_in_use", lambda: len(call_slots._holders), "Call slots held (reserved or active).")
+registry.gauge("harvey_call_slots_limit", lambda: call_slots.limit, "Concurrent call limit (0 = unlimited).")
+registry.gauge("harvey_call_queue_depth", lambda: len(call_slots._waiters), "Outbound calls waiting for a slot.")
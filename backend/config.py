@@ -12,6 +12,15 @@ class Settings:
     TWILIO_AUTH_TOKEN: str = os.getenv("TWILIO_AUTH_TOKEN", "")
     TWILIO_PHONE_NUMBER: str = os.getenv("TWILIO_PHONE_NUMBER", "")
 
+    # Telnyx
+    TELNYX_API_KEY: str = os.getenv("TELNYX_API_KEY", "")
+    TELNYX_PHONE_NUMBER: str = os.getenv("TELNYX_PHONE_NUMBER", "")
+    TELNYX_APP_ID: str = os.getenv("TELNYX_APP_ID", "")
+    TELNYX_MESSAGING_PROFILE_ID: str = os.getenv("TELNYX_MESSAGING_PROFILE_ID", "")
+
+    # Carrier for calls that don't name one ("twilio" or "telnyx")
+    TELEPHONY_PROVIDER: str = os.getenv("TELEPHONY_PROVIDER", "twilio")
+
     # OpenAI (primary STT via Whisper)
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
@@ -32,10 +41,134 @@ class Settings:
     # App
     BASE_URL: str = os.getenv("BASE_URL", "http://localhost:8000")
 
+    # SMS conversation history: recent messages sent verbatim to the LLM;
+    # anything older is folded into a rolling summary in batches. Messages
+    # not yet summarised are always sent, so the LLM sees up to
+    # SMS_HISTORY_WINDOW + SMS_SUMMARY_BATCH - 1 of them.
+    SMS_HISTORY_WINDOW: int = int(os.getenv("SMS_HISTORY_WINDOW", "20"))
+    SMS_SUMMARY_BATCH: int = int(os.getenv("SMS_SUMMARY_BATCH", "10"))
+
+    # Inbound texts from one lead within this window are answered as one turn
+    SMS_BURST_WINDOW_SECONDS: float = float(os.getenv("SMS_BURST_WINDOW_SECONDS", "2.5"))
+    SMS_BURST_MAX_WAIT_SECONDS: float = float(os.getenv("SMS_BURST_MAX_WAIT_SECONDS", "8"))
+
+    # Workers for SMS background jobs (qualification extraction, summaries)
+    SMS_BACKGROUND_WORKERS: int = int(os.getenv("SMS_BACKGROUND_WORKERS", "4"))
+
+    # In-process conversation cache (per worker). The TTL bounds staleness when
+    # several workers write the same conversation.
+    SMS_CACHE_TTL_SECONDS: float = float(os.getenv("SMS_CACHE_TTL_SECONDS", "120"))
+    SMS_CACHE_MAX_BYTES: int = int(os.getenv("SMS_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
     # Google Calendar (optional)
     GOOGLE_CREDENTIALS_JSON: str = os.getenv("GOOGLE_CREDENTIALS_JSON", "credentials.json")
     GOOGLE_CALENDAR_ID: str = os.getenv("GOOGLE_CALENDAR_ID", "")
 
+    # Bulk campaigns: concurrent sends in flight, and per-sender rate limits
+    # (messages/second — match these to the number's throughput on the carrier)
+    CAMPAIGN_CONCURRENCY: int = int(os.getenv("CAMPAIGN_CONCURRENCY", "16"))
+    CAMPAIGN_RATE_TWILIO_SMS: float = float(os.getenv("CAMPAIGN_RATE_TWILIO_SMS", "1"))
+    CAMPAIGN_RATE_TWILIO_WHATSAPP: float = float(os.getenv("CAMPAIGN_RATE_TWILIO_WHATSAPP", "20"))
+    CAMPAIGN_RATE_TELNYX_SMS: float = float(os.getenv("CAMPAIGN_RATE_TELNYX_SMS", "6"))
+
+    # Voice calls: pre-built pipeline component sets (Silero VAD loaded,
+    # STT/LLM/TTS services constructed) kept ready per worker. 0 disables.
+    VOICE_WARM_POOL_SIZE: int = int(os.getenv("VOICE_WARM_POOL_SIZE", "2"))
+
+    # Speculative LLM replies: start the completion once the interim
+    # transcript has been stable for VOICE_SPECULATIVE_STABLE_MS, and use it
+    # if the final transcript matches (word-level similarity >=
+    # VOICE_SPECULATIVE_MATCH_RATIO). Costs extra tokens on misses.
+    VOICE_SPECULATIVE_LLM: bool = os.getenv("VOICE_SPECULATIVE_LLM", "false").lower() in ("1", "true", "yes")
+    VOICE_SPECULATIVE_STABLE_MS: float = float(os.getenv("VOICE_SPECULATIVE_STABLE_MS", "250"))
+    VOICE_SPECULATIVE_MATCH_RATIO: float = float(os.getenv("VOICE_SPECULATIVE_MATCH_RATIO", "0.9"))
+
+    # Admission control: concurrent voice pipelines per worker (0 = no
+    # limit). Outbound calls beyond it queue up to VOICE_CALL_QUEUE_MAX deep
+    # for VOICE_CALL_QUEUE_TIMEOUT_SECONDS, then get a 503; a slot reserved at
+    # dial time is freed after VOICE_CALL_RESERVE_SECONDS without media.
+    # Slots are per process: with several workers one call can hold a
+    # reservation on one worker and a slot on another (see capacity.py).
+    VOICE_MAX_CONCURRENT_CALLS: int = int(os.getenv("VOICE_MAX_CONCURRENT_CALLS", "20"))
+    VOICE_CALL_QUEUE_MAX: int = int(os.getenv("VOICE_CALL_QUEUE_MAX", "20"))
+    VOICE_CALL_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("VOICE_CALL_QUEUE_TIMEOUT_SECONDS", "15"))
+    VOICE_CALL_RESERVE_SECONDS: float = float(os.getenv("VOICE_CALL_RESERVE_SECONDS", "120"))
+
+    # Call / lead state shared across workers and hosts: "memory" (single
+    # worker), "sqlite:///calls.sqlite3" (workers on one host) or
+    # "redis://host:6379/0" (several hosts)
+    CALL_STORE_URL: str = os.getenv("CALL_STORE_URL", "memory")
+
+    # Voice LLM context: the last VOICE_CONTEXT_KEEP_TURNS turns stay verbatim;
+    # once VOICE_CONTEXT_FOLD_TURNS more build up, the older ones are folded
+    # into a running summary in the background (0 keeps the whole call)
+    VOICE_CONTEXT_KEEP_TURNS: int = int(os.getenv("VOICE_CONTEXT_KEEP_TURNS", "6"))
+    VOICE_CONTEXT_FOLD_TURNS: int = int(os.getenv("VOICE_CONTEXT_FOLD_TURNS", "4"))
+
+    # Post-call qualification/summary extraction: calls ending within
+    # POST_CALL_BATCH_WINDOW_SECONDS of each other (up to the max wait) are
+    # extracted together, POST_CALL_BATCH_SIZE transcripts per LLM request
+    POST_CALL_BATCH_SIZE: int = int(os.getenv("POST_CALL_BATCH_SIZE", "8"))
+    POST_CALL_BATCH_WINDOW_SECONDS: float = float(os.getenv("POST_CALL_BATCH_WINDOW_SECONDS", "3"))
+    POST_CALL_BATCH_MAX_WAIT_SECONDS: float = float(os.getenv("POST_CALL_BATCH_MAX_WAIT_SECONDS", "15"))
+
+    # Call recordings: copied from the carrier by RECORDING_DOWNLOAD_WORKERS
+    # concurrent transfers, streamed in RECORDING_CHUNK_BYTES chunks to
+    # RECORDING_DIR ("local") or the Supabase Storage RECORDING_BUCKET ("supabase")
+    RECORDING_STORAGE: str = os.getenv("RECORDING_STORAGE", "local")
+    RECORDING_DIR: str = os.getenv("RECORDING_DIR", "recordings")
+    RECORDING_BUCKET: str = os.getenv("RECORDING_BUCKET", "call-recordings")
+    RECORDING_DOWNLOAD_WORKERS: int = int(os.getenv("RECORDING_DOWNLOAD_WORKERS", "4"))
+    RECORDING_CHUNK_BYTES: int = int(os.getenv("RECORDING_CHUNK_BYTES", str(64 * 1024)))
+
+    # Answering-machine detection on outbound calls (off unless enabled):
+    # machines get the pre-rendered voicemail and a hangup instead of the
+    # voice pipeline. Twilio holds the line for up to VOICE_AMD_HOLD_SECONDS
+    # waiting for the verdict, then connects the pipeline anyway.
+    VOICE_AMD_ENABLED: bool = os.getenv("VOICE_AMD_ENABLED", "false").lower() in ("1", "true", "yes")
+    VOICE_AMD_TIMEOUT_SECONDS: int = int(os.getenv("VOICE_AMD_TIMEOUT_SECONDS", "30"))
+    VOICE_AMD_HOLD_SECONDS: int = int(os.getenv("VOICE_AMD_HOLD_SECONDS", "6"))
+    # Number read out in voicemails; defaults to the dialing number
+    VOICEMAIL_CALLBACK_NUMBER: str = os.getenv("VOICEMAIL_CALLBACK_NUMBER", "")
+
+    # Greeting audio rendered at dial time, cached on disk by (voice, text).
+    # An answered call waits at most GREETING_WAIT_SECONDS for a render in
+    # flight before falling back to the LLM introduction.
+    GREETING_CACHE_DIR: str = os.getenv("GREETING_CACHE_DIR", "greeting_cache")
+    GREETING_CACHE_MAX_FILES: int = int(os.getenv("GREETING_CACHE_MAX_FILES", "5000"))
+    GREETING_WAIT_SECONDS: float = float(os.getenv("GREETING_WAIT_SECONDS", "2"))
+    # A render nobody has taken after this long is dropped (the call ended,
+    # possibly with its callbacks handled by another worker).
+    GREETING_PENDING_TTL_SECONDS: float = float(os.getenv("GREETING_PENDING_TTL_SECONDS", "300"))
+
+    # Sentence-level TTS audio cache (per worker, persisted to disk). Only
+    # sentences up to TTS_CACHE_MAX_CHARS are cached; besides the pre-rendered
+    # phrases, a sentence is rendered into the cache on its
+    # TTS_CACHE_FILL_AFTER_MISSES-th miss (0 disables that), with at most
+    # TTS_CACHE_FILL_QUEUE_MAX renders waiting. A filler clip plays when
+    # the reply hasn't started TTS_FILLER_DELAY_SECONDS after the lead stops
+    # talking (0 disables fillers).
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "tts_cache")
+    TTS_CACHE_MAX_BYTES: int = int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    TTS_CACHE_DISK_MAX_BYTES: int = int(os.getenv("TTS_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+    TTS_CACHE_MAX_CHARS: int = int(os.getenv("TTS_CACHE_MAX_CHARS", "120"))
+    TTS_CACHE_FILL_AFTER_MISSES: int = int(os.getenv("TTS_CACHE_FILL_AFTER_MISSES", "2"))
+    TTS_CACHE_FILL_QUEUE_MAX: int = int(os.getenv("TTS_CACHE_FILL_QUEUE_MAX", "50"))
+    TTS_FILLER_DELAY_SECONDS: float = float(os.getenv("TTS_FILLER_DELAY_SECONDS", "0"))
+
+    # Shared provider HTTP pool (Telnyx/Twilio REST): limits are per host
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "50"))
+    HTTP_MAX_KEEPALIVE_PER_HOST: int = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "20"))
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "3"))
+    HTTP_RETRIES: int = int(os.getenv("HTTP_RETRIES", "2"))
+
+    # Webhook idempotency: provider event ids seen in the last TTL seconds
+    # (SQLite file, shared by all workers on the host)
+    WEBHOOK_DEDUPE_PATH: str = os.getenv("WEBHOOK_DEDUPE_PATH", "webhook_events.sqlite3")
+    WEBHOOK_DEDUPE_TTL_SECONDS: float = float(os.getenv("WEBHOOK_DEDUPE_TTL_SECONDS", str(24 * 3600)))
+    WEBHOOK_DEDUPE_MAX_ENTRIES: int = int(os.getenv("WEBHOOK_DEDUPE_MAX_ENTRIES", "200000"))
+
     def validate(self) -> list[str]:
         """Return list of missing required env vars."""
         required = [
@@ -0,0 +1,180 @@
+"""Greeting audio rendered at dial time, so the lead hears Harvey the moment they answer.
+
+The opening line only depends on the lead and agent fields, so it is
+synthesised with ElevenLabs while the phone is ringing and kept on disk keyed
+by (voice, text). When the media stream starts the pipeline plays the audio
+straight away instead of waiting for an LLM round trip plus TTS.
+
+The voicemail message is rendered the same way (as MP3, for the carrier to
+play) for calls dialed with answering-machine detection.
+
+Renders are held per process, keyed by call id. The call's terminal callback
+may land on another worker, so besides ``discard()`` every entry expires
+after GREETING_PENDING_TTL_SECONDS.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import settings
+from http_client import provider_http
+from prompts import get_greeting, get_voicemail_message
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+OUTPUT_FORMAT = f"pcm_{SAMPLE_RATE}"  # 16-bit little-endian mono PCM
+VOICEMAIL_FORMAT = "mp3_22050_32"
+TTS_MODEL = "eleven_flash_v2_5"
+PRUNE_EVERY = 100
+
+
+@dataclass
+class Greeting:
+    text: str
+    audio: bytes  # 16-bit PCM at ``sample_rate``
+    sample_rate: int = SAMPLE_RATE
+
+
+_pending: dict[str, asyncio.Task] = {}
+_voicemails: dict[str, asyncio.Task] = {}
+_renders = 0
+
+
+def _cache_path(voice_id: str, text: str, output_format: str = OUTPUT_FORMAT) -> Path:
+    key = hashlib.sha256(f"{voice_id}|{TTS_MODEL}|{output_format}|{text}".encode()).hexdigest()
+    suffix = ".mp3" if output_format.startswith("mp3") else ".pcm"
+    return Path(settings.GREETING_CACHE_DIR) / f"{key}{suffix}"
+
+
+def _read(path: Path) -> bytes | None:
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    path.touch()  # mtime doubles as last-used for pruning
+    return data
+
+
+def _write(path: Path, audio: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(audio)
+    os.replace(tmp, path)
+
+
+def _prune(directory: Path, max_files: int):
+    files = [*directory.glob("*.pcm"), *directory.glob("*.mp3")]
+    files.sort(key=lambda f: f.stat().st_mtime)
+    for f in files[: max(0, len(files) - max_files)]:
+        f.unlink(missing_ok=True)
+
+
+async def _synthesize(text: str, voice_id: str, output_format: str = OUTPUT_FORMAT) -> bytes:
+    resp = await provider_http.request(
+        "POST",
+        f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
+        params={"output_format": output_format},
+        headers={"xi-api-key": settings.ELEVENLABS_API_KEY},
+        json={"text": text, "model_id": TTS_MODEL},
+    )
+    if resp.status_code >= 400:
+        raise RuntimeError(f"ElevenLabs {resp.status_code}: {resp.text[:200]}")
+    return resp.content
+
+
+async def render(lead_name: str, agent_name: str, brokerage: str, area: str) -> Greeting:
+    """Greeting text and audio, from the disk cache or freshly synthesised."""
+    text = get_greeting(lead_name, agent_name, brokerage, area)
+    voice_id = settings.ELEVENLABS_VOICE_ID
+    path = _cache_path(voice_id, text)
+
+    audio = await asyncio.to_thread(_read, path)
+    if audio is None:
+        audio = await _synthesize(text, voice_id)
+        await _store(path, audio)
+    return Greeting(text=text, audio=audio)
+
+
+async def _store(path: Path, audio: bytes):
+    global _renders
+    await asyncio.to_thread(_write, path, audio)
+    _renders += 1
+    if _renders % PRUNE_EVERY == 0:
+        await asyncio.to_thread(_prune, path.parent, settings.GREETING_CACHE_MAX_FILES)
+
+
+async def render_voicemail(lead_name: str, agent_name: str, area: str, callback_number: str) -> Path:
+    """Path of the voicemail MP3 for these fields, synthesising it if it isn't cached."""
+    text = get_voicemail_message(lead_name, agent_name, area, callback_number)
+    path = _cache_path(settings.ELEVENLABS_VOICE_ID, text, VOICEMAIL_FORMAT)
+    if await asyncio.to_thread(_read, path) is None:
+        await _store(path, await _synthesize(text, settings.ELEVENLABS_VOICE_ID, VOICEMAIL_FORMAT))
+    return path
+
+
+def _expire(tasks: dict[str, asyncio.Task], call_id: str, task: asyncio.Task):
+    if tasks.get(call_id) is task:
+        del tasks[call_id]
+        task.cancel()
+
+
+def _hold(tasks: dict[str, asyncio.Task], call_id: str, task: asyncio.Task):
+    tasks[call_id] = task
+    asyncio.get_running_loop().call_later(settings.GREETING_PENDING_TTL_SECONDS, _expire, tasks, call_id, task)
+
+
+def prerender(call_id: str, lead_name: str, agent_name: str, brokerage: str, area: str):
+    """Start rendering the greeting for a call that is being dialed."""
+    if not settings.ELEVENLABS_API_KEY:
+        return
+    _hold(_pending, call_id, asyncio.create_task(
+        render(lead_name, agent_name, brokerage, area), name=f"greeting-{call_id}"
+    ))
+
+
+def prerender_voicemail(call_id: str, lead_name: str, agent_name: str, area: str, callback_number: str):
+    """Start rendering the voicemail message for a call dialed with machine detection."""
+    if not settings.ELEVENLABS_API_KEY:
+        return
+    _hold(_voicemails, call_id, asyncio.create_task(
+        render_voicemail(lead_name, agent_name, area, callback_number), name=f"voicemail-{call_id}"
+    ))
+
+
+async def _wait(tasks: dict[str, asyncio.Task], call_id: str | None, what: str):
+    task = tasks.pop(call_id, None) if call_id else None
+    if task is None:
+        return None
+    try:
+        return await asyncio.wait_for(task, settings.GREETING_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        logger.warning(f"{what} for call {call_id} not ready, falling back")
+    except Exception as e:
+        logger.warning(f"{what} render failed for call {call_id}: {e}")
+    return None
+
+
+async def take(call_id: str | None) -> Greeting | None:
+    """The pre-rendered greeting for ``call_id``, or None to fall back to the LLM.
+
+    Waits up to GREETING_WAIT_SECONDS for a render that is still in flight.
+    """
+    return await _wait(_pending, call_id, "Greeting")
+
+
+async def take_voicemail(call_id: str | None) -> Path | None:
+    """The pre-rendered voicemail MP3 for ``call_id``, or None to fall back to carrier TTS."""
+    return await _wait(_voicemails, call_id, "Voicemail")
+
+
+def discard(call_id: str):
+    """Drop renders that will never be played (call failed or ended)."""
+    for tasks in (_pending, _voicemails):
+        task = tasks.pop(call_id, None)
+        if task is not None and not task.done():
+            task.cancel()
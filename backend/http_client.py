@@ -0,0 +1,155 @@
+"""Shared async HTTP client pool for telephony provider APIs (Telnyx, Twilio).
+
+One keep-alive ``httpx.AsyncClient`` per provider origin, so the connection
+limits are per host and HTTP/2 streams share a single TLS connection. Clients
+are created on first use and closed from the app lifespan. ``request`` retries
+transient failures with exponential backoff and full jitter:
+
+- connect/pool errors and 429/503 responses for any method, since the provider
+  never processed the request;
+- read errors and 502/504 only for idempotent methods, so a POST that may
+  have gone through (a dial, a text) is never sent twice.
+"""
+
+import asyncio
+import logging
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_ANY_STATUS = {429, 503}
+RETRY_IDEMPOTENT_STATUS = {502, 504}
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+MAX_BACKOFF = 4.0
+
+
+class ProviderHTTP:
+    """Per-origin pooled clients with retry and connection-reuse counters."""
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive: int,
+        timeout: float,
+        connect_timeout: float,
+        retries: int,
+        http2: bool = True,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=60,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries = retries
+        self.http2 = http2
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+        self.connections_opened = 0
+
+    def client(self, url: str) -> httpx.AsyncClient:
+        """Pooled client for ``url``'s origin."""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+            self._clients[origin] = client
+        return client
+
+    async def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the pool; the caller checks the status code."""
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        client = self.client(url)
+        attempt = 0
+        while True:
+            self.requests += 1
+            try:
+                resp = await client.request(method, url, extensions={"trace": self._trace}, **kwargs)
+            except NOT_SENT_ERRORS as e:
+                error = e
+            except httpx.TransportError as e:
+                if not idempotent:
+                    self.failed += 1
+                    raise
+                error = e
+            else:
+                retryable = resp.status_code in RETRY_ANY_STATUS or (
+                    idempotent and resp.status_code in RETRY_IDEMPOTENT_STATUS
+                )
+                if not retryable or attempt >= self.retries:
+                    return resp
+                error = None
+
+            if attempt >= self.retries:
+                self.failed += 1
+                raise error
+            delay = random.uniform(0, min(MAX_BACKOFF, 0.25 * 2 ** attempt))
+            if error is None:
+                retry_after = resp.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = max(delay, min(MAX_BACKOFF, float(retry_after)))
+                reason = f"HTTP {resp.status_code}"
+            else:
+                reason = type(error).__name__
+            attempt += 1
+            self.retried += 1
+            logger.info(f"{method} {url} failed ({reason}), retry {attempt}/{self.retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        await asyncio.gather(*(c.aclose() for c in clients.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Pool utilisation per origin plus request/retry/connection counters.
+
+        ``reuse_ratio`` is the share of requests that didn't open a new TCP
+        connection — it should approach 1.0 under steady load.
+        """
+        hosts = {}
+        for origin, client in self._clients.items():
+            # httpcore's pool is not part of httpx's public API; best effort.
+            pool = getattr(getattr(client, "_transport", None), "_pool", None)
+            conns = list(getattr(pool, "connections", []))
+            hosts[origin] = {
+                "connections": len(conns),
+                "idle": sum(1 for c in conns if c.is_idle()),
+                "http2": sum(1 for c in conns if "HTTP/2" in c.info()),
+                "max_connections": self.limits.max_connections,
+            }
+        reuse = 1 - self.connections_opened / self.requests if self.requests else None
+        return {
+            "hosts": hosts,
+            "requests": self.requests,
+            "retried": self.retried,
+            "failed": self.failed,
+            "connections_opened": self.connections_opened,
+            "reuse_ratio": round(reuse, 3) if reuse is not None else None,
+        }
+
+
+provider_http = ProviderHTTP(
+    max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+    max_keepalive=settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+    timeout=settings.HTTP_TIMEOUT_SECONDS,
+    connect_timeout=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+    retries=settings.HTTP_RETRIES,
+)
@@ -0,0 +1,155 @@
+"""Webhook idempotency — a bounded, time-windowed seen-set of provider event ids.
+
+Twilio and Telnyx retry webhooks they consider slow or failed. Each handler
+claims the event id (MessageSid, CallSid + status, Telnyx event id) before
+doing any work; a retry of a claimed event gets the stored result back
+without recomputing. State lives in SQLite so it survives restarts and is
+shared by every worker process on the host. Queries run in a worker thread
+(``asyncio.to_thread``) so a busy database never stalls the event loop.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PRUNE_EVERY = 500
+
+
+class WebhookEventStore:
+    """Seen-set of webhook event keys with cached results.
+
+    Keys expire after ``ttl`` seconds and at most ``max_entries`` are kept
+    (oldest dropped first). A claim whose handler never completed — the
+    process died mid-request — can be re-claimed after ``claim_timeout``.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int, claim_timeout: float = 120.0):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.claim_timeout = claim_timeout
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._claims = 0
+        self.duplicates = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=2000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS webhook_events ("
+                " key TEXT PRIMARY KEY,"
+                " created_at REAL NOT NULL,"
+                " done INTEGER NOT NULL DEFAULT 0,"
+                " result TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_webhook_events_created ON webhook_events(created_at)")
+            self._conn = conn
+        return self._conn
+
+    async def claim(self, key: str | None) -> bool:
+        """Return True if this is the first delivery of ``key`` (the caller should process it).
+
+        A None key (provider sent no id) is always processed.
+        """
+        if key is None:
+            return True
+        claimed = await asyncio.to_thread(self._claim, key)
+        if not claimed:
+            self.duplicates += 1
+            logger.info(f"Duplicate webhook delivery ignored: {key}")
+        return claimed
+
+    async def result(self, key: str) -> Any | None:
+        """Result stored by ``complete`` for ``key``, or None if still in progress."""
+        return await asyncio.to_thread(self._result, key)
+
+    async def complete(self, key: str | None, result: Any = None):
+        if key is None:
+            return
+        await asyncio.to_thread(self._complete, key, json.dumps(result))
+
+    async def release(self, key: str | None):
+        """Forget ``key`` so the provider's retry is processed again."""
+        if key is None:
+            return
+        await asyncio.to_thread(self._release, key)
+
+    @asynccontextmanager
+    async def processing(self, key: str | None):
+        """Release the claim if the handler body raises."""
+        try:
+            yield
+        except BaseException:
+            await self.release(key)
+            raise
+
+    # ── Blocking queries (run in a worker thread) ────────────────────────────
+
+    def _claim(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "DELETE FROM webhook_events WHERE key = ?"
+                " AND (created_at < ? OR (done = 0 AND created_at < ?))",
+                (key, now - self.ttl, now - self.claim_timeout),
+            )
+            claimed = db.execute(
+                "INSERT OR IGNORE INTO webhook_events (key, created_at) VALUES (?, ?)",
+                (key, now),
+            ).rowcount == 1
+            self._claims += 1
+            if self._claims % PRUNE_EVERY == 0:
+                self._prune(now)
+        return claimed
+
+    def _result(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT result FROM webhook_events WHERE key = ? AND done = 1", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def _complete(self, key: str, result: str):
+        with self._lock:
+            self._db().execute("UPDATE webhook_events SET done = 1, result = ? WHERE key = ?", (result, key))
+
+    def _release(self, key: str):
+        with self._lock:
+            self._db().execute("DELETE FROM webhook_events WHERE key = ?", (key,))
+
+    def _prune(self, now: float):
+        db = self._db()
+        db.execute("DELETE FROM webhook_events WHERE created_at < ?", (now - self.ttl,))
+        (count,) = db.execute("SELECT count(*) FROM webhook_events").fetchone()
+        if count > self.max_entries:
+            db.execute(
+                "DELETE FROM webhook_events WHERE key IN"
+                " (SELECT key FROM webhook_events ORDER BY created_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            (count,) = self._db().execute("SELECT count(*) FROM webhook_events").fetchone()
+        return {"entries": count, "max_entries": self.max_entries, "duplicates": self.duplicates}
+
+
+webhook_events = WebhookEventStore(
+    settings.WEBHOOK_DEDUPE_PATH,
+    ttl=settings.WEBHOOK_DEDUPE_TTL_SECONDS,
+    max_entries=settings.WEBHOOK_DEDUPE_MAX_ENTRIES,
+)
@@ -4,29 +4,71 @@ import csv
 import io
 import os
 import json
+import time
 import uuid
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
-import httpx
 from dotenv import load_dotenv
 from fastapi import FastAPI, WebSocket, UploadFile, File, HTTPException, Request, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel
-from twilio.rest import Client as TwilioClient
 from twilio.twiml.voice_response import VoiceResponse, Connect
 
+import campaigns
+from call_store import PRE_STREAM_STATUSES, TERMINAL_STATUSES, call_store
+from capacity import CapacityFull, call_slots
+import greetings
+import metrics
+import post_call
+import recordings
+import telephony
+from config import settings
+from http_client import provider_http
+from idempotency import webhook_events
+from prompts import get_voicemail_message
 # Lazy import pipeline to avoid loading PyTorch/Silero on lightweight deployments
 # from pipeline import run_harvey_pipeline
-from sms import router as sms_router
+from sms import (
+    router as sms_router,
+    background_jobs as sms_background_jobs,
+    inbound_bursts as sms_inbound_bursts,
+)
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Call Harvey", version="2.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await campaigns.resume_running()
+    except Exception as e:
+        logger.warning(f"Could not resume campaigns: {e}")
+    pipeline = None
+    try:
+        import pipeline
+    except ImportError as e:
+        logger.info(f"Voice pipeline not installed, skipping warm pool: {e}")
+    if pipeline is not None:
+        await pipeline.startup()
+    yield
+    if pipeline is not None:
+        await pipeline.shutdown()
+    await campaigns.shutdown()
+    await sms_inbound_bursts.stop()
+    await sms_background_jobs.stop()
+    await post_call.post_call_batches.stop()
+    await recordings.downloads.stop()
+    await provider_http.aclose()
+    await call_store.close()
+
+
+app = FastAPI(title="Call Harvey", version="2.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,16 +78,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory store (replace with Supabase in production)
-calls_db: dict[str, dict] = {}
-leads_db: dict[str, dict] = {}
-
-twilio_client = TwilioClient(
-    os.getenv("TWILIO_ACCOUNT_SID"),
-    os.getenv("TWILIO_AUTH_TOKEN"),
-)
+# Fields the voice pipeline fills in on its call record while it runs.
+PIPELINE_FIELDS = ("time_to_first_word_ms", "turn_latency_ms", "speculation")
 
 app.include_router(sms_router)
+app.include_router(campaigns.router)
 
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 WS_URL = BASE_URL.replace("https://", "wss://").replace("http://", "ws://")
@@ -59,6 +96,12 @@ class StartCallRequest(BaseModel):
     agent_name: str = "Sam"
     brokerage: str = "Harvey Realty"
     area: str = "your area"
+    # Carrier to dial through; defaults to TELEPHONY_PROVIDER
+    provider: Optional[Literal["twilio", "telnyx"]] = None
+    # Answering-machine detection; defaults to VOICE_AMD_ENABLED
+    detect_voicemail: Optional[bool] = None
+    # Lead (from /api/leads/upload) to complete with the post-call results
+    lead_id: Optional[str] = None
 
 
 # --- Endpoints ---
@@ -68,13 +111,32 @@ async def root():
     return {"service": "Call Harvey", "status": "running", "version": "2.0.0"}
 
 
-@app.post("/api/calls/start")
-async def start_call(req: StartCallRequest):
-    """Trigger an outbound AI call to a lead."""
+@app.get("/api/http/stats")
+async def http_stats():
+    """Provider HTTP pool utilisation and connection reuse."""
+    return provider_http.stats()
+
+
+async def _place_call(req: StartCallRequest, provider_name: Optional[str]) -> dict:
+    """Record a new call and dial the lead through the chosen carrier."""
+    provider = telephony.get_provider(provider_name)
     call_id = str(uuid.uuid4())
+    amd = settings.VOICE_AMD_ENABLED if req.detect_voicemail is None else req.detect_voicemail
+
+    # Reserve the pipeline slot before the phone rings; shed load when full.
+    try:
+        await call_slots.acquire(call_id)
+    except CapacityFull as e:
+        logger.warning(f"Not dialing {req.lead_phone}: {e}")
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after) or 1)}
+        )
 
-    calls_db[call_id] = {
+    await call_store.create({
         "id": call_id,
+        "provider": provider.name,
+        "amd": amd,
+        "lead_id": req.lead_id,
         "lead_phone": req.lead_phone,
         "lead_name": req.lead_name,
         "agent_name": req.agent_name,
@@ -87,32 +149,90 @@ async def start_call(req: StartCallRequest):
         "qualification": None,
         "recording_url": None,
         "summary": None,
-    }
+    })
 
-    try:
-        call = twilio_client.calls.create(
-            to=req.lead_phone,
-            from_=os.getenv("TWILIO_PHONE_NUMBER"),
-            url=f"{BASE_URL}/api/twiml/outbound?call_id={call_id}",
-            record=True,
-            status_callback=f"{BASE_URL}/api/calls/status?call_id={call_id}",
-            status_callback_event=["initiated", "ringing", "answered", "completed"],
+    # Render the opening line while the phone rings.
+    greetings.prerender(call_id, req.lead_name, req.agent_name, req.brokerage, req.area)
+    if amd:
+        greetings.prerender_voicemail(
+            call_id, req.lead_name, req.agent_name, req.area, _callback_number(provider.name)
         )
-        calls_db[call_id]["twilio_sid"] = call.sid
-        calls_db[call_id]["status"] = "initiated"
-        logger.info(f"Call {call_id} initiated: {call.sid}")
+    try:
+        result = await provider.dial(req.lead_phone, call_id, base_url=BASE_URL, detect_machine=amd)
     except Exception as e:
-        calls_db[call_id]["status"] = "failed"
-        logger.error(f"Call {call_id} failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        greetings.discard(call_id)
+        call_slots.release(call_id)
+        await call_store.transition(call_id, "failed", ended_at=datetime.utcnow().isoformat())
+        logger.error(f"Call {call_id} via {provider.name} failed: {e}")
+        status = 502 if isinstance(e, telephony.TelephonyError) else 500
+        raise HTTPException(status_code=status, detail=str(e))
+
+    if provider.name == "telnyx":
+        await call_store.link_ref(result.call_ref, call_id)
+        refs = {
+            "telnyx_call_control_id": result.call_ref,
+            "telnyx_call_leg_id": result.extra.get("call_leg_id", ""),
+        }
+    else:
+        refs = {"twilio_sid": result.call_ref}
+    await call_store.update(call_id, **refs)
+    # Carrier callbacks may already have moved the call on; don't step back.
+    await call_store.transition(call_id, "initiated", expect=("queued",))
+    logger.info(f"Call {call_id} initiated via {provider.name}: {result.call_ref}")
+    return {"call_id": call_id, "status": "initiated", "provider": provider.name}
+
+
+def _callback_number(provider_name: str) -> str:
+    if settings.VOICEMAIL_CALLBACK_NUMBER:
+        return settings.VOICEMAIL_CALLBACK_NUMBER
+    if provider_name == "telnyx":
+        return settings.TELNYX_PHONE_NUMBER
+    return settings.TWILIO_PHONE_NUMBER
+
+
+@app.get("/api/capacity")
+async def capacity_stats():
+    """Live call slot usage and admission counters for this worker."""
+    return call_slots.stats()
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Voice latency summaries (p50/p95/p99 per stage) in Prometheus text format."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/voice/stats")
+async def voice_stats():
+    """Warm pool state and time-to-first-word for recent calls (warm vs cold)."""
+    try:
+        from pipeline import ttfw_stats
+    except ImportError:
+        return {"enabled": False}
+    return ttfw_stats()
 
-    return {"call_id": call_id, "status": "initiated"}
+
+@app.post("/api/calls/start")
+async def start_call(req: StartCallRequest):
+    """Trigger an outbound AI call to a lead."""
+    return await _place_call(req, req.provider)
 
 
 @app.post("/api/twiml/outbound")
-async def twiml_outbound(call_id: str = ""):
+async def twiml_outbound(call_id: str = "", amd: bool = False, held: bool = False):
     """Returns TwiML that connects the call to our WebSocket media stream."""
     response = VoiceResponse()
+    if amd:
+        # Hold the line until /api/calls/amd connects the stream (human) or
+        # drops the voicemail (machine); if no verdict arrives in time,
+        # connect anyway rather than leave a live person in silence.
+        response.pause(length=settings.VOICE_AMD_HOLD_SECONDS)
+        response.redirect(f"{BASE_URL}/api/twiml/outbound?call_id={call_id}&held=true")
+        return PlainTextResponse(content=str(response), media_type="application/xml")
+    if held and not await call_store.transition(call_id, "connecting", expect=PRE_STREAM_STATUSES):
+        # The AMD verdict is already connecting the stream; its TwiML replaces this.
+        response.pause(length=settings.VOICE_AMD_HOLD_SECONDS)
+        return PlainTextResponse(content=str(response), media_type="application/xml")
     connect = Connect()
     connect.stream(url=f"{WS_URL}/ws/media/{call_id}")
     response.append(connect)
@@ -127,17 +247,22 @@ async def twiml_inbound(request: Request):
     call_id = str(uuid.uuid4())
     form = await request.form()
     caller = form.get("From", "unknown")
+
+    response = VoiceResponse()
+    if not call_slots.try_acquire(call_id):
+        logger.warning(f"Inbound call from {caller} turned away: no call slot")
+        response.reject(reason="busy")
+        return PlainTextResponse(content=str(response), media_type="application/xml")
     
-    calls_db[call_id] = {
+    await call_store.create({
         "id": call_id,
         "lead_phone": caller,
         "lead_name": "Caller",
         "status": "answered",
         "started_at": datetime.utcnow().isoformat(),
         "direction": "inbound",
-    }
-    
-    response = VoiceResponse()
+    })
+
     connect = Connect()
     connect.stream(url=f"{WS_URL}/ws/media/{call_id}")
     response.append(connect)
@@ -149,15 +274,18 @@ async def twiml_inbound(request: Request):
 async def websocket_media(websocket: WebSocket, call_id: str):
     """WebSocket endpoint for Twilio media streams — runs the Pipecat pipeline."""
     await websocket.accept()
+    accepted_at = time.monotonic()
     
     # Read the initial Twilio handshake messages to get streamSid
     stream_sid = None
-    call_data = calls_db.get(call_id, {})
+    call_sid = None
+    call_data = await call_store.get(call_id) or {}
     
     async for message in websocket.iter_text():
         data = json.loads(message)
         if data.get("event") == "start":
             stream_sid = data["start"]["streamSid"]
+            call_sid = data["start"].get("callSid")
             logger.info(f"Media stream started: {stream_sid} for call {call_id}")
             break
     
@@ -165,16 +293,19 @@ async def websocket_media(websocket: WebSocket, call_id: str):
         logger.error(f"No stream_sid received for call {call_id}")
         await websocket.close()
         return
+
+    if not call_slots.activate(call_id):
+        await _refuse_media(websocket, call_id, "twilio", call_sid or call_data.get("twilio_sid"))
+        return
     
     # Update call status
-    if call_id in calls_db:
-        calls_db[call_id]["status"] = "in-progress"
-        calls_db[call_id]["stream_sid"] = stream_sid
+    await call_store.transition(call_id, "in-progress", stream_sid=stream_sid)
     
     lead_name = call_data.get("lead_name", "there")
     agent_name = call_data.get("agent_name", "Sam")
     brokerage = call_data.get("brokerage", "Harvey Realty")
     area = call_data.get("area", "your area")
+    call_record: dict = {}
     
     try:
         from pipeline import run_harvey_pipeline  # lazy import
@@ -185,13 +316,46 @@ async def websocket_media(websocket: WebSocket, call_id: str):
             agent_name=agent_name,
             brokerage=brokerage,
             area=area,
+            started_at=accepted_at,
+            call_id=call_id,
+            call_record=call_record,
+            call_sid=call_sid or call_data.get("twilio_sid"),
         )
     except Exception as e:
         logger.error(f"Pipeline error for call {call_id}: {e}")
     finally:
-        if call_id in calls_db:
-            calls_db[call_id]["status"] = "completed"
-            calls_db[call_id]["ended_at"] = datetime.utcnow().isoformat()
+        call_slots.release(call_id)
+        await _finish_media(call_id, call_data, call_record)
+
+
+async def _finish_media(call_id: str, call_data: dict, call_record: dict):
+    """Persist the pipeline's call metrics, mark the call completed and queue extraction."""
+    fields = {k: call_record[k] for k in PIPELINE_FIELDS if k in call_record}
+    await call_store.update(call_id, **fields)
+    await call_store.transition(call_id, "completed", ended_at=datetime.utcnow().isoformat())
+    post_call.submit(call_id, call_record.get("messages"), lead_id=call_data.get("lead_id"))
+
+
+async def _refuse_media(websocket: WebSocket, call_id: str, provider: str, call_ref: Optional[str]):
+    """No pipeline slot for this stream: hang up rather than degrade every call."""
+    logger.warning(f"No call slot for {provider} media stream of call {call_id}, hanging up")
+    await websocket.close()
+    if call_ref:
+        try:
+            await telephony.get_provider(provider).hangup(call_ref)
+        except Exception as e:
+            logger.warning(f"Hangup of refused call {call_id} failed: {e}")
+    # Not terminal: the carrier's own callback for the hung-up call still closes it.
+    await call_store.transition(call_id, "refused", refused_at=datetime.utcnow().isoformat())
+
+
+# Twilio's progress callbacks only move a call forward. Its "in-progress"
+# means answered; ours is set once the media stream starts.
+_TWILIO_PROGRESS = {
+    "initiated": ("initiated", ("queued",)),
+    "ringing": ("ringing", ("queued", "initiated")),
+    "in-progress": ("answered", ("queued", "initiated", "ringing")),
+}
 
 
 @app.post("/api/calls/status")
@@ -200,81 +364,128 @@ async def call_status_callback(request: Request, call_id: str = ""):
     form = await request.form()
     status = form.get("CallStatus", "unknown")
     duration = form.get("CallDuration")
-    
-    if call_id in calls_db:
-        calls_db[call_id]["status"] = status
-        if duration:
-            calls_db[call_id]["duration_seconds"] = int(duration)
-        if status in ("completed", "busy", "no-answer", "canceled", "failed"):
-            calls_db[call_id]["ended_at"] = datetime.utcnow().isoformat()
-    
+
+    # Twilio retries callbacks; one event per (call, status, sequence number).
+    call_sid = form.get("CallSid")
+    event_key = f"twilio-status:{call_sid}:{status}:{form.get('SequenceNumber', '')}" if call_sid else None
+    if not await webhook_events.claim(event_key):
+        return await webhook_events.result(event_key) or {"status": "ok"}
+
+    fields = {"duration_seconds": int(duration)} if duration else {}
+    expect = None
+    if status in TERMINAL_STATUSES:
+        fields["ended_at"] = datetime.utcnow().isoformat()
+        greetings.discard(call_id)
+        call_slots.release(call_id)
+    elif status in _TWILIO_PROGRESS:
+        status, expect = _TWILIO_PROGRESS[status]
+    if call_id and not await call_store.transition(call_id, status, expect=expect, **fields):
+        logger.info(f"Ignoring late {status} callback for call {call_id}")
+
+    await webhook_events.complete(event_key, {"status": "ok"})
     return {"status": "ok"}
 
 
-# --- Telnyx Call Control ---
-# NOTE: TELNYX_APP_ID webhook URL must match BASE_URL. If the Cloudflare tunnel
-# restarts and BASE_URL changes, update the app webhook via Telnyx API/dashboard.
+@app.post("/api/calls/recording")
+async def call_recording_callback(request: Request, call_id: str = ""):
+    """Twilio recording status callback: queue the recording for storage and return."""
+    form = await request.form()
+    recording_sid = form.get("RecordingSid", "")
+    recording_url = form.get("RecordingUrl", "")
+    if form.get("RecordingStatus", "completed") != "completed" or not recording_url:
+        return {"status": "ok"}
 
-TELNYX_API_KEY = os.getenv("TELNYX_API_KEY", "")
-TELNYX_PHONE_NUMBER = os.getenv("TELNYX_PHONE_NUMBER", "")
-TELNYX_HEADERS = {
-    "Authorization": f"Bearer {TELNYX_API_KEY}",
-    "Content-Type": "application/json",
-}
+    event_key = f"twilio-recording:{recording_sid}" if recording_sid else None
+    if not await webhook_events.claim(event_key):
+        return await webhook_events.result(event_key) or {"status": "ok"}
 
-# Track call_control_id → call_id mapping
-telnyx_cc_map: dict[str, str] = {}
+    duration = form.get("RecordingDuration")
+    await call_store.update(
+        call_id,
+        recording_sid=recording_sid,
+        recording_duration_seconds=int(duration) if duration else None,
+        recording_status="pending",
+    )
+    recordings.ingest(call_id, recording_sid or call_id, f"{recording_url}.mp3")
+    await webhook_events.complete(event_key, {"status": "ok"})
+    return {"status": "ok"}
 
 
-@app.post("/api/telnyx/call")
-async def telnyx_start_call(req: StartCallRequest):
-    """Initiate an outbound call via Telnyx Call Control."""
-    call_id = str(uuid.uuid4())
+@app.post("/api/calls/amd")
+async def call_amd_callback(request: Request, call_id: str = ""):
+    """Twilio async AMD result: connect humans, leave machines the voicemail."""
+    form = await request.form()
+    answered_by = form.get("AnsweredBy", "unknown")
+    call_sid = form.get("CallSid", "")
+
+    event_key = f"twilio-amd:{call_sid}" if call_sid else None
+    if not await webhook_events.claim(event_key):
+        return await webhook_events.result(event_key) or {"status": "ok"}
+
+    async with webhook_events.processing(event_key):
+        await call_store.update(call_id, answered_by=answered_by)
+        logger.info(f"AMD for call {call_id}: {answered_by}")
+        twilio = telephony.get_provider("twilio")
+        if answered_by.startswith("machine"):
+            # DetectMessageEnd reports machines after the beep, which may be
+            # after the hold expired; replacing the TwiML ends the stream.
+            await _drop_voicemail(call_id, twilio, call_sid)
+        elif answered_by == "fax":
+            await twilio.hangup(call_sid)
+        elif await call_store.transition(call_id, "connecting", expect=PRE_STREAM_STATUSES):
+            # Claimed against the hold redirect, which may be connecting it too.
+            try:
+                await twilio.start_stream(call_sid, f"{WS_URL}/ws/media/{call_id}")
+            except Exception:
+                await call_store.transition(call_id, "answered", expect=("connecting",))
+                raise
+    await webhook_events.complete(event_key, {"status": "ok"})
+    return {"status": "ok"}
 
-    calls_db[call_id] = {
-        "id": call_id,
-        "provider": "telnyx",
-        "lead_phone": req.lead_phone,
-        "lead_name": req.lead_name,
-        "agent_name": req.agent_name,
-        "brokerage": req.brokerage,
-        "area": req.area,
-        "status": "queued",
-        "started_at": datetime.utcnow().isoformat(),
-        "ended_at": None,
-        "duration_seconds": None,
-        "qualification": None,
-        "recording_url": None,
-        "summary": None,
-    }
-
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            "https://api.telnyx.com/v2/calls",
-            headers=TELNYX_HEADERS,
-            json={
-                "connection_id": os.getenv("TELNYX_APP_ID"),
-                "to": req.lead_phone,
-                "from": TELNYX_PHONE_NUMBER,
-                "webhook_url": f"{BASE_URL}/api/telnyx/webhook",
-                "webhook_url_method": "POST",
-            },
+
+async def _drop_voicemail(call_id: str, provider: telephony.TelephonyProvider, call_ref: str):
+    """Play the pre-rendered voicemail on ``call_ref`` (carrier TTS if it isn't ready)."""
+    call = await call_store.get(call_id) or {}
+    path = await greetings.take_voicemail(call_id)
+    text = ""
+    if path is not None:
+        await call_store.update(call_id, voicemail_path=str(path))
+        audio_url = f"{BASE_URL}/api/voicemail/{call_id}.mp3"
+    else:
+        audio_url = None
+        text = get_voicemail_message(
+            call.get("lead_name", "there"),
+            call.get("agent_name", "Sam"),
+            call.get("area", "your area"),
+            _callback_number(provider.name),
         )
+    await provider.drop_voicemail(call_ref, audio_url, text)
+    await call_store.update(call_id, voicemail_dropped_at=datetime.utcnow().isoformat())
+    greetings.discard(call_id)
+    logger.info(f"Voicemail dropped for call {call_id} ({'audio' if audio_url else 'tts'})")
 
-    if resp.status_code not in (200, 201):
-        calls_db[call_id]["status"] = "failed"
-        logger.error(f"Telnyx call failed: {resp.text}")
-        raise HTTPException(status_code=502, detail=f"Telnyx error: {resp.text}")
 
-    data = resp.json().get("data", {})
-    cc_id = data.get("call_control_id", "")
-    calls_db[call_id]["telnyx_call_control_id"] = cc_id
-    calls_db[call_id]["telnyx_call_leg_id"] = data.get("call_leg_id", "")
-    calls_db[call_id]["status"] = "initiated"
-    telnyx_cc_map[cc_id] = call_id
+@app.get("/api/voicemail/{call_id}.mp3")
+async def voicemail_audio(call_id: str):
+    """Pre-rendered voicemail audio, fetched by the carrier during the drop."""
+    path = (await call_store.get(call_id) or {}).get("voicemail_path")
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Voicemail not found")
+    return FileResponse(path, media_type="audio/mpeg")
 
-    logger.info(f"Telnyx call {call_id} initiated, cc_id={cc_id}")
-    return {"call_id": call_id, "status": "initiated", "call_control_id": cc_id}
+
+# --- Telnyx Call Control ---
+# NOTE: TELNYX_APP_ID webhook URL must match BASE_URL. If the Cloudflare tunnel
+# restarts and BASE_URL changes, update the app webhook via Telnyx API/dashboard.
+
+
+@app.post("/api/telnyx/call")
+async def telnyx_start_call(req: StartCallRequest):
+    """Initiate an outbound call via Telnyx Call Control."""
+    result = await _place_call(req, "telnyx")
+    call = await call_store.get(result["call_id"]) or {}
+    result["call_control_id"] = call.get("telnyx_call_control_id")
+    return result
 
 
 @app.post("/api/telnyx/webhook")
@@ -286,36 +497,54 @@ async def telnyx_webhook(request: Request):
     payload = event_data.get("payload", {})
     cc_id = payload.get("call_control_id", "")
 
+    event_key = f"telnyx-call:{event_data['id']}" if event_data.get("id") else None
+    if not await webhook_events.claim(event_key):
+        return await webhook_events.result(event_key) or {"status": "ok"}
+    # A failed handler releases the claim so Telnyx's retry is processed.
+    async with webhook_events.processing(event_key):
+        await _handle_telnyx_call_event(event_type, payload, cc_id)
+    await webhook_events.complete(event_key, {"status": "ok"})
+    return {"status": "ok"}
+
+
+async def _handle_telnyx_call_event(event_type: str, payload: dict, cc_id: str):
     logger.info(f"Telnyx webhook: {event_type} cc_id={cc_id}")
 
-    call_id = telnyx_cc_map.get(cc_id)
+    call_id = await call_store.resolve_ref(cc_id) if cc_id else None
 
     if event_type == "call.initiated":
-        if call_id and call_id in calls_db:
-            calls_db[call_id]["status"] = "ringing"
+        if call_id:
+            await call_store.transition(call_id, "ringing", expect=("queued", "initiated"))
 
     elif event_type == "call.answered":
-        if call_id and call_id in calls_db:
-            calls_db[call_id]["status"] = "answered"
-
-        # Start media streaming via WebSocket
-        stream_url = f"{WS_URL}/ws/telnyx-media/{call_id or cc_id}"
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"https://api.telnyx.com/v2/calls/{cc_id}/actions/streaming_start",
-                headers=TELNYX_HEADERS,
-                json={
-                    "stream_url": stream_url,
-                    "stream_track": "both_tracks",
-                    "enable_dialogflow": False,
-                },
-            )
-            logger.info(f"Telnyx streaming_start resp: {resp.status_code} {resp.text}")
-
-    elif event_type in ("call.hangup", "call.machine.detection.ended"):
-        if call_id and call_id in calls_db:
-            calls_db[call_id]["status"] = "completed"
-            calls_db[call_id]["ended_at"] = datetime.utcnow().isoformat()
+        if call_id:
+            await call_store.transition(call_id, "answered")
+        # With AMD the stream waits for call.machine.detection.ended.
+        if not (call_id and (await call_store.get(call_id) or {}).get("amd")):
+            await _telnyx_start_stream(cc_id, call_id)
+
+    elif event_type == "call.machine.detection.ended":
+        result = payload.get("result", "not_sure")
+        if call_id:
+            await call_store.update(call_id, answered_by=result)
+        logger.info(f"Telnyx AMD for cc_id={cc_id}: {result}")
+        # Machines get the voicemail once call.machine.greeting.ended arrives.
+        if result != "machine":
+            await _telnyx_start_stream(cc_id, call_id)
+
+    elif event_type == "call.machine.greeting.ended":
+        if call_id:
+            await _drop_voicemail(call_id, telephony.get_provider("telnyx"), cc_id)
+
+    elif event_type in ("call.playback.ended", "call.speak.ended"):
+        if call_id and (await call_store.get(call_id) or {}).get("voicemail_dropped_at"):
+            await telephony.get_provider("telnyx").hangup(cc_id)
+
+    elif event_type == "call.hangup":
+        if call_id:
+            await call_store.transition(call_id, "completed", ended_at=datetime.utcnow().isoformat())
+            greetings.discard(call_id)
+            call_slots.release(call_id)
 
     elif event_type == "streaming.started":
         logger.info(f"Telnyx media stream started for cc_id={cc_id}")
@@ -323,7 +552,14 @@ async def telnyx_webhook(request: Request):
     elif event_type == "streaming.stopped":
         logger.info(f"Telnyx media stream stopped for cc_id={cc_id}")
 
-    return {"status": "ok"}
+
+async def _telnyx_start_stream(cc_id: str, call_id: Optional[str]):
+    stream_url = f"{WS_URL}/ws/telnyx-media/{call_id or cc_id}"
+    try:
+        await telephony.get_provider("telnyx").start_stream(cc_id, stream_url)
+        logger.info(f"Telnyx streaming_start requested for cc_id={cc_id}")
+    except telephony.TelephonyError as e:
+        logger.error(f"Telnyx streaming_start failed: {e}")
 
 
 @app.websocket("/ws/telnyx-media/{call_id}")
@@ -332,14 +568,17 @@ async def telnyx_websocket_media(websocket: WebSocket, call_id: str):
     await websocket.accept()
     logger.info(f"Telnyx media WebSocket connected for call {call_id}")
 
-    call_data = calls_db.get(call_id, {})
-    if call_id in calls_db:
-        calls_db[call_id]["status"] = "in-progress"
+    call_data = await call_store.get(call_id) or {}
+    if not call_slots.activate(call_id):
+        await _refuse_media(websocket, call_id, "telnyx", call_data.get("telnyx_call_control_id"))
+        return
+    await call_store.transition(call_id, "in-progress")
 
     lead_name = call_data.get("lead_name", "there")
     agent_name = call_data.get("agent_name", "Sam")
     brokerage = call_data.get("brokerage", "Harvey Realty")
     area = call_data.get("area", "your area")
+    call_record: dict = {}
 
     try:
         from pipeline import run_telnyx_pipeline
@@ -350,51 +589,45 @@ async def telnyx_websocket_media(websocket: WebSocket, call_id: str):
             agent_name=agent_name,
             brokerage=brokerage,
             area=area,
+            call_record=call_record,
         )
     except Exception as e:
         logger.error(f"Telnyx pipeline error for call {call_id}: {e}")
     finally:
-        if call_id in calls_db:
-            calls_db[call_id]["status"] = "completed"
-            calls_db[call_id]["ended_at"] = datetime.utcnow().isoformat()
+        call_slots.release(call_id)
+        await _finish_media(call_id, call_data, call_record)
 
 
 # --- Telnyx SMS ---
 
+async def _telnyx_sms_reply(to: str, text: str):
+    """Reply via Telnyx; failures are logged, not raised."""
+    try:
+        await telephony.get_provider("telnyx").send_message(to, text)
+    except Exception as e:
+        logger.warning(f"Telnyx reply SMS failed: {e}")
+
+
 @app.post("/api/telnyx/sms/send")
 async def telnyx_sms_send(req: StartCallRequest):
     """Send outbound SMS via Telnyx and start qualification conversation."""
-    from sms import _get_or_create_convo, _insert_message, _upsert_conversation
+    from sms import _get_or_create_convo, _insert_message, _upsert_conversation, _greeting_text
 
-    convo = _get_or_create_convo(req.lead_phone, req.lead_name, req.area)
+    convo = await _get_or_create_convo(req.lead_phone, req.lead_name, req.area)
     convo["lead_name"] = req.lead_name
     convo["qualification"]["area"] = req.area
-    _upsert_conversation(req.lead_phone, req.lead_name, req.area, convo["qualification"])
+    await _upsert_conversation(req.lead_phone, req.lead_name, req.area, convo["qualification"])
 
-    greeting = (
-        f"Hi {req.lead_name}, this is Sam from Harvey Realty. "
-        f"I saw you were looking at properties in {req.area} — "
-        f"are you still in the market? I'd love to help you find the right place."
-    )
+    greeting = _greeting_text(req.lead_name, req.area)
 
-    _insert_message(req.lead_phone, "assistant", greeting)
+    await _insert_message(req.lead_phone, "assistant", greeting)
 
     # Send via Telnyx
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(
-            "https://api.telnyx.com/v2/messages",
-            headers=TELNYX_HEADERS,
-            json={
-                "from": TELNYX_PHONE_NUMBER,
-                "to": req.lead_phone,
-                "text": greeting,
-                "messaging_profile_id": os.getenv("TELNYX_MESSAGING_PROFILE_ID"),
-            },
-        )
-
-    if resp.status_code not in (200, 201):
-        logger.error(f"Telnyx SMS send failed: {resp.text}")
-        raise HTTPException(status_code=502, detail=f"Telnyx SMS error: {resp.text}")
+    try:
+        await telephony.get_provider("telnyx").send_message(req.lead_phone, greeting)
+    except telephony.TelephonyError as e:
+        logger.error(f"Telnyx SMS send failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Telnyx SMS error: {e.detail}")
 
     logger.info(f"Telnyx SMS sent to {req.lead_phone}")
     return {"status": "sent", "phone": req.lead_phone, "message": greeting, "provider": "telnyx"}
@@ -403,10 +636,7 @@ async def telnyx_sms_send(req: StartCallRequest):
 @app.post("/api/telnyx/sms/webhook")
 async def telnyx_sms_webhook(request: Request):
     """Handle inbound SMS via Telnyx webhook."""
-    from sms import (
-        _get_or_create_convo, _insert_message, _build_messages,
-        _extract_qualification, _get_openai,
-    )
+    from sms import inbound_bursts
 
     body = await request.json()
     event_data = body.get("data", {})
@@ -424,61 +654,31 @@ async def telnyx_sms_webhook(request: Request):
     if not text or not from_number:
         return {"status": "ok"}
 
-    logger.info(f"Telnyx inbound SMS from {from_number}: {text}")
-
-    convo = _get_or_create_convo(from_number)
-    convo["messages"].append({"role": "user", "content": text})
-    _insert_message(from_number, "user", text)
+    event_key = f"telnyx-sms:{event_data['id']}" if event_data.get("id") else None
+    if not await webhook_events.claim(event_key):
+        return await webhook_events.result(event_key) or {"status": "ok"}
 
-    # Generate response via GPT-4o
-    try:
-        resp = _get_openai().chat.completions.create(
-            model="gpt-4o",
-            messages=_build_messages(convo),
-            max_tokens=300,
-            temperature=0.7,
-        )
-        reply = resp.choices[0].message.content.strip()
-    except Exception as e:
-        logger.error(f"OpenAI error: {e}")
-        reply = "Thanks for your message! Let me get back to you shortly."
-
-    convo["messages"].append({"role": "assistant", "content": reply})
-    _insert_message(from_number, "assistant", reply)
-    _extract_qualification(from_number, convo, reply)
-
-    # Reply via Telnyx
-    async with httpx.AsyncClient() as client:
-        resp_telnyx = await client.post(
-            "https://api.telnyx.com/v2/messages",
-            headers=TELNYX_HEADERS,
-            json={
-                "from": TELNYX_PHONE_NUMBER,
-                "to": from_number,
-                "text": reply,
-                "messaging_profile_id": os.getenv("TELNYX_MESSAGING_PROFILE_ID"),
-            },
-        )
-        if resp_telnyx.status_code not in (200, 201):
-            logger.warning(f"Telnyx reply SMS failed: {resp_telnyx.text}")
+    logger.info(f"Telnyx inbound SMS from {from_number}: {text}")
 
+    inbound_bursts.add(from_number, (text, _telnyx_sms_reply))
+    await webhook_events.complete(event_key, {"status": "ok"})
     return {"status": "ok"}
 
 
 @app.get("/api/calls")
 async def list_calls(limit: int = 50, offset: int = 0):
     """List all call results."""
-    all_calls = list(calls_db.values())
-    all_calls.sort(key=lambda c: c.get("started_at", ""), reverse=True)
-    return {"calls": all_calls[offset:offset + limit], "total": len(all_calls)}
+    calls, total = await call_store.list_calls(limit, offset)
+    return {"calls": calls, "total": total}
 
 
 @app.get("/api/calls/{call_id}")
 async def get_call(call_id: str):
     """Get a single call result."""
-    if call_id not in calls_db:
+    call = await call_store.get(call_id)
+    if call is None:
         raise HTTPException(status_code=404, detail="Call not found")
-    return calls_db[call_id]
+    return call
 
 
 @app.post("/api/leads/upload")
@@ -502,7 +702,7 @@ async def upload_leads(file: UploadFile = File(...)):
             "status": "new",
             "imported_at": datetime.utcnow().isoformat(),
         }
-        leads_db[lead_id] = lead
+        await call_store.put_lead(lead)
         imported.append(lead)
 
     return {"imported": len(imported), "leads": imported}
@@ -511,9 +711,8 @@ async def upload_leads(file: UploadFile = File(...)):
 @app.get("/api/leads")
 async def list_leads(limit: int = 100, offset: int = 0):
     """List all leads."""
-    all_leads = list(leads_db.values())
-    all_leads.sort(key=lambda l: l.get("imported_at", ""), reverse=True)
-    return {"leads": all_leads[offset:offset + limit], "total": len(all_leads)}
+    leads, total = await call_store.list_leads(limit, offset)
+    return {"leads": leads, "total": total}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+"""Process-wide latency metrics, exported in Prometheus text format at /metrics.
+
+Each series keeps a count, a sum and a bounded reservoir of recent samples;
+p50/p95/p99 are computed from the reservoir and exported as a Prometheus
+summary. Values are in seconds unless the series is described with another
+``unit`` (token counts, say), which ``snapshot()`` then reports as-is. Gauges are read from a callback at export
+time, for live counts owned by other modules.
+"""
+
+from collections import deque
+from typing import Callable
+
+RESERVOIR_SIZE = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Count, sum and a reservoir of the most recent samples."""
+
+    def __init__(self, reservoir: int = RESERVOIR_SIZE):
+        self.count = 0
+        self.sum = 0.0
+        self._samples: deque[float] = deque(maxlen=reservoir)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self._samples.append(value)
+
+    def quantiles(self, qs=QUANTILES) -> dict[float, float | None]:
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {q: None for q in qs}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in qs}
+
+
+class Registry:
+    def __init__(self):
+        self._series: dict[str, dict[tuple, Histogram]] = {}
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._help: dict[str, str] = {}
+        self._units: dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str, unit: str = "seconds"):
+        self._help[name] = help_text
+        self._units[name] = unit
+
+    def gauge(self, name: str, read: Callable[[], float], help_text: str | None = None):
+        """Export ``read()`` as a gauge (replaces an earlier gauge of that name)."""
+        self._gauges[name] = read
+        if help_text:
+            self._help[name] = help_text
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        series = self._series.setdefault(name, {})
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram()
+        hist.observe(value)
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view: ``{name: [{labels, count, p50_ms, p95_ms, p99_ms}]}``, gauges as values.
+
+        Series not in seconds get ``p50``/``p95``/``p99`` in their own unit.
+        """
+        out = {}
+        for name, series in self._series.items():
+            seconds = self._units.get(name, "seconds") == "seconds"
+            suffix, scale = ("_ms", 1000) if seconds else ("", 1)
+            rows = []
+            for key, hist in series.items():
+                qs = hist.quantiles()
+                rows.append({
+                    "labels": dict(key),
+                    "count": hist.count,
+                    **{
+                        f"p{int(q * 100)}{suffix}": round(v * scale, 1) if v is not None else None
+                        for q, v in qs.items()
+                    },
+                })
+            out[name] = rows
+        for name, read in self._gauges.items():
+            out[name] = read()
+        return out
+
+    def render(self) -> str:
+        """Prometheus text exposition (summary type)."""
+        lines = []
+        for name, series in self._series.items():
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} summary")
+            for key, hist in series.items():
+                labels = ",".join(f'{k}="{v}"' for k, v in key)
+                for q, v in hist.quantiles().items():
+                    if v is not None:
+                        sep = "," if labels else ""
+                        lines.append(f'{name}{{{labels}{sep}quantile="{q}"}} {v:.6f}')
+                suffix = f"{{{labels}}}" if labels else ""
+                lines.append(f"{name}_sum{suffix} {hist.sum:.6f}")
+                lines.append(f"{name}_count{suffix} {hist.count}")
+        for name, read in self._gauges.items():
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.describe(
+    "harvey_voice_stage_seconds",
+    "Per-turn voice latency by stage: stt (end of speech to final transcript), "
+    "llm (transcript to first token), tts (first token to first audio byte), "
+    "transport (first audio byte to audio sent), turn (end of speech to audio sent).",
+)
+registry.describe(
+    "harvey_voice_first_word_seconds",
+    "Media stream start to first TTS audio of the call.",
+)
+registry.describe(
+    "harvey_voice_prompt_tokens",
+    "Approximate prompt size (characters / 4) sent to the voice LLM per turn, after context trimming.",
+    unit="tokens",
+)
+registry.describe(
+    "harvey_voice_speculation_saved_seconds",
+    "Head start on the first LLM token when a speculative reply matched the final transcript.",
+)
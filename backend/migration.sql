@@ -11,6 +11,10 @@ CREATE TABLE IF NOT EXISTS sms_conversations (
     updated_at TIMESTAMPTZ DEFAULT now()
 );
 
+-- Rolling summary of messages older than the history window (see sms.py)
+ALTER TABLE sms_conversations ADD COLUMN IF NOT EXISTS summary TEXT;
+ALTER TABLE sms_conversations ADD COLUMN IF NOT EXISTS summarized_through TIMESTAMPTZ;
+
 -- SMS Messages table
 CREATE TABLE IF NOT EXISTS sms_messages (
     id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
@@ -23,6 +27,119 @@ CREATE TABLE IF NOT EXISTS sms_messages (
 -- Index for fast message lookups
 CREATE INDEX IF NOT EXISTS idx_sms_messages_phone ON sms_messages(conversation_phone, created_at);
 
+-- Index for keyset pagination of the conversation list (newest first)
+CREATE INDEX IF NOT EXISTS idx_sms_conversations_updated ON sms_conversations(updated_at, phone);
+
+-- Conversation list for the dashboard: one row per conversation with its last
+-- message and message count, in a single round trip. Keyset-paginated on
+-- (updated_at, phone) descending; pass the last row of a page as the cursor.
+CREATE OR REPLACE FUNCTION list_conversation_summaries(
+    p_limit INT DEFAULT 50,
+    p_cursor_updated_at TIMESTAMPTZ DEFAULT NULL,
+    p_cursor_phone TEXT DEFAULT NULL,
+    p_updated_since TIMESTAMPTZ DEFAULT NULL
+)
+RETURNS TABLE (
+    phone TEXT,
+    lead_name TEXT,
+    area TEXT,
+    qualification JSONB,
+    updated_at TIMESTAMPTZ,
+    message_count BIGINT,
+    last_message JSONB
+) AS $$
+    SELECT
+        c.phone,
+        c.lead_name,
+        c.area,
+        c.qualification,
+        c.updated_at,
+        (SELECT count(*) FROM sms_messages m WHERE m.conversation_phone = c.phone),
+        (
+            SELECT jsonb_build_object('role', m.role, 'content', m.content, 'created_at', m.created_at)
+            FROM sms_messages m
+            WHERE m.conversation_phone = c.phone
+            ORDER BY m.created_at DESC
+            LIMIT 1
+        )
+    FROM sms_conversations c
+    WHERE (p_updated_since IS NULL OR c.updated_at >= p_updated_since)
+      AND (
+          p_cursor_updated_at IS NULL
+          OR (c.updated_at, c.phone) < (p_cursor_updated_at, coalesce(p_cursor_phone, ''))
+      )
+    ORDER BY c.updated_at DESC, c.phone DESC
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Inbound SMS turn: create the conversation if needed, append the user's
+-- message and return the conversation with its last p_history_limit messages
+-- (all of them when NULL) plus the rolling summary of everything older, in one
+-- transaction / round trip. Messages the summary doesn't cover yet are always
+-- returned, even beyond p_history_limit; unsummarized_count tells the caller
+-- when the summary needs refreshing.
+CREATE OR REPLACE FUNCTION record_inbound_turn(
+    p_phone TEXT,
+    p_content TEXT,
+    p_lead_name TEXT DEFAULT 'there',
+    p_qualification JSONB DEFAULT '{}'::jsonb,
+    p_history_limit INT DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    convo sms_conversations;
+    pending BIGINT;
+BEGIN
+    INSERT INTO sms_conversations (phone, lead_name, qualification)
+    VALUES (p_phone, p_lead_name, p_qualification)
+    ON CONFLICT (phone) DO UPDATE SET updated_at = now()
+    RETURNING * INTO convo;
+
+    INSERT INTO sms_messages (conversation_phone, role, content, created_at)
+    VALUES (p_phone, 'user', p_content, clock_timestamp());
+
+    SELECT count(*) INTO pending FROM sms_messages m
+    WHERE m.conversation_phone = p_phone
+      AND m.created_at > coalesce(convo.summarized_through, '-infinity');
+
+    RETURN jsonb_build_object(
+        'lead_name', convo.lead_name,
+        'qualification', convo.qualification,
+        'summary', convo.summary,
+        'summarized_through', convo.summarized_through,
+        'unsummarized_count', pending,
+        'messages', coalesce((
+            SELECT jsonb_agg(jsonb_build_object('role', r.role, 'content', r.content) ORDER BY r.created_at)
+            FROM (
+                SELECT m.role, m.content, m.created_at
+                FROM sms_messages m
+                WHERE m.conversation_phone = p_phone
+                ORDER BY m.created_at DESC
+                LIMIT CASE WHEN p_history_limit IS NULL THEN NULL ELSE greatest(p_history_limit, pending) END
+            ) r
+        ), '[]'::jsonb)
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Assistant side of a turn: append the reply and (optionally) store the
+-- updated qualification, in one transaction / round trip.
+CREATE OR REPLACE FUNCTION record_assistant_turn(
+    p_phone TEXT,
+    p_content TEXT,
+    p_qualification JSONB DEFAULT NULL
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO sms_messages (conversation_phone, role, content, created_at)
+    VALUES (p_phone, 'assistant', p_content, clock_timestamp());
+
+    UPDATE sms_conversations
+    SET qualification = coalesce(p_qualification, qualification)
+    WHERE phone = p_phone;
+END;
+$$ LANGUAGE plpgsql;
+
 -- Updated_at trigger
 CREATE OR REPLACE FUNCTION update_updated_at()
 RETURNS TRIGGER AS $$
@@ -37,10 +154,45 @@ CREATE OR REPLACE TRIGGER sms_conversations_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at();
 
+-- Bulk greeting campaigns (see campaigns.py). Per-lead status makes a
+-- paused or interrupted campaign resumable.
+CREATE TABLE IF NOT EXISTS sms_campaigns (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    name TEXT,
+    provider TEXT NOT NULL DEFAULT 'twilio',   -- twilio | telnyx
+    channel TEXT NOT NULL DEFAULT 'sms',       -- sms | whatsapp
+    status TEXT NOT NULL DEFAULT 'pending',    -- pending, running, paused, completed, failed
+    total INT DEFAULT 0,
+    sent INT DEFAULT 0,
+    failed INT DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS sms_campaign_leads (
+    id BIGSERIAL PRIMARY KEY,
+    campaign_id UUID NOT NULL REFERENCES sms_campaigns(id) ON DELETE CASCADE,
+    phone TEXT NOT NULL,
+    lead_name TEXT DEFAULT 'there',
+    area TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',    -- pending, sent, failed
+    error TEXT,
+    sent_at TIMESTAMPTZ,
+    UNIQUE (campaign_id, phone)
+);
+
+-- Index for walking a campaign's pending leads in id order
+CREATE INDEX IF NOT EXISTS idx_sms_campaign_leads_pending ON sms_campaign_leads(campaign_id, status, id);
+
 -- Enable RLS (optional, disable if using service key)
 ALTER TABLE sms_conversations ENABLE ROW LEVEL SECURITY;
 ALTER TABLE sms_messages ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sms_campaigns ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sms_campaign_leads ENABLE ROW LEVEL SECURITY;
 
 -- Allow all access via service key (anon/authenticated can be restricted later)
 CREATE POLICY "Allow all for service role" ON sms_conversations FOR ALL USING (true) WITH CHECK (true);
 CREATE POLICY "Allow all for service role" ON sms_messages FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY "Allow all for service role" ON sms_campaigns FOR ALL USING (true) WITH CHECK (true);
+CREATE POLICY "Allow all for service role" ON sms_campaign_leads FOR ALL USING (true) WITH CHECK (true);
@@ -2,16 +2,38 @@
 
 import os
 import sys
+import time
+import asyncio
+import json
 import logging
-
-from pipecat.frames.frames import LLMMessagesFrame, EndFrame
+import random
+import uuid
+from collections import deque
+from dataclasses import dataclass
+
+from openai import AsyncOpenAI
+from pipecat.frames.frames import (
+    BotStartedSpeakingFrame,
+    LLMMessagesFrame,
+    LLMTextFrame,
+    EndFrame,
+    StartInterruptionFrame,
+    TTSAudioRawFrame,
+    TTSStartedFrame,
+    TTSStoppedFrame,
+    TranscriptionFrame,
+    UserStartedSpeakingFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.observers.base_observer import BaseObserver, FramePushed
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
 from pipecat.services.deepgram.stt import DeepgramSTTService
 from pipecat.services.elevenlabs.tts import ElevenLabsTTSService
 from pipecat.services.openai.llm import OpenAILLMService
-from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext
+from pipecat.processors.aggregators.openai_llm_context import OpenAILLMContext, OpenAILLMContextFrame
 from pipecat.audio.vad.silero import SileroVADAnalyzer
 from pipecat.transports.websocket.fastapi import (
     FastAPIWebsocketTransport,
@@ -20,20 +42,429 @@ from pipecat.transports.websocket.fastapi import (
 from pipecat.serializers.twilio import TwilioFrameSerializer
 from pipecat.serializers.telnyx import TelnyxFrameSerializer
 
-from prompts import get_qualification_prompt
+import greetings
+from config import settings
+from metrics import registry
+from prompts import COMMON_PHRASES, FILLER_PHRASES, get_qualification_prompt
+from speculative_llm import InterimTap, SpeculativeOpenAILLMService, build_llm
+from summarizer import summarize_turns
+from tts_cache import normalize, tts_phrases
+from warm_pool import WarmPool
+from workers import KeyedWorkerPool
 
 logger = logging.getLogger(__name__)
 
+TTS_SAMPLE_RATE = greetings.SAMPLE_RATE
+VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "pNInz6obpgDQGcFmaJgB")
 
-async def run_harvey_pipeline(
+
+# ── TTS phrase cache ──────────────────────────────────────────────────────────
+
+
+# Renders repeatedly missed sentences into the cache over HTTP, off the
+# call's audio path.
+tts_fills = KeyedWorkerPool("tts-fill", workers=2, max_pending=settings.TTS_CACHE_FILL_QUEUE_MAX)
+
+
+def _should_fill(voice_id: str, text: str, sample_rate: int) -> bool:
+    """Only a sentence that keeps coming up is worth a second, cached render."""
+    if not (settings.ELEVENLABS_API_KEY and settings.TTS_CACHE_FILL_AFTER_MISSES > 0):
+        return False
+    if not tts_phrases.cacheable(text):
+        return False
+    return tts_phrases.note_miss(voice_id, text, sample_rate) >= settings.TTS_CACHE_FILL_AFTER_MISSES
+
+
+async def _fill(voice_id: str, text: str, sample_rate: int):
+    if await tts_phrases.get(voice_id, text, sample_rate) is None:
+        await tts_phrases.put(voice_id, text, sample_rate, await greetings._synthesize(text, voice_id))
+
+
+class CachingElevenLabsTTSService(ElevenLabsTTSService):
+    """Streaming ElevenLabs TTS that serves repeated opening sentences from ``tts_phrases``.
+
+    Misses go over the WebSocket as usual. Its audio for a turn arrives as one
+    undelimited stream, so a missed sentence is rendered into the cache
+    separately over HTTP (``tts_fills``) rather than cut out of the stream,
+    and only once it has missed TTS_CACHE_FILL_AFTER_MISSES times.
+    A hit is only served while no WebSocket context is open this turn: its
+    audio goes into an audio context of its own, and any later miss opens a
+    new context behind it, so playback order is kept.
+    """
+
+    async def run_tts(self, text: str):
+        audio = None
+        if not self._started:
+            audio = await tts_phrases.get(self._voice_id, text, self.sample_rate)
+        if audio is None:
+            if _should_fill(self._voice_id, text, self.sample_rate):
+                tts_fills.submit(
+                    (self._voice_id, normalize(text)),
+                    lambda: _fill(self._voice_id, text, self.sample_rate),
+                )
+            async for frame in super().run_tts(text):
+                yield frame
+            return
+
+        await self._close_idle_context()
+        context_id = str(uuid.uuid4())
+        await self.create_audio_context(context_id)
+        yield TTSStartedFrame()
+        await self.append_to_audio_context(
+            context_id, TTSAudioRawFrame(audio=audio, sample_rate=self.sample_rate, num_channels=1)
+        )
+        await self.remove_audio_context(context_id)
+        yield None
+
+    async def _close_idle_context(self):
+        """End the last turn's WebSocket context; the hit would otherwise wait out its audio timeout."""
+        if not self._context_id:
+            return
+        if self.audio_context_available(self._context_id):
+            await self.remove_audio_context(self._context_id)
+        try:
+            if self._websocket:
+                await self._websocket.send(json.dumps({"context_id": self._context_id, "close_context": True}))
+        except Exception as e:
+            logger.debug(f"Closing TTS context {self._context_id} failed: {e}")
+        self._context_id = None
+
+
+class FillerAudio(FrameProcessor):
+    """Plays a cached filler clip ("Mm-hmm.") when the reply is slow to start.
+
+    Armed when the lead stops talking; fires after ``delay`` seconds unless
+    the bot has started speaking or the lead talks again. Only clips already
+    in the phrase cache are used, so it never adds a TTS round trip.
+    """
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self._delay = delay
+        self._timer: asyncio.Task | None = None
+
+    def _cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _fire(self):
+        await asyncio.sleep(self._delay)
+        self._timer = None
+        text = random.choice(FILLER_PHRASES)
+        audio = await tts_phrases.get(VOICE_ID, text, TTS_SAMPLE_RATE)
+        if audio is None:
+            return
+        await self.push_frame(TTSStartedFrame())
+        await self.push_frame(TTSAudioRawFrame(audio=audio, sample_rate=TTS_SAMPLE_RATE, num_channels=1))
+        await self.push_frame(TTSStoppedFrame())
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, UserStoppedSpeakingFrame):
+            self._cancel()
+            self._timer = asyncio.create_task(self._fire())
+        elif isinstance(frame, (UserStartedSpeakingFrame, StartInterruptionFrame, TTSStartedFrame, EndFrame)):
+            self._cancel()
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        self._cancel()
+        await super().cleanup()
+
+
+# ── Warm component pool ───────────────────────────────────────────────────────
+
+
+@dataclass
+class VoiceServices:
+    """One call's worth of pipeline components (single-use)."""
+    vad: SileroVADAnalyzer
+    stt: DeepgramSTTService
+    llm: OpenAILLMService
+    tts: CachingElevenLabsTTSService
+
+
+async def _build_services() -> VoiceServices:
+    # Loading the Silero ONNX model is the slow part; keep it off the event loop.
+    vad = await asyncio.to_thread(SileroVADAnalyzer)
+    return VoiceServices(
+        vad=vad,
+        stt=DeepgramSTTService(
+            api_key=os.getenv("DEEPGRAM_API_KEY"),
+            model="nova-3",
+            language="en",
+        ),
+        llm=build_llm(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            model="gpt-4o",
+        ),
+        tts=CachingElevenLabsTTSService(
+            api_key=os.getenv("ELEVENLABS_API_KEY"),
+            voice_id=VOICE_ID,
+            model=greetings.TTS_MODEL,
+            sample_rate=TTS_SAMPLE_RATE,
+        ),
+    )
+
+
+# Started from the app lifespan; calls check a set out when the stream starts.
+voice_services = WarmPool("voice", _build_services, size=settings.VOICE_WARM_POOL_SIZE)
+
+
+_prerender_task: asyncio.Task | None = None
+
+
+async def startup():
+    """Fill the warm pool and make sure filler/common phrases are cached."""
+    global _prerender_task
+    await voice_services.start()
+    if settings.ELEVENLABS_API_KEY:
+        _prerender_task = asyncio.create_task(
+            tts_phrases.prerender(FILLER_PHRASES + COMMON_PHRASES, VOICE_ID, TTS_SAMPLE_RATE, greetings._synthesize),
+            name="tts-prerender",
+        )
+
+
+async def shutdown():
+    if _prerender_task is not None:
+        _prerender_task.cancel()
+    await voice_services.stop()
+    await tts_fills.stop()
+
+
+# ── Time to first word ────────────────────────────────────────────────────────
+
+_ttfw_ms: dict[bool, deque] = {True: deque(maxlen=500), False: deque(maxlen=500)}
+
+
+class FirstWordTimer(FrameProcessor):
+    """Records the time from media stream start to the first TTS audio frame."""
+
+    def __init__(self, label: str, started_at: float, warm: bool, call_record: dict | None = None):
+        super().__init__()
+        self._label = label
+        self._started_at = started_at
+        self._warm = warm
+        self._call_record = call_record
+        self._done = False
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if not self._done and isinstance(frame, TTSAudioRawFrame):
+            self._done = True
+            ms = (time.monotonic() - self._started_at) * 1000
+            _ttfw_ms[self._warm].append(ms)
+            registry.observe(
+                "harvey_voice_first_word_seconds", ms / 1000,
+                provider=self._label.lower(), checkout="warm" if self._warm else "cold",
+            )
+            if self._call_record is not None:
+                self._call_record["time_to_first_word_ms"] = round(ms)
+            logger.info(f"{self._label}: time to first word {ms:.0f}ms ({'warm' if self._warm else 'cold'})")
+        await self.push_frame(frame, direction)
+
+
+# ── Per-turn latency ──────────────────────────────────────────────────────────
+
+MAX_TURNS_PER_CALL = 200
+
+
+class TurnLatencyObserver(BaseObserver):
+    """Times each turn of the conversation, stage by stage.
+
+    A turn starts when VAD reports the lead stopped speaking and ends when
+    the output transport starts sending the bot's audio. Milestones are the
+    first frame of each kind after the turn starts (the observer sees every
+    hop, so later sightings of the same frame are ignored). The lead talking
+    again before the bot answers abandons the turn.
+    """
+
+    def __init__(self, label: str, call_record: dict | None = None):
+        super().__init__()
+        self._provider = label.lower()
+        self._call_record = call_record
+        self._turn: dict | None = None
+        self._last_transcript: float | None = None
+        self._seen: set[int] = set()
+
+    async def on_push_frame(self, data: FramePushed):
+        frame = data.frame
+        if frame.id in self._seen:
+            return
+        now = time.monotonic()
+
+        if isinstance(frame, UserStartedSpeakingFrame):
+            self._seen = {frame.id}
+            self._turn = None
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._seen = {frame.id}
+            self._turn = {"eos": now}
+        elif isinstance(frame, TranscriptionFrame):
+            self._seen.add(frame.id)
+            self._last_transcript = now
+        elif self._turn is None:
+            return
+        elif isinstance(frame, LLMTextFrame) and "llm" not in self._turn:
+            self._turn["llm"] = now
+        elif isinstance(frame, TTSAudioRawFrame) and "llm" in self._turn and "tts" not in self._turn:
+            self._turn["tts"] = now
+        elif isinstance(frame, BotStartedSpeakingFrame) and "tts" in self._turn:
+            self._turn["sent"] = now
+            self._finish(self._turn)
+            self._turn = None
+
+    def _finish(self, turn: dict):
+        eos = turn["eos"]
+        # Deepgram often finalises while the lead is still pausing, i.e.
+        # before VAD declares end of speech; that counts as zero STT wait.
+        stt_done = max(eos, self._last_transcript or eos)
+        stages = {
+            "stt": stt_done - eos,
+            "llm": turn["llm"] - stt_done,
+            "tts": turn["tts"] - turn["llm"],
+            "transport": turn["sent"] - turn["tts"],
+            "turn": turn["sent"] - eos,
+        }
+        for stage, seconds in stages.items():
+            registry.observe("harvey_voice_stage_seconds", max(0.0, seconds), stage=stage, provider=self._provider)
+        logger.info("Turn latency: " + " ".join(f"{k}={v * 1000:.0f}ms" for k, v in stages.items()))
+        if self._call_record is not None:
+            turns = self._call_record.setdefault("turn_latency_ms", [])
+            if len(turns) < MAX_TURNS_PER_CALL:
+                turns.append({k: round(max(0.0, v) * 1000) for k, v in stages.items()})
+
+
+def _summary(samples) -> dict:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    pick = lambda pct: round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))])
+    return {"count": len(ordered), "p50_ms": pick(50), "p95_ms": pick(95), "max_ms": round(ordered[-1])}
+
+
+def ttfw_stats() -> dict:
+    """Time-to-first-word over recent calls, split by warm vs cold component checkout."""
+    return {
+        "warm": _summary(_ttfw_ms[True]),
+        "cold": _summary(_ttfw_ms[False]),
+        "pool": voice_services.stats(),
+        "tts_cache": {**tts_phrases.stats(), "fills": tts_fills.stats()},
+        "latency": registry.snapshot(),
+    }
+
+
+# ── Context trimming ──────────────────────────────────────────────────────────
+
+SUMMARY_PREFIX = "Summary of the call so far (older turns, already discussed):\n"
+
+_summary_client: AsyncOpenAI | None = None
+
+
+def _get_summary_client() -> AsyncOpenAI:
+    global _summary_client
+    if _summary_client is None:
+        _summary_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    return _summary_client
+
+
+class ContextTrimmer(FrameProcessor):
+    """Keeps the prompt sent to the LLM a constant size on long calls.
+
+    Goes between the user aggregator and the LLM. The system prompt is
+    pinned and the last ``keep_turns`` turns (a user message and the replies
+    to it) stay verbatim. Once ``fold_turns`` more have built up, the older
+    ones are folded into a running summary (``summarizer.summarize_turns``)
+    in the background; the summary replaces them on the first turn after it
+    is ready, so no turn waits on it. ``transcript()`` still returns every
+    message of the call.
+    """
+
+    def __init__(self, context: OpenAILLMContext, label: str, keep_turns: int, fold_turns: int):
+        super().__init__()
+        self._context = context
+        self._provider = label.lower()
+        self._keep = keep_turns
+        self._fold_after = keep_turns + max(1, fold_turns)
+        self._summary: str | None = None
+        self._folded: list[dict] = []  # messages already replaced by the summary
+        self._folding: list[dict] | None = None
+        self._task: asyncio.Task | None = None
+
+    def _head(self, messages: list[dict]) -> int:
+        """Number of pinned messages: the system prompt, plus the summary once there is one."""
+        if len(messages) > 1 and str(messages[1].get("content", "")).startswith(SUMMARY_PREFIX):
+            return 2
+        return 1
+
+    def _apply_summary(self, messages: list[dict]) -> list[dict]:
+        task, folding = self._task, self._folding
+        self._task = self._folding = None
+        try:
+            summary = task.result()
+        except Exception as e:
+            logger.warning(f"{self._provider} context summary failed, keeping turns verbatim: {e}")
+            return messages
+        head = self._head(messages)
+        if messages[head:head + len(folding)] != folding:
+            return messages  # context was rewritten meanwhile
+        self._summary = summary
+        self._folded.extend(folding)
+        return messages[:1] + [{"role": "system", "content": SUMMARY_PREFIX + summary}] + messages[head + len(folding):]
+
+    def _trim(self):
+        messages = self._context.get_messages()
+        if self._task is not None and self._task.done():
+            trimmed = self._apply_summary(messages)
+            if trimmed is not messages:
+                self._context.set_messages(trimmed)
+                messages = trimmed
+
+        head = self._head(messages)
+        turns = [i for i in range(head, len(messages)) if messages[i].get("role") == "user"]
+        if self._task is None and len(turns) > self._fold_after:
+            self._folding = [dict(m) for m in messages[head:turns[-self._keep]]]
+            spoken = [m for m in self._folding if isinstance(m.get("content"), str)]
+            self._task = asyncio.create_task(
+                summarize_turns(_get_summary_client(), self._summary, spoken), name="context-summary"
+            )
+        # ~4 characters per token is close enough to watch the trend.
+        chars = sum(len(str(m.get("content") or "")) for m in messages)
+        registry.observe("harvey_voice_prompt_tokens", chars / 4, provider=self._provider)
+
+    def transcript(self) -> list[dict]:
+        """Every message of the call so far, including the folded ones."""
+        messages = self._context.get_messages()
+        return [dict(m) for m in messages[:1] + self._folded + messages[self._head(messages):]]
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, OpenAILLMContextFrame):
+            self._trim()
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        if self._task is not None:
+            self._task.cancel()
+        await super().cleanup()
+
+
+# ── Pipelines ─────────────────────────────────────────────────────────────────
+
+
+async def _run_pipeline(
     websocket,
-    stream_sid: str,
-    lead_name: str = "there",
-    agent_name: str = "your agent",
-    brokerage: str = "Harvey Realty",
-    area: str = "your area",
+    serializer,
+    label: str,
+    started_at: float,
+    call_id: str | None,
+    call_record: dict | None,
+    lead_name: str,
+    agent_name: str,
+    brokerage: str,
+    area: str,
 ):
-    """Run the Harvey AI caller pipeline over a Twilio media stream."""
+    services, warm = await voice_services.checkout()
 
     transport = FastAPIWebsocketTransport(
         websocket=websocket,
@@ -41,54 +472,63 @@ async def run_harvey_pipeline(
             audio_out_enabled=True,
             add_wav_header=False,
             vad_enabled=True,
-            vad_analyzer=SileroVADAnalyzer(),
+            vad_analyzer=services.vad,
             vad_audio_passthrough=True,
-            serializer=TwilioFrameSerializer(stream_sid),
+            serializer=serializer,
         ),
     )
 
-    stt = DeepgramSTTService(
-        api_key=os.getenv("DEEPGRAM_API_KEY"),
-        model="nova-3",
-        language="en",
-    )
-
-    llm = OpenAILLMService(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        model="gpt-4o",
-    )
-
-    tts = ElevenLabsTTSService(
-        api_key=os.getenv("ELEVENLABS_API_KEY"),
-        voice_id=os.getenv("ELEVENLABS_VOICE_ID", "pNInz6obpgDQGcFmaJgB"),
-    )
-
     system_prompt = get_qualification_prompt(agent_name, brokerage, area)
     messages = [
         {"role": "system", "content": system_prompt},
     ]
 
     context = OpenAILLMContext(messages=messages)
-    context_aggregator = llm.create_context_aggregator(context)
+    context_aggregator = services.llm.create_context_aggregator(context)
+    speculative = isinstance(services.llm, SpeculativeOpenAILLMService)
+    trimmer = None
+    if settings.VOICE_CONTEXT_KEEP_TURNS > 0:
+        trimmer = ContextTrimmer(
+            context, label, settings.VOICE_CONTEXT_KEEP_TURNS, settings.VOICE_CONTEXT_FOLD_TURNS
+        )
 
     pipeline = Pipeline([
-        transport.input(),        # Twilio WebSocket audio in
-        stt,                      # Deepgram STT
+        transport.input(),        # carrier WebSocket audio in
+        services.stt,             # Deepgram STT
+        *([InterimTap(services.llm, context, settings.VOICE_SPECULATIVE_STABLE_MS)] if speculative else []),
         context_aggregator.user(),
-        llm,                      # Claude
-        tts,                      # ElevenLabs TTS
-        transport.output(),       # Twilio WebSocket audio out
+        *([trimmer] if trimmer else []),
+        services.llm,             # GPT-4o
+        services.tts,             # ElevenLabs TTS (phrase-cached)
+        *([FillerAudio(settings.TTS_FILLER_DELAY_SECONDS)] if settings.TTS_FILLER_DELAY_SECONDS > 0 else []),
+        FirstWordTimer(label, started_at, warm, call_record),
+        transport.output(),       # carrier WebSocket audio out
         context_aggregator.assistant(),
     ])
 
     task = PipelineTask(
         pipeline,
         params=PipelineParams(allow_interruptions=True),
+        observers=[TurnLatencyObserver(label, call_record)],
     )
 
     @transport.event_handler("on_client_connected")
     async def on_client_connected(transport, client):
-        logger.info("Twilio media stream connected")
+        logger.info(f"{label} media stream connected")
+        greeting = await greetings.take(call_id)
+        if greeting is not None:
+            # Play the greeting rendered while the phone rang; the context
+            # reads as if the LLM had said it.
+            context.add_messages([
+                {"role": "user", "content": f"[Call connected. The lead's name is {lead_name}.]"},
+                {"role": "assistant", "content": greeting.text},
+            ])
+            await task.queue_frames([
+                TTSStartedFrame(),
+                TTSAudioRawFrame(audio=greeting.audio, sample_rate=greeting.sample_rate, num_channels=1),
+                TTSStoppedFrame(),
+            ])
+            return
         # Harvey introduces himself
         messages.append({
             "role": "user",
@@ -98,11 +538,65 @@ async def run_harvey_pipeline(
 
     @transport.event_handler("on_client_disconnected")
     async def on_client_disconnected(transport, client):
-        logger.info("Twilio media stream disconnected")
+        logger.info(f"{label} media stream disconnected")
         await task.queue_frames([EndFrame()])
 
     runner = PipelineRunner(handle_sigint=False)
-    await runner.run(task)
+    try:
+        await runner.run(task)
+    finally:
+        if call_record is not None:
+            # Final conversation, for post-call extraction (post_call.py).
+            call_record["messages"] = (
+                trimmer.transcript() if trimmer else [dict(m) for m in context.get_messages()]
+            )
+
+    if speculative:
+        stats = services.llm.speculation_stats()
+        logger.info(f"{label} speculative LLM: {stats}")
+        if call_record is not None:
+            call_record["speculation"] = stats
+
+
+async def run_harvey_pipeline(
+    websocket,
+    stream_sid: str,
+    lead_name: str = "there",
+    agent_name: str = "your agent",
+    brokerage: str = "Harvey Realty",
+    area: str = "your area",
+    started_at: float | None = None,
+    call_id: str | None = None,
+    call_record: dict | None = None,
+    call_sid: str | None = None,
+):
+    """Run the Harvey AI caller pipeline over a Twilio media stream.
+
+    ``started_at`` (``time.monotonic()``) is when the media WebSocket was
+    accepted; time-to-first-word is measured from it. Latency figures and
+    the final context messages are written into ``call_record`` when given.
+    """
+    # The serializer hangs up through the REST API when the pipeline ends,
+    # which needs the call SID and credentials; without them it refuses to start.
+    hang_up = bool(call_sid and settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN)
+    await _run_pipeline(
+        websocket,
+        TwilioFrameSerializer(
+            stream_sid,
+            call_sid=call_sid,
+            account_sid=settings.TWILIO_ACCOUNT_SID,
+            auth_token=settings.TWILIO_AUTH_TOKEN,
+            params=TwilioFrameSerializer.InputParams(auto_hang_up=hang_up),
+        ),
+        label="Twilio",
+        started_at=started_at or time.monotonic(),
+        call_id=call_id,
+        call_record=call_record,
+        lead_name=lead_name,
+        agent_name=agent_name,
+        brokerage=brokerage,
+        area=area,
+    )
 
 
 async def run_telnyx_pipeline(
@@ -112,6 +606,7 @@ async def run_telnyx_pipeline(
     agent_name: str = "your agent",
     brokerage: str = "Harvey Realty",
     area: str = "your area",
+    call_record: dict | None = None,
 ):
     """Run the Harvey AI caller pipeline over a Telnyx media stream.
 
@@ -120,6 +615,8 @@ async def run_telnyx_pipeline(
     """
     import json
 
+    started_at = time.monotonic()
+
     # Wait for the Telnyx stream handshake to get stream_id and encoding info
     stream_id = None
     call_control_id = None
@@ -150,78 +647,21 @@ async def run_telnyx_pipeline(
         await websocket.close()
         return
 
-    telnyx_api_key = os.getenv("TELNYX_API_KEY", "")
-
-    transport = FastAPIWebsocketTransport(
-        websocket=websocket,
-        params=FastAPIWebsocketParams(
-            audio_out_enabled=True,
-            add_wav_header=False,
-            vad_enabled=True,
-            vad_analyzer=SileroVADAnalyzer(),
-            vad_audio_passthrough=True,
-            serializer=TelnyxFrameSerializer(
-                stream_id=stream_id,
-                outbound_encoding=outbound_encoding,
-                inbound_encoding=inbound_encoding,
-                call_control_id=call_control_id,
-                api_key=telnyx_api_key,
-            ),
+    await _run_pipeline(
+        websocket,
+        TelnyxFrameSerializer(
+            stream_id=stream_id,
+            outbound_encoding=outbound_encoding,
+            inbound_encoding=inbound_encoding,
+            call_control_id=call_control_id,
+            api_key=settings.TELNYX_API_KEY,
         ),
+        label="Telnyx",
+        started_at=started_at,
+        call_id=call_id,
+        call_record=call_record,
+        lead_name=lead_name,
+        agent_name=agent_name,
+        brokerage=brokerage,
+        area=area,
     )
-
-    stt = DeepgramSTTService(
-        api_key=os.getenv("DEEPGRAM_API_KEY"),
-        model="nova-3",
-        language="en",
-    )
-
-    llm = OpenAILLMService(
-        api_key=os.getenv("OPENAI_API_KEY"),
-        model="gpt-4o",
-    )
-
-    tts = ElevenLabsTTSService(
-        api_key=os.getenv("ELEVENLABS_API_KEY"),
-        voice_id=os.getenv("ELEVENLABS_VOICE_ID", "pNInz6obpgDQGcFmaJgB"),
-    )
-
-    system_prompt = get_qualification_prompt(agent_name, brokerage, area)
-    messages = [
-        {"role": "system", "content": system_prompt},
-    ]
-
-    context = OpenAILLMContext(messages=messages)
-    context_aggregator = llm.create_context_aggregator(context)
-
-    pipeline = Pipeline([
-        transport.input(),
-        stt,
-        context_aggregator.user(),
-        llm,
-        tts,
-        transport.output(),
-        context_aggregator.assistant(),
-    ])
-
-    task = PipelineTask(
-        pipeline,
-        params=PipelineParams(allow_interruptions=True),
-    )
-
-    @transport.event_handler("on_client_connected")
-    async def on_client_connected(transport, client):
-        logger.info("Telnyx media stream connected to pipeline")
-        messages.append({
-            "role": "user",
-            "content": f"[Call connected. The lead's name is {lead_name}. Introduce yourself and start the conversation.]",
-        })
-        await task.queue_frames([LLMMessagesFrame(messages)])
-
-    @transport.event_handler("on_client_disconnected")
-    async def on_client_disconnected(transport, client):
-        logger.info("Telnyx media stream disconnected")
-        await task.queue_frames([EndFrame()])
-
-    runner = PipelineRunner(handle_sigint=False)
-    await runner.run(task)
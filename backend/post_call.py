@@ -0,0 +1,165 @@
+"""Post-call extraction — qualification, score and summary from a call's transcript.
+
+When a voice pipeline ends, ``submit()`` queues the final LLM context and
+returns straight away, so WebSocket teardown never waits on OpenAI. Calls
+finishing close together are coalesced and extracted several per request
+(POST_CALL_BATCH_SIZE transcripts per completion); the results are written to
+the call record (``qualification``, ``summary``, ``qualification_score``,
+``booking_status``, ``callback_time``) and, for calls placed for a known lead,
+to that lead's record in ``call_store`` (marked ``completed``).
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+
+from openai import AsyncOpenAI
+
+from call_store import call_store
+from config import settings
+from summarizer import format_turns
+from workers import BurstCoalescer
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_MODEL = "gpt-4o-mini"
+MAX_TRANSCRIPT_CHARS = 6000  # per call; the end of the call is kept
+
+# The fields of the EXTRACTED DATA FORMAT in prompts.QUALIFICATION_SYSTEM_PROMPT.
+QUALIFICATION_KEYS = (
+    "budget", "timeline", "neighborhoods", "property_type",
+    "pre_approved", "wants_showing", "showing_day", "callback_time",
+)
+BOOKING_STATUSES = ("booked", "declined", "callback")
+
+EXTRACTION_PROMPT = f"""You review transcripts of real estate lead qualification phone calls made by Harvey, an AI caller.
+
+For every call below, return:
+- "qualification": an object with exactly these keys (null when the lead didn't say): {", ".join(QUALIFICATION_KEYS)}. Use the formats budget "$X-$Y", timeline "immediate"/"3-6months"/"exploring", neighborhoods a list, property_type "single_family"/"condo"/"townhouse", pre_approved and wants_showing true/false.
+- "score": 0-100, how sales-ready the lead is (budget, timeline, pre-approval and interest in a showing).
+- "booking": "booked" if a showing was agreed, "callback" if they asked to be called back, "declined" if they said no, otherwise null.
+- "summary": at most 60 words of plain prose for the agent.
+
+Return ONLY a JSON object {{"calls": [{{"call_id": "...", "qualification": {{...}}, "score": 0, "booking": null, "summary": "..."}}]}} with one entry per call."""
+
+_openai_client: AsyncOpenAI | None = None
+
+
+def _get_openai() -> AsyncOpenAI:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _openai_client
+
+
+def _transcript(messages: list[dict]) -> str:
+    """The spoken turns (no system prompt or ``[Call connected …]`` cues)."""
+    turns = [
+        m for m in messages
+        if m.get("role") in ("user", "assistant")
+        and isinstance(m.get("content"), str)
+        and not m["content"].startswith("[")
+    ]
+    if not any(m["role"] == "user" for m in turns):
+        return ""
+    return format_turns(turns)[-MAX_TRANSCRIPT_CHARS:]
+
+
+def submit(call_id: str, messages: list[dict] | None, lead_id: str | None = None):
+    """Queue a finished call for extraction; calls where the lead never spoke are skipped."""
+    transcript = _transcript(messages or [])
+    if not transcript:
+        logger.info(f"Call {call_id}: no conversation, skipping post-call extraction")
+        return
+    post_call_batches.add("calls", {"call_id": call_id, "lead_id": lead_id, "transcript": transcript})
+
+
+async def _extract(jobs: list[dict]) -> dict[str, dict]:
+    """One completion for several transcripts; results keyed by call_id."""
+    calls = "\n\n".join(f"### call_id: {job['call_id']}\n{job['transcript']}" for job in jobs)
+    resp = await _get_openai().chat.completions.create(
+        model=EXTRACTION_MODEL,
+        messages=[
+            {"role": "system", "content": EXTRACTION_PROMPT},
+            {"role": "user", "content": calls},
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=350 * len(jobs),
+        temperature=0,
+    )
+    results = json.loads(resp.choices[0].message.content).get("calls") or []
+    return {r["call_id"]: r for r in results if isinstance(r, dict) and r.get("call_id")}
+
+
+def _score(value) -> int | None:
+    try:
+        return max(0, min(100, int(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+async def _apply(job: dict, result: dict):
+    raw = result.get("qualification") or {}
+    qualification = {k: raw.get(k) for k in QUALIFICATION_KEYS}
+    score = _score(result.get("score"))
+    booking = result.get("booking") if result.get("booking") in BOOKING_STATUSES else None
+    summary = (result.get("summary") or "").strip() or None
+
+    now = datetime.utcnow().isoformat()
+    await call_store.update(
+        job["call_id"],
+        qualification=qualification,
+        qualification_score=score,
+        booking_status=booking,
+        callback_time=qualification["callback_time"],
+        summary=summary,
+        extracted_at=now,
+    )
+    if job["lead_id"] and not await call_store.update_lead(
+        job["lead_id"],
+        status="completed",
+        completed_at=now,
+        qualification_score=score,
+        call_summary=summary,
+        booking_status=booking,
+        callback_time=qualification["callback_time"],
+        call_id=job["call_id"],
+    ):
+        logger.warning(f"Call {job['call_id']} extracted for unknown lead {job['lead_id']}")
+    logger.info(f"Call {job['call_id']} extracted — score={score}, booking={booking}")
+
+
+async def _extract_chunk(jobs: list[dict]):
+    try:
+        results = await _extract(jobs)
+    except Exception as e:
+        if len(jobs) == 1:
+            logger.warning(f"Post-call extraction failed for call {jobs[0]['call_id']}: {e}")
+            return
+        logger.warning(f"Batched post-call extraction of {len(jobs)} calls failed, retrying singly: {e}")
+        results = {}
+    for job in jobs:
+        result = results.get(job["call_id"])
+        if result is None and len(jobs) > 1:
+            # Dropped from (or broke) the batch answer: ask about it alone.
+            await _extract_chunk([job])
+        elif result is None:
+            logger.warning(f"Post-call extraction returned nothing for call {job['call_id']}")
+        else:
+            await _apply(job, result)
+
+
+async def _handle_batch(_key, jobs: list[dict]):
+    size = max(1, settings.POST_CALL_BATCH_SIZE)
+    chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    await asyncio.gather(*(_extract_chunk(chunk) for chunk in chunks))
+
+
+post_call_batches = BurstCoalescer(
+    "post-call",
+    _handle_batch,
+    window=settings.POST_CALL_BATCH_WINDOW_SECONDS,
+    max_wait=settings.POST_CALL_BATCH_MAX_WAIT_SECONDS,
+)
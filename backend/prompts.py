@@ -27,13 +27,34 @@ When you have info, include it in your internal state as JSON:
 {{"budget": "$X-$Y", "timeline": "immediate/3-6months/exploring", "neighborhoods": ["list"], "property_type": "single_family/condo/townhouse", "pre_approved": true/false, "wants_showing": true/false, "showing_day": "day", "callback_time": "time if requested"}}
 """
 
+# Also played as-is (pre-rendered audio) when AMD detects an answering machine.
+VOICEMAIL_MESSAGE = "Hi {lead_name}, this is Harvey calling on behalf of {agent_name}. I saw you were checking out some properties in {area} and wanted to see if I could help you find something perfect. Give us a call back at {callback_number} whenever you get a chance. Hope you're having a great day!"
+
 VOICEMAIL_PROMPT = """You are Harvey, leaving a brief voicemail on behalf of a real estate agent.
 
-Say: "Hi {lead_name}, this is Harvey calling on behalf of {agent_name}. I saw you were checking out some properties in {area} and wanted to see if I could help you find something perfect. Give us a call back at {callback_number} whenever you get a chance. Hope you're having a great day!"
+Say: "{message}"
 
 Keep it under 20 seconds. Sound warm and natural.
 """
 
+# Opening line (step 1 of the flow above). Fixed text so it can be rendered to
+# audio while the call is still ringing — see greetings.py.
+GREETING_TEMPLATE = "Hi {lead_name}, this is Harvey calling on behalf of {agent_name} with {brokerage}. I noticed you were looking at properties in {area} — do you have a quick minute?"
+
+# Short sentences Harvey says on most calls. Pre-rendered into the TTS phrase
+# cache at startup (see tts_cache.py); the TTS splits replies per sentence, so
+# these are cached sentence by sentence.
+FILLER_PHRASES = ["Mm-hmm.", "Okay.", "Gotcha.", "Sure."]
+COMMON_PHRASES = [
+    "Absolutely.",
+    "Yeah, absolutely.",
+    "No worries at all!",
+    "When would be a better time?",
+    "Totally understand.",
+    "Have a great day!",
+    "Thanks so much for your time.",
+]
+
 def get_qualification_prompt(agent_name: str, brokerage: str, area: str) -> str:
     return QUALIFICATION_SYSTEM_PROMPT.format(
         agent_name=agent_name,
@@ -41,10 +62,23 @@ def get_qualification_prompt(agent_name: str, brokerage: str, area: str) -> str:
         area=area,
     )
 
+def get_voicemail_message(lead_name: str, agent_name: str, area: str, callback_number: str) -> str:
+    return VOICEMAIL_MESSAGE.format(
+        lead_name=lead_name,
+        agent_name=agent_name,
+        area=area,
+        callback_number=callback_number,
+    )
+
 def get_voicemail_prompt(lead_name: str, agent_name: str, area: str, callback_number: str) -> str:
     return VOICEMAIL_PROMPT.format(
+        message=get_voicemail_message(lead_name, agent_name, area, callback_number),
+    )
+
+def get_greeting(lead_name: str, agent_name: str, brokerage: str, area: str) -> str:
+    return GREETING_TEMPLATE.format(
         lead_name=lead_name,
         agent_name=agent_name,
+        brokerage=brokerage,
         area=area,
-        callback_number=callback_number,
     )
@@ -0,0 +1,467 @@
+"""Rule-based qualification extractor — the fast path before the LLM.
+
+Most answers to Sam's questions are formulaic ("2M AED", "next 3 months",
+"villa in Arabian Ranches", "investor visa"). These precompiled patterns
+resolve them locally in microseconds; sms._extract_qualification only asks
+gpt-4o-mini about the fields left unresolved. Values use the same short
+human-readable form the LLM produces.
+
+A wrong local answer is worse than none: a resolved field is never asked
+about again. So the rules abstain (return ``""``, "mentioned but unclear")
+when a match is negated ("not looking for a villa"), when the message holds
+competing candidates ("500k down and 2M total", "a week or two") and they
+ignore questions ("which unit is that?") altogether. An abstention stops
+``extract_from_messages`` from falling back to an older message.
+
+Benchmark: ``python -m bench.bench_qualification`` (from backend/).
+"""
+
+import re
+
+QUALIFICATION_FIELDS = ("budget", "timeline", "area", "property_type", "visa_status")
+
+# ── Abstention ────────────────────────────────────────────────────────────────
+
+_NEGATION_RE = re.compile(
+    r"\b(?:no|not|never|don'?t|doesn'?t|didn'?t|isn'?t|aren'?t|won'?t|wouldn'?t|can'?t|cannot|"
+    r"nor|neither|without|rather than|instead of)\b",
+    re.IGNORECASE,
+)
+# "no more than 2M", "not later than March" state a limit, not a refusal.
+_COMPARATIVE_RE = re.compile(r"\b(?:more|over|above|higher|beyond|exceed\w*|past|later)\b", re.IGNORECASE)
+# Punctuation inside numbers ("1.5M", "1,800,000") doesn't end a clause.
+_CLAUSE_END_RE = re.compile(r"[;:!?\n]|[.,](?!\d)|\b(?:but|though|although)\b", re.IGNORECASE)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _clause_before(text: str, start: int, span: int = 40) -> str:
+    window = text[max(0, start - span):start]
+    end = None
+    for end in _CLAUSE_END_RE.finditer(window):
+        pass
+    return window[end.end():] if end else window
+
+
+def _negated(text: str, start: int) -> bool:
+    clause = _clause_before(text, start)
+    neg = None
+    for neg in _NEGATION_RE.finditer(clause):
+        pass
+    return neg is not None and not _COMPARATIVE_RE.search(clause, neg.end())
+
+
+def _single(values: list[str]) -> str | None:
+    """The one candidate found, ``""`` if they disagree, None if there were none."""
+    distinct = list(dict.fromkeys(values))
+    if not distinct:
+        return None
+    return distinct[0] if len(distinct) == 1 else ""
+
+
+def _statements(text: str) -> str:
+    """``text`` without its questions."""
+    return " ".join(s for s in _SENTENCE_SPLIT_RE.split(text) if not s.rstrip().endswith("?"))
+
+
+# ── Budget (AED amounts) ──────────────────────────────────────────────────────
+
+_NUM = r"\d+(?:[.,]\d+)*"
+_MULT = r"k|m|mn|mil|million|millions|thousand"
+_CUR = r"aed|dhs?|dirhams?|usd|\$"
+
+_AMOUNT_RE = re.compile(
+    rf"(?P<cur1>{_CUR})?\s*(?P<lo>{_NUM})\s*(?P<lomult>{_MULT})?\b"
+    rf"(?:\s*(?:-|–|to|and)\s*(?:{_CUR})?\s*(?P<hi>{_NUM})\s*(?P<himult>{_MULT})?\b)?"
+    rf"\s*(?P<cur2>{_CUR})?",
+    re.IGNORECASE,
+)
+_PERIOD_RE = re.compile(
+    r"\b(?P<year>per year|a year|yearly|annually|annual|p\.?a\.?)\b|\b(?P<month>per month|a month|monthly|pcm)\b",
+    re.IGNORECASE,
+)
+# A bare number (no currency, no multiplier) only counts as a budget when it
+# is written like money ("1,800,000") or follows a budget word — otherwise
+# "call me on 0501234567" or "ref 123456" would read as amounts.
+_BUDGET_CONTEXT_RE = re.compile(
+    r"\b(?:budget|up to|upto|max(?:imum)?|around|about|roughly|spend|afford|pay|price|between|under|below)\b",
+    re.IGNORECASE,
+)
+_GROUPED_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3}
+_MULTIPLIERS.update(dict.fromkeys(("m", "mn", "mil", "million", "millions"), 1e6))
+
+
+def _to_number(raw: str) -> float:
+    # "1,500,000" → thousands separators; "1,5" → decimal comma.
+    if re.fullmatch(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?", raw):
+        raw = raw.replace(",", "")
+    return float(raw.replace(",", "."))
+
+
+def _id_shaped(raw: str, text: str, start: int) -> bool:
+    """Phone numbers, references and other digit runs that aren't amounts."""
+    if start and text[start - 1] == "+":
+        return True
+    return bool(re.match(r"0\d", raw)) or (raw.isdigit() and len(raw) > 9)
+
+
+def _bare_amount_ok(m: re.Match, text: str) -> bool:
+    if _GROUPED_RE.fullmatch(m.group("lo")):
+        return True
+    return bool(_BUDGET_CONTEXT_RE.search(text, max(0, m.start("lo") - 30), m.start("lo")))
+
+
+def _format_amount(value: float) -> str:
+    if value >= 1e6:
+        return f"{value / 1e6:g}M"
+    if value >= 1e3:
+        return f"{value / 1e3:g}K"
+    return f"{value:g}"
+
+
+def extract_budget(text: str) -> str | None:
+    found = []
+    for m in _AMOUNT_RE.finditer(text):
+        currency = (m.group("cur1") or m.group("cur2") or "").lower()
+        lo_mult = (m.group("lomult") or "").lower()
+        hi_mult = (m.group("himult") or "").lower()
+        if _id_shaped(m.group("lo"), text, m.start("lo")):
+            continue
+        # "1.5-2M" → the multiplier applies to both ends.
+        lo_mult = lo_mult or hi_mult
+        lo = _to_number(m.group("lo")) * _MULTIPLIERS.get(lo_mult, 1)
+        hi = _to_number(m.group("hi")) * _MULTIPLIERS.get(hi_mult, 1) if m.group("hi") else None
+
+        top = hi or lo
+        if currency:
+            if top < 1_000:
+                continue
+        elif lo_mult:
+            if top < 10_000:
+                continue
+        elif top < 100_000 or not _bare_amount_ok(m, text):
+            # Bare small numbers are bedrooms, months, floors...
+            continue
+        if _negated(text, m.start()):
+            return ""
+
+        label = "USD" if currency in ("usd", "$") else "AED"
+        amount = _format_amount(lo)
+        if hi and hi != lo:
+            amount += f"-{_format_amount(hi)}"
+        period = _PERIOD_RE.search(text, m.end(), m.end() + 20)
+        if period:
+            amount += " per year" if period.group("year") else " per month"
+        found.append(f"{label} {amount}")
+    return _single(found)
+
+
+# ── Timeline ──────────────────────────────────────────────────────────────────
+
+_WORD_NUMBERS = {
+    "a": "1", "an": "1", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "nine": "9", "twelve": "12",
+    "few": "a few", "couple of": "a couple of", "a few": "a few", "a couple of": "a couple of",
+}
+_MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|november|december"
+    "|jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec"
+)
+
+_TIMELINE_PATTERNS: list[tuple[re.Pattern, object]] = [
+    (
+        re.compile(
+            r"\b(asap|as soon as possible|immediately|right away|urgently|right now|straight away)\b",
+            re.IGNORECASE,
+        ),
+        lambda m: "ASAP",
+    ),
+    (
+        re.compile(
+            r"\b(?:within|in|next|over|in the next|over the next|within the next)\s+(?:the\s+)?"
+            r"(?:next\s+)?(?:about\s+)?(?P<n>\d+|a couple of|couple of|a few|few|an?|one|two|three|four|five|six|nine|twelve)"
+            r"(?:\s*(?:-|to)\s*(?P<n2>\d+))?\s*(?P<unit>day|week|month|year)s?\b",
+            re.IGNORECASE,
+        ),
+        lambda m: _format_span(m),
+    ),
+    (
+        re.compile(r"\b(?P<rel>this|next|end of (?:the|this)?)\s*(?P<unit>week|month|year|quarter|summer|winter|spring|autumn)\b", re.IGNORECASE),
+        lambda m: f"{' '.join(m.group('rel').lower().split())} {m.group('unit').lower()}",
+    ),
+    (
+        re.compile(rf"\b(?:by|before|around|in)\s+(?:the\s+)?(?:end of\s+)?(?P<when>q[1-4]|{_MONTHS})\b", re.IGNORECASE),
+        lambda m: f"by {m.group('when').upper() if m.group('when').lower().startswith('q') else m.group('when').capitalize()}",
+    ),
+    (
+        re.compile(r"\b(?P<prep>by|before|around|in)\s+(?:the\s+)?(?P<end>end of\s+)?(?P<year>20\d\d)\b", re.IGNORECASE),
+        lambda m: _format_year(m),
+    ),
+    (
+        re.compile(
+            r"\b(just browsing|browsing|exploring|just looking|looking around|no rush|not in a rush|"
+            r"no hurry|not in a hurry|just started looking|just starting|early stages?|not urgent)\b",
+            re.IGNORECASE,
+        ),
+        lambda m: "exploring",
+    ),
+]
+
+
+# "in 2027" is only a timeline when the lead says they intend something then;
+# "it was built in 2015" is not.
+_YEAR_INTENT_RE = re.compile(
+    r"\b(?:want|wants|wanting|plan|planning|hope|hoping|intend|looking|aim|aiming|"
+    r"buy|buying|move|moving|relocate|relocating|purchase|ready|will|going to)\b",
+    re.IGNORECASE,
+)
+
+
+def _format_year(m: re.Match) -> str | None:
+    prep = m.group("prep").lower()
+    if prep in ("by", "before") or m.group("end"):
+        return f"by {m.group('year')}"
+    if _YEAR_INTENT_RE.search(m.string, max(0, m.start() - 40), m.start()):
+        return f"by {m.group('year')}"
+    return None
+
+
+def _format_span(m: re.Match) -> str:
+    n = m.group("n").lower()
+    n = _WORD_NUMBERS.get(n, n)
+    unit = m.group("unit").lower()
+    if m.group("n2"):
+        return f"within {n}-{m.group('n2')} {unit}s"
+    plural = "" if n == "1" else "s"
+    return f"within {n} {unit}{plural}"
+
+
+# "a week or two": two spans offered.
+_ALTERNATIVE_RE = re.compile(r"\s+or\s+(?:\d+|an?|one|two|three|four|five|six|nine|twelve)\b", re.IGNORECASE)
+
+
+def extract_timeline(text: str) -> str | None:
+    found = []
+    for pattern, fmt in _TIMELINE_PATTERNS:
+        for m in pattern.finditer(text):
+            value = fmt(m)
+            if not value:
+                continue
+            if _negated(text, m.start()) or _ALTERNATIVE_RE.match(text, m.end()):
+                return ""
+            found.append(value)
+    return _single(found)
+
+
+# ── Areas ─────────────────────────────────────────────────────────────────────
+
+DUBAI_AREAS: dict[str, tuple[str, ...]] = {
+    "Dubai Marina": ("dubai marina", "marina"),
+    "Downtown Dubai": ("downtown dubai", "downtown"),
+    "Business Bay": ("business bay",),
+    "Palm Jumeirah": ("palm jumeirah", "the palm", "palm"),
+    "JVC": ("jvc", "jumeirah village circle"),
+    "JVT": ("jvt", "jumeirah village triangle"),
+    "JLT": ("jlt", "jumeirah lake towers", "jumeirah lakes towers"),
+    "JBR": ("jbr", "jumeirah beach residence"),
+    "Jumeirah": ("jumeirah",),
+    "Jumeirah Golf Estates": ("jumeirah golf estates", "jge"),
+    "Jumeirah Park": ("jumeirah park",),
+    "Jumeirah Islands": ("jumeirah islands",),
+    "Dubai Hills Estate": ("dubai hills estate", "dubai hills"),
+    "Arabian Ranches": ("arabian ranches", "ranches"),
+    "DAMAC Hills": ("damac hills", "damac lagoons"),
+    "Emirates Hills": ("emirates hills",),
+    "DIFC": ("difc",),
+    "City Walk": ("city walk", "citywalk"),
+    "Bluewaters": ("bluewaters", "bluewaters island"),
+    "Dubai Creek Harbour": ("dubai creek harbour", "creek harbour", "creek harbor"),
+    "MBR City": ("mbr city", "mohammed bin rashid city", "meydan"),
+    "Sobha Hartland": ("sobha hartland",),
+    "Al Barsha": ("al barsha", "barsha"),
+    "Al Furjan": ("al furjan", "furjan"),
+    "Al Barari": ("al barari",),
+    "Al Quoz": ("al quoz",),
+    "Umm Suqeim": ("umm suqeim",),
+    "Mirdif": ("mirdif", "mirdiff"),
+    "Deira": ("deira",),
+    "Bur Dubai": ("bur dubai",),
+    "Arjan": ("arjan",),
+    "Motor City": ("motor city",),
+    "Dubai Sports City": ("dubai sports city", "sports city"),
+    "Dubai Silicon Oasis": ("dubai silicon oasis", "silicon oasis", "dso"),
+    "Dubai South": ("dubai south",),
+    "Dubailand": ("dubailand", "dubai land"),
+    "Town Square": ("town square",),
+    "Tilal Al Ghaf": ("tilal al ghaf",),
+    "Discovery Gardens": ("discovery gardens",),
+    "International City": ("international city",),
+    "The Springs": ("the springs",),
+    "The Meadows": ("the meadows",),
+    "The Lakes": ("the lakes",),
+    "The Greens": ("the greens",),
+    "The Views": ("the views",),
+}
+
+_AREA_LOOKUP = {alias: name for name, aliases in DUBAI_AREAS.items() for alias in aliases}
+_AREA_RE = re.compile(
+    r"\b(" + "|".join(re.escape(a) for a in sorted(_AREA_LOOKUP, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+
+# "my office is in DIFC", "we live in JVC now": a place in the lead's life,
+# not necessarily where they want to buy.
+_AREA_ASIDE_RE = re.compile(
+    r"\b(?:office|work|works|working|job|school|currently|live|living|stay|staying)\b",
+    re.IGNORECASE,
+)
+
+
+def extract_area(text: str) -> str | None:
+    found: list[str] = []
+    for m in _AREA_RE.finditer(text):
+        if _negated(text, m.start()) or _AREA_ASIDE_RE.search(_clause_before(text, m.start())):
+            return ""
+        name = _AREA_LOOKUP[m.group(1).lower()]
+        if name not in found:
+            found.append(name)
+    return ", ".join(found) or None
+
+
+# ── Property type ─────────────────────────────────────────────────────────────
+
+_PROPERTY_TYPES: list[tuple[str, str]] = [
+    ("penthouse", r"penthouses?"),
+    ("townhouse", r"town\s?houses?"),
+    ("villa", r"villas?"),
+    ("duplex", r"duplex(?:es)?"),
+    ("studio", r"studios?"),
+    ("apartment", r"apartments?|flats?|condos?"),
+    ("plot", r"plots?|land plots?"),
+    ("office", r"offices?"),
+]
+_PROPERTY_RE = re.compile(
+    r"\b(?:" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in _PROPERTY_TYPES) + r")\b",
+    re.IGNORECASE,
+)
+_BEDROOMS_RE = re.compile(
+    r"\b(?:(?P<alt>\d|one|two|three|four|five|six)\s*(?:or|-|to|/)\s*)?"
+    r"(?P<n>\d|one|two|three|four|five|six)\s*[- ]?(?:br|bhk|bed(?:room)?s?|b/r)\b",
+    re.IGNORECASE,
+)
+
+
+def extract_property_type(text: str) -> str | None:
+    kinds = []
+    for m in _PROPERTY_RE.finditer(text):
+        if _negated(text, m.start()):
+            return ""
+        kinds.append(m.lastgroup)
+    kind = _single(kinds)
+    if kind == "":
+        return ""
+    counts = []
+    for m in _BEDROOMS_RE.finditer(text):
+        if m.group("alt") or _negated(text, m.start()):
+            return ""
+        counts.append(_WORD_NUMBERS.get(m.group("n").lower(), m.group("n").lower()))
+    n = _single(counts)
+    if n == "":
+        return ""
+    if n:
+        if kind in (None, "studio"):
+            kind = "apartment" if kind is None else kind
+        return f"{n}BR {kind}" if kind != "studio" else kind
+    return kind
+
+
+# ── Visa status ───────────────────────────────────────────────────────────────
+
+_VISA_PATTERNS: list[tuple[re.Pattern, str]] = [
+    (re.compile(r"\bgolden visa\b", re.IGNORECASE), "golden visa"),
+    (re.compile(r"\binvest(?:or|ment) visa\b", re.IGNORECASE), "investor visa"),
+    (re.compile(r"\bretirement visa\b", re.IGNORECASE), "retirement visa"),
+    (re.compile(r"\bfreelance(?:r)? visa\b", re.IGNORECASE), "freelance visa"),
+    (re.compile(r"\b(?:tourist|visit|visitor) visa\b|\bon a tourist\b", re.IGNORECASE), "tourist visa"),
+    (re.compile(r"\b(?:uae national|emirati|uae citizen)\b", re.IGNORECASE), "UAE national"),
+    (
+        re.compile(
+            r"\b(?:non[- ]?resident|not (?:a )?resident|no visa|don'?t have (?:a |any )?visa|"
+            r"outside (?:the )?(?:uae|dubai)|overseas|abroad)\b",
+            re.IGNORECASE,
+        ),
+        "non-resident",
+    ),
+    (re.compile(r"\b(?:employment|work|company|family|spouse) visa\b", re.IGNORECASE), "resident (employment visa)"),
+    (
+        re.compile(
+            r"\b(?:resident|residence visa|residency|uae visa|emirates id|"
+            r"(?:live|living|based) (?:in|out of) (?:dubai|the uae|uae|abu dhabi|sharjah))\b",
+            re.IGNORECASE,
+        ),
+        "resident",
+    ),
+]
+
+
+def extract_visa_status(text: str) -> str | None:
+    found: list[str] = []
+    taken: list[tuple[int, int]] = []
+    for pattern, value in _VISA_PATTERNS:
+        for m in pattern.finditer(text):
+            # "not a resident" is non-resident, not also "resident".
+            if any(start < m.end() and m.start() < end for start, end in taken):
+                continue
+            if _negated(text, m.start()):
+                return ""
+            taken.append(m.span())
+            found.append(value)
+    return _single(found)
+
+
+# ── Entry points ──────────────────────────────────────────────────────────────
+
+EXTRACTORS = {
+    "budget": extract_budget,
+    "timeline": extract_timeline,
+    "area": extract_area,
+    "property_type": extract_property_type,
+    "visa_status": extract_visa_status,
+}
+
+
+def _extract(text: str, fields) -> dict[str, str]:
+    """Like ``extract`` but keeps abstentions (``""``)."""
+    text = _statements(text)
+    out = {}
+    for key in fields:
+        value = EXTRACTORS[key](text)
+        if value is not None:
+            out[key] = value
+    return out
+
+
+def extract(text: str, fields: tuple[str, ...] | list[str] = QUALIFICATION_FIELDS) -> dict[str, str]:
+    """Return the qualification fields that can be resolved from ``text``."""
+    return {k: v for k, v in _extract(text, fields).items() if v}
+
+
+def extract_from_messages(
+    messages: list[dict],
+    fields: tuple[str, ...] | list[str] = QUALIFICATION_FIELDS,
+) -> dict[str, str]:
+    """Resolve ``fields`` from the lead's own messages, newest statement winning.
+
+    A field the newest mention leaves unclear is left to the LLM rather than
+    taken from an older message.
+    """
+    remaining = list(fields)
+    out: dict[str, str] = {}
+    for m in reversed(messages):
+        if m["role"] != "user" or not remaining:
+            continue
+        found = _extract(m["content"], remaining)
+        out.update((k, v) for k, v in found.items() if v)
+        remaining = [k for k in remaining if k not in found]
+    return out
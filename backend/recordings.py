@@ -0,0 +1,126 @@
+"""Call recording ingestion — carrier recording → our storage, streamed in chunks.
+
+Twilio's recording status callback only enqueues the transfer (``ingest``);
+a fixed pool of RECORDING_DOWNLOAD_WORKERS downloads run at a time, so a
+burst of calls ending together can't open hundreds of transfers at once.
+Each download is read in RECORDING_CHUNK_BYTES chunks and every chunk goes
+straight to storage, so memory per transfer is one chunk whatever the
+recording's length:
+
+    local     RECORDING_DIR/<call_id>/<recording_sid>.mp3 (written via a
+              .part file and renamed when complete)
+    supabase  Supabase Storage bucket RECORDING_BUCKET; the download is
+              piped into the upload request body
+
+The stored location is written to the call's ``recording_url``.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from pathlib import Path
+from typing import AsyncIterator
+
+from call_store import call_store
+from config import settings
+from http_client import MAX_BACKOFF, NOT_SENT_ERRORS, provider_http
+from workers import KeyedWorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Keyed by recording SID, so a recording is never fetched twice at once.
+downloads = KeyedWorkerPool("recordings", workers=settings.RECORDING_DOWNLOAD_WORKERS)
+
+
+class RecordingError(Exception):
+    pass
+
+
+def ingest(call_id: str, recording_sid: str, source_url: str):
+    """Queue ``source_url`` for transfer to storage; returns immediately."""
+    downloads.submit(recording_sid, lambda: _transfer(call_id, recording_sid, source_url))
+
+
+async def _transfer(call_id: str, recording_sid: str, source_url: str):
+    key = f"{call_id}/{recording_sid}.mp3"
+    attempt = 0
+    while True:
+        try:
+            if settings.RECORDING_STORAGE == "supabase":
+                location, size = await _store_supabase(key, source_url)
+            else:
+                location, size = await _store_local(key, source_url)
+            break
+        except (RecordingError, *NOT_SENT_ERRORS) as e:
+            if attempt >= settings.HTTP_RETRIES:
+                await call_store.update(call_id, recording_status="failed")
+                raise
+            attempt += 1
+            delay = random.uniform(0, min(MAX_BACKOFF, 0.5 * 2 ** attempt))
+            logger.info(f"Recording {recording_sid} transfer failed ({e}), retry {attempt} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+        except Exception:
+            await call_store.update(call_id, recording_status="failed")
+            raise
+    await call_store.update(call_id, recording_url=location, recording_bytes=size, recording_status="stored")
+    logger.info(f"Recording {recording_sid} for call {call_id} stored at {location} ({size} bytes)")
+
+
+async def _download(source_url: str, sizes: list[int]) -> AsyncIterator[bytes]:
+    """Yield the recording in chunks; appends each chunk's size to ``sizes``."""
+    client = provider_http.client(source_url)
+    async with client.stream(
+        "GET",
+        source_url,
+        auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+        follow_redirects=True,
+    ) as resp:
+        if resp.status_code >= 400:
+            raise RecordingError(f"download returned HTTP {resp.status_code}")
+        async for chunk in resp.aiter_bytes(settings.RECORDING_CHUNK_BYTES):
+            sizes.append(len(chunk))
+            yield chunk
+
+
+# ── Storage backends ──────────────────────────────────────────────────────────
+
+
+def _append(fh, chunk: bytes):
+    fh.write(chunk)
+
+
+async def _store_local(key: str, source_url: str) -> tuple[str, int]:
+    path = Path(settings.RECORDING_DIR) / key
+    tmp = path.with_suffix(".part")
+    await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+    sizes: list[int] = []
+    fh = await asyncio.to_thread(open, tmp, "wb")
+    try:
+        async for chunk in _download(source_url, sizes):
+            await asyncio.to_thread(_append, fh, chunk)
+    except BaseException:
+        await asyncio.to_thread(fh.close)
+        await asyncio.to_thread(tmp.unlink, missing_ok=True)
+        raise
+    await asyncio.to_thread(fh.close)
+    await asyncio.to_thread(os.replace, tmp, path)
+    return str(path.resolve()), sum(sizes)
+
+
+async def _store_supabase(key: str, source_url: str) -> tuple[str, int]:
+    bucket = settings.RECORDING_BUCKET
+    upload_url = f"{settings.SUPABASE_URL}/storage/v1/object/{bucket}/{key}"
+    sizes: list[int] = []
+    resp = await provider_http.client(upload_url).post(
+        upload_url,
+        headers={
+            "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+            "Content-Type": "audio/mpeg",
+            "x-upsert": "true",
+        },
+        content=_download(source_url, sizes),  # chunked upload as it downloads
+    )
+    if resp.status_code >= 400:
+        raise RecordingError(f"Supabase Storage upload returned HTTP {resp.status_code}: {resp.text[:200]}")
+    return f"supabase://{bucket}/{key}", sum(sizes)
@@ -1,23 +1,35 @@
 """SMS/WhatsApp qualification flow for Call Harvey — Supabase-backed."""
 
 import os
+import copy
 import json
+import base64
+import asyncio
 import logging
 from datetime import datetime, timezone
-from openai import OpenAI
-from twilio.rest import Client as TwilioClient
-from supabase import create_client, Client as SupabaseClient
-from fastapi import APIRouter, Request, HTTPException
+from typing import Awaitable, Callable
+
+from openai import AsyncOpenAI
+from supabase import acreate_client, AsyncClient as SupabaseClient
+from fastapi import APIRouter, Request, HTTPException, Query
 from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
+from cache import TTLCache
+from config import settings
+from idempotency import webhook_events
+from qualification_rules import extract_from_messages
+from summarizer import summarize_turns
+import telephony
+from workers import BurstCoalescer, KeyedWorkerPool
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/sms", tags=["sms"])
 
 _openai_client = None
-_twilio_client = None
 _supabase_client: SupabaseClient | None = None
+_supabase_lock = asyncio.Lock()
 
 DEFAULT_QUALIFICATION = {
     "budget": None,
@@ -29,37 +41,25 @@ DEFAULT_QUALIFICATION = {
 }
 
 
-def _get_openai():
+def _get_openai() -> AsyncOpenAI:
     global _openai_client
     if _openai_client is None:
-        _openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        _openai_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
     return _openai_client
 
 
-def _get_twilio():
-    global _twilio_client
-    if _twilio_client is None:
-        _twilio_client = TwilioClient(
-            os.getenv("TWILIO_ACCOUNT_SID"),
-            os.getenv("TWILIO_AUTH_TOKEN"),
-        )
-    return _twilio_client
-
-
-def _get_supabase() -> SupabaseClient:
+async def _get_supabase() -> SupabaseClient:
     global _supabase_client
     if _supabase_client is None:
-        _supabase_client = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_KEY"),
-        )
+        async with _supabase_lock:
+            if _supabase_client is None:
+                _supabase_client = await acreate_client(
+                    os.getenv("SUPABASE_URL"),
+                    os.getenv("SUPABASE_KEY"),
+                )
     return _supabase_client
 
 
-def _get_twilio_phone():
-    return os.getenv("TWILIO_PHONE_NUMBER")
-
-
 SYSTEM_PROMPT = """You are Sam, a friendly and professional AI assistant for Harvey Realty, a Dubai real estate agency.
 
 Your job is to qualify leads through natural WhatsApp/SMS conversation. Keep messages SHORT — this is texting, not email.
@@ -84,12 +84,55 @@ Guidelines:
 You are texting on behalf of Harvey Realty. The lead's name and any known context will be provided."""
 
 
+# Off-the-critical-path work (qualification extraction, summary refresh).
+# Jobs are serialised per (kind, phone) and coalesced to the latest.
+background_jobs = KeyedWorkerPool("sms-background", workers=settings.SMS_BACKGROUND_WORKERS)
+
+
+# ── Conversation cache ────────────────────────────────────────────────────────
+# Write-through LRU+TTL cache of per-phone conversation state (the shape
+# _record_inbound_turn returns), so back-to-back turns from the same lead skip
+# the history read. Every Supabase helper that writes keeps it in sync.
+
+_convo_cache = TTLCache(
+    max_bytes=settings.SMS_CACHE_MAX_BYTES,
+    ttl=settings.SMS_CACHE_TTL_SECONDS,
+)
+
+
+def _history_size(unsummarized_count: int) -> int:
+    """Messages the reply LLM sees: the window, stretched to reach the summary."""
+    return max(settings.SMS_HISTORY_WINDOW, unsummarized_count)
+
+
+def _append_to_state(state: dict, role: str, content: str):
+    state["messages"].append({"role": role, "content": content})
+    state["unsummarized_count"] += 1
+    del state["messages"][:-_history_size(state["unsummarized_count"])]
+
+
+def _cache_append(phone: str, role: str, content: str):
+    state = _convo_cache.peek(phone)
+    if state is not None:
+        _append_to_state(state, role, content)
+        _convo_cache.set(phone, state)
+
+
+def _cache_patch(phone: str, **fields):
+    state = _convo_cache.peek(phone)
+    if state is not None:
+        state.update(copy.deepcopy(fields))
+        _convo_cache.set(phone, state)
+
+
 # ── Supabase helpers ──────────────────────────────────────────────────────────
+# All helpers are async so an inbound text never blocks the event loop (and the
+# voice media WebSockets sharing it) while waiting on PostgREST.
 
 
-def _upsert_conversation(phone: str, lead_name: str = "there", area: str | None = None, qualification: dict | None = None):
+async def _upsert_conversation(phone: str, lead_name: str = "there", area: str | None = None, qualification: dict | None = None):
     """Create or update a conversation in Supabase."""
-    sb = _get_supabase()
+    sb = await _get_supabase()
     data = {
         "phone": phone,
         "lead_name": lead_name,
@@ -102,24 +145,26 @@ def _upsert_conversation(phone: str, lead_name: str = "there", area: str | None
     else:
         data["qualification"] = json.dumps(DEFAULT_QUALIFICATION)
 
-    result = sb.table("sms_conversations").upsert(data, on_conflict="phone").execute()
+    result = await sb.table("sms_conversations").upsert(data, on_conflict="phone").execute()
+    _cache_patch(phone, lead_name=lead_name, qualification=qualification or dict(DEFAULT_QUALIFICATION))
     return result.data[0] if result.data else data
 
 
-def _insert_message(phone: str, role: str, content: str):
+async def _insert_message(phone: str, role: str, content: str):
     """Insert a message into sms_messages."""
-    sb = _get_supabase()
-    sb.table("sms_messages").insert({
+    sb = await _get_supabase()
+    await sb.table("sms_messages").insert({
         "conversation_phone": phone,
         "role": role,
         "content": content,
     }).execute()
+    _cache_append(phone, role, content)
 
 
-def _get_conversation(phone: str) -> dict | None:
+async def _get_conversation(phone: str) -> dict | None:
     """Load a conversation from Supabase."""
-    sb = _get_supabase()
-    result = sb.table("sms_conversations").select("*").eq("phone", phone).execute()
+    sb = await _get_supabase()
+    result = await sb.table("sms_conversations").select("*").eq("phone", phone).execute()
     if result.data:
         row = result.data[0]
         qual = row.get("qualification")
@@ -130,55 +175,207 @@ def _get_conversation(phone: str) -> dict | None:
     return None
 
 
-def _get_messages(phone: str) -> list[dict]:
-    """Load messages for a conversation from Supabase."""
-    sb = _get_supabase()
-    result = (
+async def _get_messages(phone: str, limit: int | None = None) -> list[dict]:
+    """Load messages for a conversation from Supabase, oldest first.
+
+    With ``limit``, only the most recent ``limit`` messages are fetched
+    (served by idx_sms_messages_phone).
+    """
+    sb = await _get_supabase()
+    query = (
         sb.table("sms_messages")
         .select("role, content, created_at")
         .eq("conversation_phone", phone)
-        .order("created_at")
-        .execute()
     )
-    return result.data or []
+    if limit is None:
+        result = await query.order("created_at").execute()
+        return result.data or []
+    result = await query.order("created_at", desc=True).limit(limit).execute()
+    return list(reversed(result.data or []))
 
 
-def _update_qualification(phone: str, qualification: dict):
+async def _count_unsummarized(phone: str, summarized_through: str | None) -> int:
+    """Messages newer than the rolling summary (head-only count query)."""
+    sb = await _get_supabase()
+    query = (
+        sb.table("sms_messages")
+        .select("id", count="exact", head=True)
+        .eq("conversation_phone", phone)
+    )
+    if summarized_through:
+        query = query.gt("created_at", summarized_through)
+    result = await query.execute()
+    return result.count or 0
+
+
+async def _update_qualification(phone: str, qualification: dict):
     """Update the qualification JSON for a conversation."""
-    sb = _get_supabase()
-    sb.table("sms_conversations").update({
+    sb = await _get_supabase()
+    await sb.table("sms_conversations").update({
         "qualification": json.dumps(qualification),
         "updated_at": datetime.now(timezone.utc).isoformat(),
     }).eq("phone", phone).execute()
+    _cache_patch(phone, qualification=qualification)
+
+
+def _parse_turn(data: dict, lead_name: str = "there") -> dict:
+    """Normalise a record_inbound_turn payload into the in-memory convo shape."""
+    qual = data.get("qualification")
+    if isinstance(qual, str):
+        qual = json.loads(qual)
+    return {
+        "lead_name": data.get("lead_name") or lead_name,
+        "messages": [{"role": m["role"], "content": m["content"]} for m in data.get("messages") or []],
+        "qualification": qual or dict(DEFAULT_QUALIFICATION),
+        "summary": data.get("summary"),
+        "summarized_through": data.get("summarized_through"),
+        "unsummarized_count": data.get("unsummarized_count") or 0,
+    }
+
+
+async def _record_inbound_turn(phone: str, content: str, lead_name: str = "there") -> dict:
+    """Create the conversation if needed, append the user's message and load
+    the conversation with its recent history — one round trip, or just the
+    insert when the conversation is cached."""
+    cached = _convo_cache.get(phone)
+    if cached is not None:
+        convo = copy.deepcopy(cached)
+        await _insert_message(phone, "user", content)
+        _append_to_state(convo, "user", content)
+        return convo
+
+    sb = await _get_supabase()
+    result = await sb.rpc("record_inbound_turn", {
+        "p_phone": phone,
+        "p_content": content,
+        "p_lead_name": lead_name,
+        "p_qualification": DEFAULT_QUALIFICATION,
+        "p_history_limit": settings.SMS_HISTORY_WINDOW,
+    }).execute()
+    convo = _parse_turn(result.data or {}, lead_name)
+    _convo_cache.set(phone, copy.deepcopy(convo))
+    return convo
+
+
+async def _record_assistant_turn(phone: str, content: str, qualification: dict | None = None):
+    """Append the assistant's reply and, if given, the new qualification — one round trip."""
+    sb = await _get_supabase()
+    await sb.rpc("record_assistant_turn", {
+        "p_phone": phone,
+        "p_content": content,
+        "p_qualification": qualification,
+    }).execute()
+    _cache_append(phone, "assistant", content)
+    if qualification is not None:
+        _cache_patch(phone, qualification=qualification)
+
+
+async def _refresh_summary(phone: str, convo: dict):
+    """Fold messages that fell out of the history window into the rolling summary.
+
+    Runs once ``SMS_SUMMARY_BATCH`` messages have accumulated beyond the window,
+    so the summary LLM call is amortised over several turns. Until then the
+    history stretches past the window down to the summary (``_history_size``),
+    so no message is ever out of the reply LLM's sight. The write is
+    conditional on ``summarized_through`` so concurrent refreshes can't clobber
+    each other.
+    """
+    overflow = convo["unsummarized_count"] - settings.SMS_HISTORY_WINDOW
+    if overflow < settings.SMS_SUMMARY_BATCH:
+        return
+
+    sb = await _get_supabase()
+    query = (
+        sb.table("sms_messages")
+        .select("role, content, created_at")
+        .eq("conversation_phone", phone)
+    )
+    if convo["summarized_through"]:
+        query = query.gt("created_at", convo["summarized_through"])
+    result = await query.order("created_at").limit(overflow).execute()
+    folded = result.data or []
+    if not folded:
+        return
+
+    summary = await summarize_turns(_get_openai(), convo["summary"], folded)
+
+    update = (
+        sb.table("sms_conversations")
+        .update({"summary": summary, "summarized_through": folded[-1]["created_at"]})
+        .eq("phone", phone)
+    )
+    if convo["summarized_through"]:
+        update = update.eq("summarized_through", convo["summarized_through"])
+    else:
+        update = update.is_("summarized_through", "null")
+    result = await update.execute()
+    if not result.data:
+        # Another worker refreshed first; our cached view is stale.
+        _convo_cache.invalidate(phone)
+        return
+    state = _convo_cache.peek(phone)
+    if state is not None:
+        unsummarized = max(state["unsummarized_count"] - len(folded), 0)
+        _cache_patch(
+            phone,
+            summary=summary,
+            summarized_through=folded[-1]["created_at"],
+            unsummarized_count=unsummarized,
+            messages=state["messages"][-_history_size(unsummarized):],
+        )
+    logger.info(f"Summarised {len(folded)} older messages for {phone}")
+
+
+def _schedule_summary_refresh(phone: str, convo: dict):
+    if convo["unsummarized_count"] - settings.SMS_HISTORY_WINDOW < settings.SMS_SUMMARY_BATCH:
+        return
+    background_jobs.submit(("summary", phone), lambda: _refresh_summary(phone, convo))
 
 
 # ── Core logic ────────────────────────────────────────────────────────────────
 
 
-def _get_or_create_convo(phone: str, lead_name: str = "there", area: str | None = None) -> dict:
-    """Get or create conversation, returns dict with lead_name, messages, qualification."""
-    convo = _get_conversation(phone)
+async def _get_or_create_convo(phone: str, lead_name: str = "there", area: str | None = None) -> dict:
+    """Get or create conversation; returns the full in-memory convo state
+    (as _parse_turn builds it) and caches it."""
+    cached = _convo_cache.get(phone)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    # Enough history for a summary that is keeping up; refetched below if not.
+    convo, messages = await asyncio.gather(
+        _get_conversation(phone),
+        _get_messages(phone, limit=settings.SMS_HISTORY_WINDOW + settings.SMS_SUMMARY_BATCH),
+    )
     if convo is None:
         qual = dict(DEFAULT_QUALIFICATION)
         if area:
             qual["area"] = area
-        _upsert_conversation(phone, lead_name, area, qual)
-        return {
+        await _upsert_conversation(phone, lead_name, area, qual)
+        state = {
             "lead_name": lead_name,
             "messages": [],
             "qualification": qual,
+            "summary": None,
+            "summarized_through": None,
+            "unsummarized_count": 0,
         }
+        _convo_cache.set(phone, copy.deepcopy(state))
+        return state
 
-    messages = _get_messages(phone)
-    return {
-        "lead_name": convo.get("lead_name", lead_name),
-        "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
-        "qualification": convo.get("qualification", dict(DEFAULT_QUALIFICATION)),
-    }
+    unsummarized = await _count_unsummarized(phone, convo.get("summarized_through"))
+    if unsummarized > len(messages):
+        messages = await _get_messages(phone, limit=unsummarized)
+    messages = messages[-_history_size(unsummarized):]
+    state = _parse_turn({**convo, "messages": messages, "unsummarized_count": unsummarized}, lead_name)
+    _convo_cache.set(phone, copy.deepcopy(state))
+    return state
 
 
 def _build_messages(convo: dict) -> list[dict]:
     system = SYSTEM_PROMPT + f"\n\nLead name: {convo['lead_name']}"
+    if convo.get("summary"):
+        system += f"\nSummary of earlier conversation: {convo['summary']}"
     qual = convo["qualification"]
     gathered = {k: v for k, v in qual.items() if v and k != "qualified"}
     if gathered:
@@ -189,66 +386,160 @@ def _build_messages(convo: dict) -> list[dict]:
     return [{"role": "system", "content": system}] + convo["messages"]
 
 
-def _extract_qualification(phone: str, convo: dict, assistant_msg: str):
-    """Use GPT to extract any newly revealed qualification data."""
+async def _extract_qualification(convo: dict) -> dict | None:
+    """Extract any newly revealed qualification data — rules first, then GPT.
+
+    Updates ``convo["qualification"]`` in place and returns it when it should be
+    persisted, or None when there is nothing to write.
+    """
     if not convo["messages"]:
-        return
-    if len(convo["messages"]) % 2 != 0:
-        return
+        return None
+    # Only after a complete exchange. (A parity check on the message count no
+    # longer works now that history is windowed.)
+    if convo["messages"][-1]["role"] != "assistant":
+        return None
 
     qual = convo["qualification"]
     missing = [k for k, v in qual.items() if not v and k != "qualified"]
     if not missing:
         qual["qualified"] = True
-        _update_qualification(phone, qual)
-        return
+        return qual
+
+    # Fast path: formulaic answers ("2M AED", "villa", "investor visa") are
+    # resolved locally; the LLM is only asked about what's left.
+    recent = convo["messages"][-10:]
+    qual.update(extract_from_messages(recent, missing))
+    missing = [k for k in missing if not qual.get(k)]
+
+    if missing:
+        try:
+            resp = await _get_openai().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            "Extract real estate qualification data from this conversation. "
+                            "Return ONLY a JSON object with these keys (use null if not mentioned): "
+                            f"{', '.join(missing)}. "
+                            "Values should be short strings summarizing what the lead said."
+                        ),
+                    },
+                    {
+                        "role": "user",
+                        "content": "\n".join(f"{m['role']}: {m['content']}" for m in recent),
+                    },
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=200,
+            )
+            extracted = json.loads(resp.choices[0].message.content)
+            for key in missing:
+                if extracted.get(key):
+                    qual[key] = extracted[key]
+        except Exception as e:
+            logger.warning(f"Extraction failed: {e}")
+
+    filled = sum(1 for k in ("budget", "timeline", "area", "visa_status") if qual.get(k))
+    if filled >= 4:
+        qual["qualified"] = True
+
+    return qual
+
 
+async def _generate_reply(convo: dict) -> str:
+    """Generate the next assistant message via GPT-4o."""
     try:
-        resp = _get_openai().chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Extract real estate qualification data from this conversation. "
-                        "Return ONLY a JSON object with these keys (use null if not mentioned): "
-                        "budget, timeline, area, property_type, visa_status. "
-                        "Values should be short strings summarizing what the lead said."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": "\n".join(
-                        f"{m['role']}: {m['content']}" for m in convo["messages"][-10:]
-                    ),
-                },
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=200,
+        resp = await _get_openai().chat.completions.create(
+            model="gpt-4o",
+            messages=_build_messages(convo),
+            max_tokens=300,
+            temperature=0.7,
         )
-        extracted = json.loads(resp.choices[0].message.content)
-        for key in ("budget", "timeline", "area", "property_type", "visa_status"):
-            if extracted.get(key) and not qual.get(key):
-                qual[key] = extracted[key]
+        return resp.choices[0].message.content.strip()
+    except Exception as e:
+        logger.error(f"OpenAI error: {e}")
+        return "Thanks for your message! Let me get back to you shortly."
+
+
+async def _update_qualification_job(phone: str, convo: dict):
+    """Background job: extract qualification from the latest exchange and store it."""
+    # Merge onto the freshest stored qualification, not the one loaded at
+    # the start of the turn — an earlier job may have written since.
+    current = _convo_cache.peek(phone) or await _get_conversation(phone)
+    if current:
+        convo["qualification"] = dict(current["qualification"])
+    qual = await _extract_qualification(convo)
+    if qual is not None:
+        await _update_qualification(phone, qual)
+
+
+async def _run_turn(
+    phone: str,
+    text: str,
+    send: Callable[[str, str], Awaitable[None]],
+) -> str:
+    """Handle one inbound message end to end: reply via ``send`` and return the reply.
+
+    Only the reply generation sits on the critical path. Persisting the reply
+    runs alongside the send, and qualification extraction / summary refresh
+    are queued on ``background_jobs``.
+    """
+    convo = await _record_inbound_turn(phone, text)
+    reply = await _generate_reply(convo)
+    await asyncio.gather(
+        send(phone, reply),
+        _record_assistant_turn(phone, reply),
+    )
+    convo["messages"].append({"role": "assistant", "content": reply})
+    background_jobs.submit(("qualification", phone), lambda: _update_qualification_job(phone, convo))
+    _schedule_summary_refresh(phone, convo)
+    return reply
 
-        filled = sum(1 for k in ("budget", "timeline", "area", "visa_status") if qual.get(k))
-        if filled >= 4:
-            qual["qualified"] = True
 
-        _update_qualification(phone, qual)
-    except Exception as e:
-        logger.warning(f"Extraction failed: {e}")
+def _greeting_text(lead_name: str, area: str) -> str:
+    """Opening text that starts the qualification conversation."""
+    return (
+        f"Hi {lead_name}, this is Sam from Harvey Realty. "
+        f"I saw you were looking at properties in {area} — "
+        f"are you still in the market? I'd love to help you find the right place."
+    )
 
 
-def _send_sms(to: str, body: str):
+async def _send_sms(to: str, body: str):
     """Send SMS/WhatsApp message via Twilio."""
-    from_number = _get_twilio_phone()
-    if to.startswith("whatsapp:"):
-        from_number = f"whatsapp:{_get_twilio_phone()}"
-    _get_twilio().messages.create(to=to, from_=from_number, body=body)
+    await telephony.get_provider("twilio").send_message(to, body)
     logger.info(f"Sent message to {to}: {body[:80]}...")
 
 
+async def _handle_inbound_burst(phone: str, items: list[tuple[str, Callable]]):
+    """Answer a burst of inbound texts from one lead as a single turn."""
+    text = "\n".join(body for body, _ in items)
+    _, send = items[-1]
+    if len(items) > 1:
+        logger.info(f"Coalesced {len(items)} inbound messages from {phone}")
+    await _run_turn(phone, text, send)
+
+
+# Leads often send several short texts in a row. Messages from the same phone
+# arriving within SMS_BURST_WINDOW_SECONDS are answered as one turn, with at
+# most one generation in flight per conversation.
+inbound_bursts = BurstCoalescer(
+    "sms-inbound",
+    _handle_inbound_burst,
+    window=settings.SMS_BURST_WINDOW_SECONDS,
+    max_wait=settings.SMS_BURST_MAX_WAIT_SECONDS,
+)
+
+
+async def _send_sms_reply(to: str, body: str):
+    """Reply via Twilio (graceful fail for testing)."""
+    try:
+        await _send_sms(to, body)
+    except Exception as e:
+        logger.warning(f"SMS send failed (trial limitation): {e}")
+
+
 # ── API Endpoints ─────────────────────────────────────────────────────────────
 
 
@@ -261,21 +552,17 @@ class SendRequest(BaseModel):
 @router.post("/send")
 async def send_outbound(req: SendRequest):
     """Trigger an outbound text to a lead to start qualification."""
-    convo = _get_or_create_convo(req.lead_phone, req.lead_name, req.area)
+    convo = await _get_or_create_convo(req.lead_phone, req.lead_name, req.area)
     convo["lead_name"] = req.lead_name
     convo["qualification"]["area"] = req.area
 
     # Update Supabase with lead_name and area
-    _upsert_conversation(req.lead_phone, req.lead_name, req.area, convo["qualification"])
+    await _upsert_conversation(req.lead_phone, req.lead_name, req.area, convo["qualification"])
 
-    greeting = (
-        f"Hi {req.lead_name}, this is Sam from Harvey Realty. "
-        f"I saw you were looking at properties in {req.area} — "
-        f"are you still in the market? I'd love to help you find the right place."
-    )
+    greeting = _greeting_text(req.lead_name, req.area)
 
-    _insert_message(req.lead_phone, "assistant", greeting)
-    _send_sms(req.lead_phone, greeting)
+    await _insert_message(req.lead_phone, "assistant", greeting)
+    await _send_sms(req.lead_phone, greeting)
 
     return {"status": "sent", "phone": req.lead_phone, "message": greeting}
 
@@ -290,77 +577,76 @@ async def sms_webhook(request: Request):
     if not body:
         return PlainTextResponse("")
 
+    sid = form.get("MessageSid")
+    event_key = f"twilio-sms:{sid}" if sid else None
+    if not await webhook_events.claim(event_key):
+        return PlainTextResponse(await webhook_events.result(event_key) or "")
+
     logger.info(f"Incoming from {from_number}: {body}")
 
-    convo = _get_or_create_convo(from_number)
-    convo["messages"].append({"role": "user", "content": body})
-    _insert_message(from_number, "user", body)
+    # Answered asynchronously once the lead's burst of messages settles.
+    inbound_bursts.add(from_number, (body, _send_sms_reply))
+    await webhook_events.complete(event_key, "")
+    return PlainTextResponse("")
 
-    # Generate response via GPT-4o
-    try:
-        resp = _get_openai().chat.completions.create(
-            model="gpt-4o",
-            messages=_build_messages(convo),
-            max_tokens=300,
-            temperature=0.7,
-        )
-        reply = resp.choices[0].message.content.strip()
-    except Exception as e:
-        logger.error(f"OpenAI error: {e}")
-        reply = "Thanks for your message! Let me get back to you shortly."
 
-    convo["messages"].append({"role": "assistant", "content": reply})
-    _insert_message(from_number, "assistant", reply)
-    _extract_qualification(from_number, convo, reply)
+def _encode_cursor(row: dict) -> str:
+    """Opaque keyset cursor pointing just past ``row`` in the conversation list."""
+    raw = json.dumps([row["updated_at"], row["phone"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-    # Reply via Twilio (graceful fail for testing)
-    try:
-        _send_sms(from_number, reply)
-    except Exception as e:
-        logger.warning(f"SMS send failed (trial limitation): {e}")
 
-    return PlainTextResponse(reply)
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        updated_at, phone = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return updated_at, phone
 
 
 @router.get("/conversations")
-async def list_conversations():
-    """List all SMS conversations and their qualification status."""
-    sb = _get_supabase()
-    result = sb.table("sms_conversations").select("*").order("updated_at", desc=True).execute()
-
-    out = {}
-    for row in (result.data or []):
-        phone = row["phone"]
+async def list_conversations(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    updated_since: datetime | None = None,
+):
+    """List SMS conversations (newest first) with last message and qualification status.
+
+    One database round trip per page regardless of how many conversations
+    exist. Pass ``next_cursor`` back as ``cursor`` to fetch the next page.
+    """
+    params = {"p_limit": limit}
+    if cursor:
+        params["p_cursor_updated_at"], params["p_cursor_phone"] = _decode_cursor(cursor)
+    if updated_since:
+        params["p_updated_since"] = updated_since.isoformat()
+
+    sb = await _get_supabase()
+    result = await sb.rpc("list_conversation_summaries", params).execute()
+    rows = result.data or []
+
+    conversations = []
+    for row in rows:
         qual = row.get("qualification")
         if isinstance(qual, str):
             qual = json.loads(qual)
+        conversations.append({
+            "phone": row["phone"],
+            "lead_name": row.get("lead_name") or "there",
+            "message_count": row.get("message_count") or 0,
+            "qualification": qual or DEFAULT_QUALIFICATION,
+            "last_message": row.get("last_message"),
+            "updated_at": row.get("updated_at"),
+        })
 
-        # Get last message
-        last_msg_result = (
-            sb.table("sms_messages")
-            .select("role, content")
-            .eq("conversation_phone", phone)
-            .order("created_at", desc=True)
-            .limit(1)
-            .execute()
-        )
-
-        # Get message count
-        msgs_result = (
-            sb.table("sms_messages")
-            .select("id", count="exact")
-            .eq("conversation_phone", phone)
-            .execute()
-        )
+    next_cursor = _encode_cursor(rows[-1]) if len(rows) == limit else None
+    return {"conversations": conversations, "next_cursor": next_cursor}
 
-        out[phone] = {
-            "lead_name": row.get("lead_name", "there"),
-            "message_count": msgs_result.count or 0,
-            "qualification": qual or DEFAULT_QUALIFICATION,
-            "last_message": last_msg_result.data[0] if last_msg_result.data else None,
-        }
 
-    return out
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters and size of the in-process conversation cache."""
+    return _convo_cache.stats()
 
 
 @router.get("/conversations/{phone}")
@@ -368,17 +654,12 @@ async def get_conversation(phone: str):
     """Get full conversation history for a phone number."""
     phone = phone if phone.startswith("+") or phone.startswith("whatsapp") else f"+{phone}"
 
-    convo = _get_conversation(phone)
+    convo, messages = await asyncio.gather(_get_conversation(phone), _get_messages(phone))
     if convo is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    messages = _get_messages(phone)
-    qual = convo.get("qualification", DEFAULT_QUALIFICATION)
-    if isinstance(qual, str):
-        qual = json.loads(qual)
-
     return {
         "lead_name": convo.get("lead_name", "there"),
         "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
-        "qualification": qual,
+        "qualification": convo["qualification"],
     }
@@ -0,0 +1,286 @@
+"""Speculative LLM replies started from interim transcripts (VOICE_SPECULATIVE_LLM).
+
+Deepgram's interim results usually settle a few hundred ms before the user
+aggregator hands the turn to the LLM (VAD stop delay plus finalisation).
+``InterimTap`` sits between STT and the user aggregator and tracks the turn's
+text; once it has been stable for VOICE_SPECULATIVE_STABLE_MS (or VAD says the
+lead stopped) it asks ``SpeculativeOpenAILLMService`` to start a completion in
+the background. Those tokens are only buffered.
+
+When the real context arrives, its last user message is compared with the
+speculated text. On a match the buffered chunks (and the rest of the stream)
+stand in for the completion request, so the base class's TTFB, usage and
+processing metrics still apply; otherwise the speculation is cancelled and the
+normal completion runs. Nothing speculative reaches TTS before the final
+transcript confirms it. If a confirmed speculation's stream fails, the normal
+completion runs for the turn, so it never ends on a truncated reply; as far
+as the new reply repeats what was already replayed, that part is skipped.
+"""
+
+import asyncio
+import copy
+import difflib
+import logging
+import re
+import time
+
+from openai import NOT_GIVEN
+from pipecat.adapters.services.open_ai_adapter import OpenAILLMInvocationParams
+from pipecat.frames.frames import (
+    InterimTranscriptionFrame,
+    TranscriptionFrame,
+    UserStoppedSpeakingFrame,
+)
+from pipecat.processors.frame_processor import FrameDirection, FrameProcessor
+from pipecat.services.openai.llm import OpenAILLMService
+
+from config import settings
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+def _content(chunk) -> str | None:
+    if chunk.choices and chunk.choices[0].delta:
+        return chunk.choices[0].delta.content
+    return None
+
+
+def same_utterance(a: str, b: str, ratio: float) -> bool:
+    """Whether two transcripts differ only by punctuation, case or a few words."""
+    wa, wb = _words(a), _words(b)
+    if wa == wb:
+        return True
+    return difflib.SequenceMatcher(None, wa, wb).ratio() >= ratio
+
+
+class _Speculation:
+    def __init__(self, text: str, base: list[dict]):
+        self.text = text
+        self.base = base  # context messages the completion was built on
+        self.started = time.monotonic()
+        self.first_token: float | None = None
+        self.chunks: list = []  # raw ChatCompletionChunks, usage chunk included
+        self.tokens = 0
+        self.updated = asyncio.Event()
+        self.done = False
+        self.failed = False
+        self.task: asyncio.Task | None = None
+
+
+class SpeculativeOpenAILLMService(OpenAILLMService):
+    """OpenAILLMService that can answer a turn from a completion started early.
+
+    One instance serves one call; ``speculation_stats()`` reports its hit
+    rate, the completion chunks thrown away on misses (~tokens) and the
+    latency saved on hits.
+    """
+
+    def __init__(self, *args, match_ratio: float = 0.9, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._match_ratio = match_ratio
+        self._spec: _Speculation | None = None
+        self._confirmed: _Speculation | None = None  # matched; replayed by get_chat_completions
+        self.turns = 0  # contexts processed; lets InterimTap spot a new turn
+        self._stats = {"attempts": 0, "hits": 0, "misses": 0, "fallbacks": 0, "wasted_tokens": 0, "saved_ms": 0}
+
+    def speculate(self, text: str, messages: list[dict]):
+        """Start (or keep) a background completion for ``messages`` + ``text``."""
+        spec = self._spec
+        if spec is not None and spec.base == messages and same_utterance(spec.text, text, self._match_ratio):
+            return
+        self._discard()
+        spec = self._spec = _Speculation(text, copy.deepcopy(messages))
+        spec.task = asyncio.create_task(self._generate(spec), name="llm-speculation")
+        self._stats["attempts"] += 1
+
+    def _discard(self):
+        spec, self._spec = self._spec, None
+        if spec is None:
+            return
+        if spec.task is not None and not spec.task.done():
+            spec.task.cancel()
+        self._stats["misses"] += 1
+        self._stats["wasted_tokens"] += spec.tokens
+
+    async def _generate(self, spec: _Speculation):
+        messages = spec.base + [{"role": "user", "content": spec.text}]
+        try:
+            # Same request parameters (and timeout retry) as the real completion.
+            stream = await super().get_chat_completions(
+                OpenAILLMInvocationParams(messages=messages, tools=NOT_GIVEN, tool_choice=NOT_GIVEN)
+            )
+            async for chunk in stream:
+                if _content(chunk):
+                    if spec.first_token is None:
+                        spec.first_token = time.monotonic()
+                    spec.tokens += 1
+                spec.chunks.append(chunk)
+                spec.updated.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            spec.failed = True
+            logger.warning(f"Speculative completion failed: {e}")
+        finally:
+            spec.done = True
+            spec.updated.set()
+
+    def _matches(self, spec: _Speculation, messages: list[dict]) -> bool:
+        if not messages or spec.failed:
+            return False
+        last = messages[-1]
+        return (
+            last.get("role") == "user"
+            and isinstance(last.get("content"), str)
+            and messages[:-1] == spec.base
+            and same_utterance(spec.text, last["content"], self._match_ratio)
+        )
+
+    async def _process_context(self, context):
+        self.turns += 1
+        spec = self._spec
+        if spec is not None and self._matches(spec, context.get_messages()):
+            self._confirmed = spec
+        else:
+            self._discard()
+            spec = None
+        try:
+            await super()._process_context(context)
+        finally:
+            self._confirmed = None
+            # Still ours after the replay: the turn was interrupted mid-stream.
+            if spec is not None and self._spec is spec:
+                self._spec = None
+                if spec.task is not None and not spec.task.done():
+                    spec.task.cancel()
+
+    async def get_chat_completions(self, params_from_context):
+        spec, self._confirmed = self._confirmed, None
+        if spec is None:
+            return await super().get_chat_completions(params_from_context)
+        return self._replay(spec, params_from_context)
+
+    async def _replay(self, spec: _Speculation, params_from_context):
+        confirmed_at = time.monotonic()
+        pushed = 0
+        while True:
+            while pushed < len(spec.chunks):
+                yield spec.chunks[pushed]
+                pushed += 1
+            if spec.done:
+                break
+            spec.updated.clear()
+            if pushed == len(spec.chunks) and not spec.done:
+                await spec.updated.wait()
+        if self._spec is spec:
+            self._spec = None
+        if spec.failed:
+            logger.warning(f"Confirmed speculation failed after {pushed} chunks; running the completion")
+            self._stats["fallbacks"] += 1
+            spoken = "".join(_content(c) or "" for c in spec.chunks[:pushed])
+            async for chunk in await super().get_chat_completions(params_from_context):
+                text = _content(chunk)
+                if spoken and text:
+                    if spoken.startswith(text):
+                        spoken = spoken[len(text):]
+                        continue
+                    if text.startswith(spoken):
+                        chunk = copy.deepcopy(chunk)
+                        chunk.choices[0].delta.content = text[len(spoken):]
+                    spoken = ""
+                yield chunk
+            return
+
+        # Without speculation the first token would have come ttft after the
+        # final transcript; with it, the head start is capped by ttft.
+        saved = 0.0
+        if spec.first_token is not None:
+            saved = min(confirmed_at - spec.started, spec.first_token - spec.started)
+        self._stats["hits"] += 1
+        self._stats["saved_ms"] += round(saved * 1000)
+        registry.observe("harvey_voice_speculation_saved_seconds", saved)
+
+    def speculation_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["hit_rate"] = round(stats["hits"] / stats["attempts"], 3) if stats["attempts"] else None
+        return stats
+
+    async def cleanup(self):
+        self._discard()
+        await super().cleanup()
+
+
+class InterimTap(FrameProcessor):
+    """Feeds stable interim transcripts to a SpeculativeOpenAILLMService.
+
+    Goes between STT and the user aggregator; every frame passes through
+    unchanged. The turn's text is the finals seen so far plus the latest
+    interim, reset whenever the LLM has consumed a turn.
+    """
+
+    def __init__(self, llm: SpeculativeOpenAILLMService, context, stable_ms: float):
+        super().__init__()
+        self._llm = llm
+        self._context = context
+        self._stable = stable_ms / 1000
+        self._turn = llm.turns
+        self._finals: list[str] = []
+        self._interim = ""
+        self._timer: asyncio.Task | None = None
+
+    def _text(self) -> str:
+        return " ".join([*self._finals, self._interim]).strip()
+
+    def _sync_turn(self):
+        if self._llm.turns != self._turn:
+            self._turn = self._llm.turns
+            self._finals.clear()
+            self._interim = ""
+
+    def _arm(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.create_task(self._fire(delay))
+
+    async def _fire(self, delay: float):
+        await asyncio.sleep(delay)
+        self._timer = None
+        text = self._text()
+        if text:
+            self._llm.speculate(text, self._context.get_messages())
+
+    async def process_frame(self, frame, direction: FrameDirection):
+        await super().process_frame(frame, direction)
+        if isinstance(frame, InterimTranscriptionFrame):
+            self._sync_turn()
+            self._interim = frame.text
+            self._arm(self._stable)
+        elif isinstance(frame, TranscriptionFrame):
+            self._sync_turn()
+            self._finals.append(frame.text)
+            self._interim = ""
+            self._arm(self._stable)
+        elif isinstance(frame, UserStoppedSpeakingFrame):
+            self._sync_turn()
+            if self._text():
+                self._arm(0)
+        await self.push_frame(frame, direction)
+
+    async def cleanup(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        await super().cleanup()
+
+
+def build_llm(**kwargs) -> OpenAILLMService:
+    """The call's LLM service, speculative when VOICE_SPECULATIVE_LLM is set."""
+    if settings.VOICE_SPECULATIVE_LLM:
+        return SpeculativeOpenAILLMService(match_ratio=settings.VOICE_SPECULATIVE_MATCH_RATIO, **kwargs)
+    return OpenAILLMService(**kwargs)
@@ -0,0 +1,43 @@
+"""Rolling conversation summaries — fold old turns into a short running summary.
+
+Used to keep prompts a constant size on long threads: recent turns are sent
+verbatim, everything older is represented by this summary.
+"""
+
+import logging
+
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL = "gpt-4o-mini"
+
+SUMMARY_PROMPT = """You maintain a running summary of a real estate lead qualification conversation.
+
+Update the summary with the new messages. Keep every concrete fact the lead shared (budget, timeline, areas, property type, visa or financing status, viewing times, objections, personal details) and what the assistant already asked or promised. Drop greetings and small talk.
+
+Write at most 120 words of plain prose. Return only the updated summary."""
+
+
+def format_turns(messages: list[dict]) -> str:
+    return "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+
+async def summarize_turns(
+    client: AsyncOpenAI,
+    previous_summary: str | None,
+    messages: list[dict],
+    max_tokens: int = 250,
+) -> str:
+    """Return ``previous_summary`` updated with ``messages`` (role/content dicts)."""
+    user = f"Current summary:\n{previous_summary or '(none yet)'}\n\nNew messages:\n{format_turns(messages)}"
+    resp = await client.chat.completions.create(
+        model=SUMMARY_MODEL,
+        messages=[
+            {"role": "system", "content": SUMMARY_PROMPT},
+            {"role": "user", "content": user},
+        ],
+        max_tokens=max_tokens,
+        temperature=0.2,
+    )
+    return resp.choices[0].message.content.strip()
@@ -0,0 +1,227 @@
+"""Async telephony layer — one interface over Twilio and Telnyx.
+
+Both backends talk to the carrier's REST API through the shared
+``provider_http`` pool, so dialing, hangups and texts never block the event
+loop or pay a fresh TLS handshake. Pick a backend with ``get_provider(name)``;
+``None`` falls back to ``settings.TELEPHONY_PROVIDER``.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from config import settings
+from http_client import provider_http
+
+logger = logging.getLogger(__name__)
+
+TWILIO_API = "https://api.twilio.com/2010-04-01"
+TELNYX_API = "https://api.telnyx.com/v2"
+
+
+class TelephonyError(Exception):
+    """The carrier rejected a request (non-2xx response)."""
+
+    def __init__(self, provider: str, status_code: int, detail: str):
+        super().__init__(f"{provider} {status_code}: {detail[:300]}")
+        self.provider = provider
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class DialResult:
+    provider: str
+    call_ref: str  # Twilio Call SID / Telnyx call_control_id
+    extra: dict = field(default_factory=dict)
+
+
+class TelephonyProvider(ABC):
+    name: str
+
+    @abstractmethod
+    async def dial(
+        self, to: str, call_id: str, base_url: Optional[str] = None, detect_machine: bool = False
+    ) -> DialResult:
+        """Place an outbound call that will stream its media to our WebSocket.
+
+        With ``detect_machine`` the carrier runs answering-machine detection
+        and reports the result to our webhooks before the stream is started.
+        """
+
+    @abstractmethod
+    async def hangup(self, call_ref: str):
+        ...
+
+    @abstractmethod
+    async def start_stream(self, call_ref: str, stream_url: str):
+        """Start bidirectional media streaming on a live call."""
+
+    @abstractmethod
+    async def drop_voicemail(self, call_ref: str, audio_url: Optional[str], text: str):
+        """Play the voicemail (``audio_url``, else carrier TTS of ``text``) and hang up."""
+
+    @abstractmethod
+    async def send_message(self, to: str, text: str) -> str:
+        """Send an SMS (or WhatsApp where supported); returns the message id."""
+
+
+class TwilioProvider(TelephonyProvider):
+    name = "twilio"
+
+    def _url(self, path: str) -> str:
+        return f"{TWILIO_API}/Accounts/{settings.TWILIO_ACCOUNT_SID}/{path}"
+
+    async def _post(self, path: str, data: dict) -> dict:
+        resp = await provider_http.request(
+            "POST",
+            self._url(path),
+            auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+            data=data,
+        )
+        if resp.status_code >= 400:
+            raise TelephonyError(self.name, resp.status_code, resp.text)
+        return resp.json()
+
+    async def create_call(self, **params) -> str:
+        """POST /Calls with raw Twilio parameters (PascalCase); returns the Call SID."""
+        call = await self._post("Calls.json", params)
+        return call["sid"]
+
+    async def dial(
+        self, to: str, call_id: str, base_url: Optional[str] = None, detect_machine: bool = False
+    ) -> DialResult:
+        base = base_url or settings.BASE_URL
+        params = dict(
+            To=to,
+            From=settings.TWILIO_PHONE_NUMBER,
+            Url=f"{base}/api/twiml/outbound?call_id={call_id}",
+            Record="true",
+            RecordingStatusCallback=f"{base}/api/calls/recording?call_id={call_id}",
+            RecordingStatusCallbackEvent=["completed"],
+            StatusCallback=f"{base}/api/calls/status?call_id={call_id}",
+            StatusCallbackEvent=["initiated", "ringing", "answered", "completed"],
+        )
+        if detect_machine:
+            # Async AMD: the answer TwiML holds the line and /api/calls/amd
+            # either connects the stream (human) or drops the voicemail after
+            # the beep (machine).
+            params.update(
+                Url=f"{base}/api/twiml/outbound?call_id={call_id}&amd=true",
+                MachineDetection="DetectMessageEnd",
+                MachineDetectionTimeout=str(settings.VOICE_AMD_TIMEOUT_SECONDS),
+                AsyncAmd="true",
+                AsyncAmdStatusCallback=f"{base}/api/calls/amd?call_id={call_id}",
+            )
+        sid = await self.create_call(**params)
+        return DialResult(self.name, sid)
+
+    async def hangup(self, call_ref: str):
+        await self._post(f"Calls/{call_ref}.json", {"Status": "completed"})
+
+    async def start_stream(self, call_ref: str, stream_url: str):
+        # Bidirectional streams only exist under <Connect>, so redirect the
+        # live call to fresh TwiML.
+        twiml = f"<Response><Connect><Stream url={quoteattr(stream_url)}/></Connect></Response>"
+        await self._post(f"Calls/{call_ref}.json", {"Twiml": twiml})
+
+    async def drop_voicemail(self, call_ref: str, audio_url: Optional[str], text: str):
+        play = f"<Play>{escape(audio_url)}</Play>" if audio_url else f"<Say>{escape(text)}</Say>"
+        await self._post(f"Calls/{call_ref}.json", {"Twiml": f"<Response>{play}<Hangup/></Response>"})
+
+    async def send_message(self, to: str, text: str) -> str:
+        from_number = settings.TWILIO_PHONE_NUMBER
+        if to.startswith("whatsapp:"):
+            from_number = f"whatsapp:{from_number}"
+        message = await self._post("Messages.json", {"To": to, "From": from_number, "Body": text})
+        return message["sid"]
+
+
+class TelnyxProvider(TelephonyProvider):
+    name = "telnyx"
+
+    async def _post(self, path: str, payload: dict) -> dict:
+        resp = await provider_http.request(
+            "POST",
+            f"{TELNYX_API}/{path}",
+            headers={"Authorization": f"Bearer {settings.TELNYX_API_KEY}"},
+            json=payload,
+        )
+        if resp.status_code >= 400:
+            raise TelephonyError(self.name, resp.status_code, resp.text)
+        return resp.json().get("data", {})
+
+    async def dial(
+        self, to: str, call_id: str, base_url: Optional[str] = None, detect_machine: bool = False
+    ) -> DialResult:
+        base = base_url or settings.BASE_URL
+        payload = {
+            "connection_id": settings.TELNYX_APP_ID,
+            "to": to,
+            "from": settings.TELNYX_PHONE_NUMBER,
+            "webhook_url": f"{base}/api/telnyx/webhook",
+            "webhook_url_method": "POST",
+        }
+        if detect_machine:
+            # Reports call.machine.detection.ended, then (for machines)
+            # call.machine.greeting.ended once the beep is heard.
+            payload["answering_machine_detection"] = "detect_beep"
+            payload["answering_machine_detection_config"] = {
+                "total_analysis_time_millis": settings.VOICE_AMD_TIMEOUT_SECONDS * 1000,
+            }
+        data = await self._post("calls", payload)
+        return DialResult(
+            self.name,
+            data.get("call_control_id", ""),
+            {"call_leg_id": data.get("call_leg_id", "")},
+        )
+
+    async def hangup(self, call_ref: str):
+        await self._post(f"calls/{call_ref}/actions/hangup", {})
+
+    async def start_stream(self, call_ref: str, stream_url: str):
+        await self._post(
+            f"calls/{call_ref}/actions/streaming_start",
+            {
+                "stream_url": stream_url,
+                "stream_track": "both_tracks",
+                "enable_dialogflow": False,
+            },
+        )
+
+    async def drop_voicemail(self, call_ref: str, audio_url: Optional[str], text: str):
+        # Hung up from the webhook on call.playback.ended / call.speak.ended.
+        if audio_url:
+            await self._post(f"calls/{call_ref}/actions/playback_start", {"audio_url": audio_url})
+        else:
+            await self._post(
+                f"calls/{call_ref}/actions/speak",
+                {"payload": text, "voice": "female", "language": "en-US"},
+            )
+
+    async def send_message(self, to: str, text: str) -> str:
+        message = await self._post(
+            "messages",
+            {
+                "from": settings.TELNYX_PHONE_NUMBER,
+                "to": to,
+                "text": text,
+                "messaging_profile_id": settings.TELNYX_MESSAGING_PROFILE_ID or None,
+            },
+        )
+        return message.get("id", "")
+
+
+_providers: dict[str, TelephonyProvider] = {
+    "twilio": TwilioProvider(),
+    "telnyx": TelnyxProvider(),
+}
+
+
+def get_provider(name: Optional[str] = None) -> TelephonyProvider:
+    name = name or settings.TELEPHONY_PROVIDER
+    if name not in _providers:
+        raise ValueError(f"Unknown telephony provider: {name}")
+    return _providers[name]
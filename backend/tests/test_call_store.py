@@ -0,0 +1,152 @@
+"""Status-transition semantics of every call_store backend.
+
+    cd backend && python -m pytest tests
+
+The Redis cases run the real _MODIFY_LUA script against fakeredis (with
+``lupa`` for Lua) and are skipped when it isn't installed.
+"""
+
+import asyncio
+
+import pytest
+
+import call_store
+from call_store import PRE_STREAM_STATUSES, MemoryCallStore, RedisCallStore, SQLiteCallStore
+
+
+def _redis_store(monkeypatch) -> RedisCallStore:
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    import redis.asyncio as aioredis
+
+    monkeypatch.setattr(aioredis, "from_url", lambda url, **kw: fakeredis.FakeAsyncRedis(**kw))
+    return RedisCallStore("redis://test")
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_store(request, tmp_path, monkeypatch):
+    def make():
+        if request.param == "memory":
+            return MemoryCallStore()
+        if request.param == "sqlite":
+            return SQLiteCallStore(str(tmp_path / "calls.sqlite3"))
+        return _redis_store(monkeypatch)
+
+    return make
+
+
+def run(make_store, scenario):
+    async def main():
+        store = make_store()
+        try:
+            await scenario(store)
+        finally:
+            await store.close()
+
+    asyncio.run(main())
+
+
+def test_transition_moves_forward_and_writes_fields(make_store):
+    async def scenario(store):
+        await store.create({"id": "c1", "status": "queued", "started_at": "2026-01-01T00:00:00"})
+        assert await store.transition("c1", "ringing", attempt=2)
+        call = await store.get("c1")
+        assert call["status"] == "ringing"
+        assert call["attempt"] == 2
+
+    run(make_store, scenario)
+
+
+def test_terminal_status_is_never_left(make_store):
+    async def scenario(store):
+        await store.create({"id": "c1", "status": "in-progress"})
+        assert await store.transition("c1", "completed", duration_seconds=42)
+        # A late progress callback is refused and writes nothing.
+        assert not await store.transition("c1", "ringing", duration_seconds=0)
+        call = await store.get("c1")
+        assert call["status"] == "completed"
+        assert call["duration_seconds"] == 42
+        # Terminal → terminal: the carrier's final word wins.
+        assert await store.transition("c1", "no-answer")
+        assert (await store.get("c1"))["status"] == "no-answer"
+
+    run(make_store, scenario)
+
+
+def test_expect_only_allows_listed_statuses(make_store):
+    async def scenario(store):
+        await store.create({"id": "c1", "status": "in-progress"})
+        assert not await store.transition("c1", "connecting", expect=PRE_STREAM_STATUSES)
+        assert (await store.get("c1"))["status"] == "in-progress"
+        await store.create({"id": "c2", "status": "answered"})
+        assert await store.transition("c2", "connecting", expect=PRE_STREAM_STATUSES, answered_by="human")
+        call = await store.get("c2")
+        assert call["status"] == "connecting"
+        assert call["answered_by"] == "human"
+
+    run(make_store, scenario)
+
+
+def test_concurrent_claims_have_one_winner(make_store):
+    async def scenario(store):
+        await store.create({"id": "c1", "status": "answered"})
+        results = await asyncio.gather(
+            *(store.transition("c1", "connecting", expect=PRE_STREAM_STATUSES, by=i) for i in range(8))
+        )
+        assert sum(results) == 1
+        assert (await store.get("c1"))["by"] == results.index(True)
+
+    run(make_store, scenario)
+
+
+def test_update_keeps_status_and_missing_calls_fail(make_store):
+    async def scenario(store):
+        await store.create({"id": "c1", "status": "completed"})
+        assert await store.update("c1", summary={"text": "ok"}, lead_id=None)
+        call = await store.get("c1")
+        assert call["status"] == "completed"
+        assert call["summary"] == {"text": "ok"}
+        assert call["lead_id"] is None
+        assert not await store.update("missing", x=1)
+        assert not await store.transition("missing", "ringing")
+        assert await store.get("missing") is None
+
+    run(make_store, scenario)
+
+
+def test_update_lead_merges_and_missing_leads_fail(make_store):
+    async def scenario(store):
+        await store.put_lead({"id": "l1", "name": "Ann", "status": "new", "imported_at": "2026-01-01T00:00:00"})
+        assert await store.update_lead("l1", status="completed", qualification_score=80, call_id="c1")
+        leads, total = await store.list_leads(10)
+        assert total == 1
+        assert leads[0] == {
+            "id": "l1", "name": "Ann", "status": "completed", "imported_at": "2026-01-01T00:00:00",
+            "qualification_score": 80, "call_id": "c1",
+        }
+        assert not await store.update_lead("missing", status="completed")
+        assert (await store.list_leads(10))[1] == 1
+
+    run(make_store, scenario)
+
+
+def test_sqlite_claims_are_atomic_across_connections(tmp_path):
+    """Two stores on one file stand in for two worker processes."""
+    path = str(tmp_path / "calls.sqlite3")
+
+    async def main():
+        a, b = SQLiteCallStore(path), SQLiteCallStore(path)
+        await a.create({"id": "c1", "status": "answered"})
+        results = await asyncio.gather(
+            *(s.transition("c1", "connecting", expect=PRE_STREAM_STATUSES) for s in (a, b) * 10)
+        )
+        assert sum(results) == 1
+        await a.close()
+        await b.close()
+
+    asyncio.run(main())
+
+
+def test_terminal_statuses_match_lua_table():
+    for status in call_store.TERMINAL_STATUSES:
+        assert f'["\\"{status}\\""] = true' in call_store._MODIFY_LUA
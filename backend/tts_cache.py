@@ -0,0 +1,134 @@
+"""Sentence-level TTS audio cache shared by every call in the worker.
+
+Harvey says the same short sentences on most calls ("Gotcha.", "No worries
+at all!", "Have a great day!"). Audio is keyed by (voice, normalised text,
+sample rate), held in an in-memory LRU with a byte cap and persisted to disk
+so a restart doesn't go back to ElevenLabs for all of it.
+
+Known phrases (fillers, common replies) are pre-rendered at startup. Any
+other sentence is only worth a second render once it has come up again, so
+``note_miss()`` counts misses per sentence and the caller fills the cache
+after TTS_CACHE_FILL_AFTER_MISSES of them.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+from cache import TTLCache
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+PRUNE_EVERY = 200
+MISS_KEYS_MAX = 10_000  # sentences whose misses are counted (LRU)
+
+_WS = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Case- and whitespace-insensitive form of a sentence; punctuation is kept (it changes prosody)."""
+    return _WS.sub(" ", text).strip().casefold()
+
+
+def _read(path: Path) -> bytes | None:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _write(path: Path, audio: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(audio)
+    os.replace(tmp, path)
+
+
+def _prune(directory: Path, max_bytes: int):
+    files = sorted(directory.glob("*.pcm"), key=lambda f: f.stat().st_mtime)
+    total = sum(f.stat().st_size for f in files)
+    for f in files:
+        if total <= max_bytes:
+            break
+        total -= f.stat().st_size
+        f.unlink(missing_ok=True)
+
+
+class PhraseAudioCache:
+    """LRU of raw PCM per sentence, backed by a directory of ``.pcm`` files."""
+
+    def __init__(self, directory: str, max_bytes: int, disk_max_bytes: int, max_chars: int):
+        self.directory = Path(directory)
+        self.disk_max_bytes = disk_max_bytes
+        self.max_chars = max_chars
+        self._memory = TTLCache(max_bytes, ttl=float("inf"), sizeof=len)
+        self._writes = 0
+        self._misses: OrderedDict[str, int] = OrderedDict()
+        self.disk_hits = 0
+
+    def cacheable(self, text: str) -> bool:
+        return 0 < len(text.strip()) <= self.max_chars
+
+    def _key(self, voice_id: str, text: str, sample_rate: int) -> str:
+        return hashlib.sha256(f"{voice_id}|{sample_rate}|{normalize(text)}".encode()).hexdigest()
+
+    async def get(self, voice_id: str, text: str, sample_rate: int) -> bytes | None:
+        if not self.cacheable(text):
+            return None
+        key = self._key(voice_id, text, sample_rate)
+        audio = self._memory.get(key)
+        if audio is None:
+            audio = await asyncio.to_thread(_read, self.directory / f"{key}.pcm")
+            if audio is not None:
+                self.disk_hits += 1
+                self._memory.set(key, audio)
+        return audio
+
+    def note_miss(self, voice_id: str, text: str, sample_rate: int) -> int:
+        """Count a miss for this sentence; returns how many it has had."""
+        key = self._key(voice_id, text, sample_rate)
+        count = self._misses.pop(key, 0) + 1
+        self._misses[key] = count
+        if len(self._misses) > MISS_KEYS_MAX:
+            self._misses.popitem(last=False)
+        return count
+
+    async def put(self, voice_id: str, text: str, sample_rate: int, audio: bytes):
+        if not self.cacheable(text) or not audio:
+            return
+        key = self._key(voice_id, text, sample_rate)
+        self._misses.pop(key, None)
+        self._memory.set(key, audio)
+        await asyncio.to_thread(_write, self.directory / f"{key}.pcm", audio)
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            await asyncio.to_thread(_prune, self.directory, self.disk_max_bytes)
+
+    async def prerender(self, phrases: list[str], voice_id: str, sample_rate: int, synthesize):
+        """Make sure each phrase is cached, synthesising missing ones with ``synthesize(text, voice_id)``."""
+        rendered = 0
+        for text in phrases:
+            if await self.get(voice_id, text, sample_rate) is not None:
+                continue
+            try:
+                await self.put(voice_id, text, sample_rate, await synthesize(text, voice_id))
+                rendered += 1
+            except Exception as e:
+                logger.warning(f"Could not pre-render {text!r}: {e}")
+        logger.info(f"TTS phrase cache: {len(phrases)} phrases ready ({rendered} newly rendered)")
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "disk_hits": self.disk_hits}
+
+
+tts_phrases = PhraseAudioCache(
+    settings.TTS_CACHE_DIR,
+    max_bytes=settings.TTS_CACHE_MAX_BYTES,
+    disk_max_bytes=settings.TTS_CACHE_DISK_MAX_BYTES,
+    max_chars=settings.TTS_CACHE_MAX_CHARS,
+)
@@ -4,41 +4,36 @@ import os
 import logging
 from typing import Optional
 
-from twilio.rest import Client as TwilioClient
 from twilio.twiml.voice_response import VoiceResponse, Connect
 
 from config import settings
+from telephony import get_provider
 
 logger = logging.getLogger(__name__)
 
 
-def get_twilio_client() -> TwilioClient:
-    return TwilioClient(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
-
-
-def initiate_outbound_call(
+async def initiate_outbound_call(
     to_number: str,
     call_id: str,
     base_url: Optional[str] = None,
 ) -> str:
     """Place an outbound call via Twilio. Returns the Twilio Call SID."""
     base = base_url or settings.BASE_URL
-    client = get_twilio_client()
-
-    call = client.calls.create(
-        to=to_number,
-        from_=settings.TWILIO_PHONE_NUMBER,
-        url=f"{base}/api/calls/webhook?call_id={call_id}",
-        record=True,
-        recording_status_callback=f"{base}/api/calls/recording?call_id={call_id}",
-        status_callback=f"{base}/api/calls/status-callback?call_id={call_id}",
-        status_callback_event=["initiated", "ringing", "answered", "completed"],
-        machine_detection="DetectMessageEnd",  # detect voicemail
-        async_amd=True,
-        async_amd_status_callback=f"{base}/api/calls/amd?call_id={call_id}",
+
+    sid = await get_provider("twilio").create_call(
+        To=to_number,
+        From=settings.TWILIO_PHONE_NUMBER,
+        Url=f"{base}/api/calls/webhook?call_id={call_id}",
+        Record="true",
+        RecordingStatusCallback=f"{base}/api/calls/recording?call_id={call_id}",
+        StatusCallback=f"{base}/api/calls/status-callback?call_id={call_id}",
+        StatusCallbackEvent=["initiated", "ringing", "answered", "completed"],
+        MachineDetection="DetectMessageEnd",  # detect voicemail
+        AsyncAmd="true",
+        AsyncAmdStatusCallback=f"{base}/api/calls/amd?call_id={call_id}",
     )
-    logger.info(f"Outbound call {call_id} → {to_number} | SID: {call.sid}")
-    return call.sid
+    logger.info(f"Outbound call {call_id} → {to_number} | SID: {sid}")
+    return sid
 
 
 def build_stream_twiml(call_id: str, base_url: Optional[str] = None) -> str:
@@ -70,8 +65,7 @@ def build_voicemail_twiml(call_id: str, base_url: Optional[str] = None) -> str:
     return str(response)
 
 
-def hangup_call(call_sid: str):
+async def hangup_call(call_sid: str):
     """Terminate an in-progress call."""
-    client = get_twilio_client()
-    client.calls(call_sid).update(status="completed")
+    await get_provider("twilio").hangup(call_sid)
     logger.info(f"Hung up call {call_sid}")
@@ -0,0 +1,83 @@
+"""Pool of pre-built objects that are expensive to create at request time."""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WarmPool(Generic[T]):
+    """Keeps up to ``size`` ready items built by ``factory``.
+
+    ``checkout()`` hands out a ready item immediately (and tops the pool back
+    up in the background), or builds one inline when the pool is empty. Items
+    are single-use: each checkout removes one from the pool.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Awaitable[T]], size: int):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self._ready: list[T] = []
+        self._refill_task: asyncio.Task | None = None
+        self.warm_checkouts = 0
+        self.cold_checkouts = 0
+        self.build_failures = 0
+        self.last_build_ms: float | None = None
+
+    async def _build(self) -> T:
+        start = time.perf_counter()
+        item = await self.factory()
+        self.last_build_ms = (time.perf_counter() - start) * 1000
+        return item
+
+    async def _refill(self):
+        while len(self._ready) < self.size:
+            try:
+                self._ready.append(await self._build())
+            except Exception as e:
+                self.build_failures += 1
+                logger.error(f"{self.name} warm pool: build failed: {e}")
+                return
+
+    def _schedule_refill(self):
+        if self.size > 0 and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self._refill(), name=f"{self.name}-refill")
+
+    async def start(self):
+        """Fill the pool; call from the app lifespan."""
+        self._schedule_refill()
+        if self._refill_task:
+            await self._refill_task
+        logger.info(f"{self.name} warm pool ready: {len(self._ready)}/{self.size}")
+
+    async def checkout(self) -> tuple[T, bool]:
+        """Return ``(item, warm)``; ``warm`` is False when it had to be built inline."""
+        if self._ready:
+            item, warm = self._ready.pop(), True
+            self.warm_checkouts += 1
+        else:
+            item, warm = await self._build(), False
+            self.cold_checkouts += 1
+        self._schedule_refill()
+        return item, warm
+
+    async def stop(self):
+        if self._refill_task:
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
+        self._ready.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "ready": len(self._ready),
+            "warm_checkouts": self.warm_checkouts,
+            "cold_checkouts": self.cold_checkouts,
+            "build_failures": self.build_failures,
+            "last_build_ms": round(self.last_build_ms, 1) if self.last_build_ms is not None else None,
+        }
@@ -0,0 +1,179 @@
+"""Background job runners that keep slow work off request handlers."""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class KeyedWorkerPool:
+    """Fixed pool of asyncio workers with per-key ordering and coalescing.
+
+    Jobs sharing a key never run concurrently and run in submission order. A job
+    submitted while an earlier one for the same key is still waiting replaces
+    it, so a burst of submissions runs only the latest. With ``max_pending``,
+    new keys are dropped while that many jobs are waiting. Workers start
+    lazily on the first submit; call ``stop()`` on shutdown to drain.
+    """
+
+    def __init__(self, name: str, workers: int = 4, max_pending: int | None = None):
+        self.name = name
+        self.size = workers
+        self.max_pending = max_pending
+        self._queue: asyncio.Queue[Hashable] = asyncio.Queue()
+        self._pending: dict[Hashable, Job] = {}
+        self._running: set[Hashable] = set()
+        self._tasks: list[asyncio.Task] = []
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, key: Hashable, job: Job) -> bool:
+        """Schedule ``job`` for ``key``; replaces a not-yet-started job for the same key.
+
+        Returns False if the job was dropped because the pool is full.
+        """
+        self._ensure_started()
+        self.submitted += 1
+        if key in self._pending:
+            self.coalesced += 1
+            self._pending[key] = job
+            return True
+        if self.max_pending is not None and len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._pending[key] = job
+        if key not in self._running:
+            self._queue.put_nowait(key)
+        return True
+
+    def _ensure_started(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker(), name=f"{self.name}-{i}")
+                for i in range(self.size)
+            ]
+
+    async def _worker(self):
+        while True:
+            key = await self._queue.get()
+            job = self._pending.pop(key, None)
+            if job is None:
+                self._queue.task_done()
+                continue
+            self._running.add(key)
+            try:
+                await job()
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"{self.name} job {key!r} failed: {e}")
+            finally:
+                self._running.discard(key)
+                # A newer job for this key arrived while we were running.
+                if key in self._pending:
+                    self._queue.put_nowait(key)
+                self._queue.task_done()
+
+    async def stop(self, timeout: float = 10.0):
+        """Wait up to ``timeout`` seconds for queued jobs, then cancel the workers."""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.name}: {len(self._pending)} jobs dropped at shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.size,
+            "pending": len(self._pending),
+            "running": len(self._running),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+class BurstCoalescer:
+    """Groups items arriving for the same key in quick succession into one batch.
+
+    A batch is flushed to ``handler(key, items)`` once ``window`` seconds pass
+    without a new item (or ``max_wait`` seconds after its first item). At most
+    one handler call per key is in flight; items arriving meanwhile form the
+    next batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Hashable, list], Awaitable[None]],
+        window: float,
+        max_wait: float,
+    ):
+        self.name = name
+        self.handler = handler
+        self.window = window
+        self.max_wait = max_wait
+        self._batches: dict[Hashable, dict] = {}
+        self.items = 0
+        self.batches = 0
+
+    def add(self, key: Hashable, item):
+        now = asyncio.get_running_loop().time()
+        self.items += 1
+        state = self._batches.get(key)
+        if state is None:
+            state = self._batches[key] = {"items": [], "first_at": now, "last_at": now}
+            state["task"] = asyncio.create_task(self._drain(key, state), name=f"{self.name}-{key}")
+        if not state["items"]:
+            state["first_at"] = now
+        state["items"].append(item)
+        state["last_at"] = now
+
+    async def _drain(self, key: Hashable, state: dict):
+        loop = asyncio.get_running_loop()
+        try:
+            while state["items"]:
+                while True:
+                    flush_at = min(state["last_at"] + self.window, state["first_at"] + self.max_wait)
+                    delay = flush_at - loop.time()
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                items, state["items"] = state["items"], []
+                self.batches += 1
+                try:
+                    await self.handler(key, items)
+                except Exception as e:
+                    logger.error(f"{self.name} handler failed for {key!r}: {e}")
+        finally:
+            self._batches.pop(key, None)
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush what's buffered (bounded by ``timeout``) and stop."""
+        tasks = [state["task"] for state in self._batches.values()]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "active_keys": len(self._batches),
+            "items": self.items,
+            "batches": self.batches,
+        }
@@ -59,6 +59,18 @@ function timeAgo(ts: string) {
   return `${Math.floor(hrs / 24)}d`;
 }
 
+// API shape: {phone, lead_name, message_count, qualification, last_message, updated_at}
+function toConversation(c: any): Conversation {
+  return {
+    phone: c.phone,
+    lead_name: c.lead_name || c.phone,
+    last_message: c.last_message?.content || "",
+    last_message_time: c.last_message?.created_at || c.updated_at || "",
+    qualification: c.qualification || {},
+    message_count: c.message_count || 0,
+  };
+}
+
 function SendModal({ onClose, onSent }: { onClose: () => void; onSent: () => void }) {
   const [form, setForm] = useState({ lead_phone: "", lead_name: "", area: "" });
   const [sending, setSending] = useState(false);
@@ -124,6 +136,9 @@ export default function MessagesPage() {
   const [selected, setSelected] = useState<string | null>(null);
   const [messages, setMessages] = useState<Message[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadedMore = useRef(false);
   const [showModal, setShowModal] = useState(false);
   const scrollRef = useRef<HTMLDivElement>(null);
 
@@ -132,22 +147,38 @@ export default function MessagesPage() {
       const res = await fetch(`${API}/api/sms/conversations`);
       if (res.ok) {
         const data = await res.json();
-        // API returns {phone: {lead_name, message_count, qualification, last_message}} — transform to array
-        const arr = Array.isArray(data)
-          ? data
-          : Object.entries(data).map(([phone, c]: [string, any]) => ({
-              phone,
-              lead_name: c.lead_name || phone,
-              last_message: c.last_message?.content || "",
-              last_message_time: "",
-              qualification: c.qualification || {},
-              message_count: c.message_count || 0,
-            }));
-        setConversations(arr);
+        // API returns {conversations: [...], next_cursor}, newest first
+        const page: Conversation[] = (data.conversations || []).map(toConversation);
+        if (!loadedMore.current) {
+          setConversations(page);
+          setNextCursor(data.next_cursor ?? null);
+        } else {
+          // The poll only refreshes the first page; keep the rows loaded with "Load more".
+          const seen = new Set(page.map((c) => c.phone));
+          setConversations((prev) => [...page, ...prev.filter((c) => !seen.has(c.phone))]);
+        }
       }
     } catch {} finally { setLoading(false); }
   }, []);
 
+  const loadMore = useCallback(async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetch(`${API}/api/sms/conversations?cursor=${encodeURIComponent(nextCursor)}`);
+      if (res.ok) {
+        const data = await res.json();
+        const more: Conversation[] = (data.conversations || []).map(toConversation);
+        loadedMore.current = true;
+        setConversations((prev) => {
+          const seen = new Set(prev.map((c) => c.phone));
+          return [...prev, ...more.filter((c) => !seen.has(c.phone))];
+        });
+        setNextCursor(data.next_cursor ?? null);
+      }
+    } catch {} finally { setLoadingMore(false); }
+  }, [nextCursor]);
+
   const fetchMessages = useCallback(async (phone: string) => {
     try {
       const res = await fetch(`${API}/api/sms/conversations/${encodeURIComponent(phone)}`);
@@ -210,7 +241,9 @@ export default function MessagesPage() {
           }`}
         >
           <div className="p-3 border-b border-border">
-            <p className="text-xs text-muted">{conversations.length} conversation{conversations.length !== 1 ? "s" : ""}</p>
+            <p className="text-xs text-muted">
+              {conversations.length}{nextCursor ? "+" : ""} conversation{conversations.length !== 1 ? "s" : ""}
+            </p>
           </div>
           <div className="flex-1 overflow-y-auto">
             {loading ? (
@@ -242,6 +275,15 @@ export default function MessagesPage() {
                 </button>
               ))
             )}
+            {!loading && nextCursor && (
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="w-full p-3 text-xs text-muted hover:text-white hover:bg-surface-light transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? "Loading…" : "Load more"}
+              </button>
+            )}
           </div>
         </div>
 